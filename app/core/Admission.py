@@ -0,0 +1,211 @@
+# app/core/Admission.py
+"""
+EN: Admission control in front of the request handlers.
+    Every API request passes admit() before its handler runs, which checks:
+    0. concurrency: at most `max_inflight` requests (default: capacity)
+       run at once in this process; more are rejected with 503 instead of
+       waiting for a handler or a DB connection.
+    1. load: the expected queueing delay of a new request, estimated
+       from the requests waiting in front of this process (the server's
+       queued(): listen backlog or executor queue), the recent average
+       handler time and `capacity` (the number of handler threads):
+       queued * service time / capacity. Each priority class is refused
+       above its own delay: history reads and exports ("low") are shed
+       first, then ordinary calls, and transfers ("critical") only when
+       the wait is long enough that a fast refusal beats a timeout.
+       Rejected with 503.
+    2. rate: in-memory token buckets keyed by client IP and by card
+       number, with tighter buckets for /login (PIN guessing). Rejected
+       with 429.
+    Both answers carry Retry-After and cost no DB work. A bucket is a
+    two-float list updated under one lock; buckets are kept in LRU order
+    and the least recently used are dropped above max_keys.
+    Limits are per process: with N worker processes the effective rates
+    are up to N times higher.
+FA: کنترل پذیرش درخواست‌ها: محدودیت نرخ بر اساس IP و شماره کارت، و رد سریع درخواست‌های کم‌اهمیت هنگام بار زیاد.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# EN: capacity = concurrent requests per process (None: the server's worker
+#     count); max_inflight = hard limit on them (None: capacity);
+#     shed_after = expected queueing delay (seconds) from which a class is
+#     refused; rates are (tokens per second, burst)
+# FA: تنظیمات ظرفیت، آستانه رد درخواست برای هر اولویت و نرخ مجاز
+ADMISSION_CONFIG = dict(
+    enabled=True,
+    capacity=None,
+    max_inflight=None,
+    shed_after={"low": 0.1, "normal": 0.5, "critical": 2.0},
+    ip=(50.0, 100),
+    card=(10.0, 30),
+    login_ip=(1.0, 20),
+    login_card=(0.2, 10),
+    max_keys=100000,
+)
+
+# EN: priority and extra buckets per route; unlisted API routes are "normal"
+# FA: اولویت هر مسیر و محدودیت‌های اضافه آن
+ROUTE_POLICY = {
+    "/transfer": ("critical", ()),
+    "/transfers/batch": ("critical", ()),
+    "/login": ("normal", ("login_ip", "login_card")),
+    "/transactions": ("low", ()),
+    "/statement": ("low", ()),
+    "/statement/bank": ("low", ()),
+    "/accounts/export": ("low", ()),
+    "/accounts/import": ("low", ()),
+}
+DEFAULT_POLICY = ("normal", ())
+
+# EN: not limited, so operators can still look at an overloaded server
+# FA: مسیرهای مدیریتی بدون محدودیت
+EXEMPT = frozenset({"/metrics", "/stats/pool", "/stats/retries", "/stats/cache", "/debug/profiler"})
+
+
+class Rejection:
+    __slots__ = ("status", "reason", "retry_after")
+
+    def __init__(self, status, reason, retry_after):
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def message(self):
+        if self.status == 503:
+            return "Server is busy. Try again later."
+        return "Too many requests. Try again later."
+
+
+class TokenBuckets:
+    """
+    EN: One token bucket per key: `burst` tokens, refilled at `rate` per second.
+    FA: سطل توکن برای هر کلید (IP یا شماره کارت).
+    """
+
+    def __init__(self, rate, burst, max_keys=None):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys or ADMISSION_CONFIG["max_keys"]
+        self._buckets = OrderedDict()        # key -> [tokens, last refill], least recently used first
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None):
+        """
+        EN: 0.0 if a token was taken, else seconds until one is available.
+        FA: برداشتن یک توکن؛ در صورت نبود، زمان انتظار برگردانده می‌شود.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [self.burst, now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """
+    EN: admit() -> None (admitted: call release() when done) or a Rejection
+        (nothing to release).
+    FA: تصمیم پذیرش یا رد هر درخواست.
+    """
+
+    def __init__(self, capacity=None, enabled=None, max_inflight=None):
+        self.enabled = ADMISSION_CONFIG["enabled"] if enabled is None else enabled
+        self.capacity = capacity or ADMISSION_CONFIG["capacity"] or 16
+        self.max_inflight = max_inflight or ADMISSION_CONFIG["max_inflight"]
+        self.buckets = {name: TokenBuckets(*ADMISSION_CONFIG[name])
+                        for name in ("ip", "card", "login_ip", "login_card")}
+        self.inflight = 0
+        self.service_time = 0.0              # moving average of handler time (seconds)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "peak_inflight": 0, "peak_queued": 0, "shed_inflight": 0, "shed_low": 0,
+                       "shed_normal": 0, "shed_critical": 0, "limited_ip": 0, "limited_card": 0,
+                       "limited_login_ip": 0, "limited_login_card": 0}
+
+    def configure(self, capacity=None, enabled=None, max_inflight=None):
+        if capacity:
+            self.capacity = capacity
+        if max_inflight:
+            self.max_inflight = max_inflight
+        if enabled is not None:
+            self.enabled = enabled
+
+    def admit(self, path, ip, card=None, queued=0):
+        # EN: every request counts as in flight (release() always follows an admit)
+        # FA: همه درخواست‌ها در شمارش درخواست‌های جاری هستند
+        limited = self.enabled and path not in EXEMPT
+        priority, extra = ROUTE_POLICY.get(path, DEFAULT_POLICY)
+        with self._lock:
+            self._stats["requests"] += 1
+            if queued > self._stats["peak_queued"]:
+                self._stats["peak_queued"] = queued
+            if limited and self.inflight >= (self.max_inflight or self.capacity):
+                self._stats["shed_inflight"] += 1
+                return Rejection(503, "shed_inflight", 1)
+            if limited and queued and queued * self.service_time >= \
+                    self.capacity * ADMISSION_CONFIG["shed_after"][priority]:
+                self._stats["shed_" + priority] += 1
+                return Rejection(503, "shed_" + priority, 1)
+            self.inflight += 1
+            if self.inflight > self._stats["peak_inflight"]:
+                self._stats["peak_inflight"] = self.inflight
+        if not limited:
+            return None
+
+        now = time.monotonic()
+        checks = [("ip", ip)]
+        if card:
+            checks.append(("card", card))
+        for name in extra:
+            key = card if name.endswith("card") else ip
+            if key:
+                checks.append((name, key))
+        for name, key in checks:
+            wait = self.buckets[name].take(key, now)
+            if wait:
+                with self._lock:
+                    self.inflight -= 1
+                    self._stats["limited_" + name] += 1
+                return Rejection(429, "limited_" + name, max(1, math.ceil(wait)))
+        return None
+
+    def release(self, elapsed=None):
+        # EN: elapsed = handler time of the admitted request
+        # FA: زمان اجرای درخواست برای میانگین متحرک
+        with self._lock:
+            self.inflight -= 1
+            if elapsed is not None:
+                self.service_time = elapsed if not self.service_time else \
+                    self.service_time + (elapsed - self.service_time) * 0.05
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+            rejected = sum(v for k, v in self._stats.items() if k.startswith(("shed_", "limited_")))
+            out.update(inflight=self.inflight, capacity=self.capacity,
+                       max_inflight=self.max_inflight or self.capacity, enabled=int(self.enabled),
+                       service_ms=round(self.service_time * 1000, 3),
+                       rejected=rejected, admitted=out["requests"] - rejected)
+        out.update({f"{name}_keys": len(b) for name, b in self.buckets.items()})
+        return out
+
+
+# EN: process-wide controller used by the HTTP server
+# FA: نمونه مشترک در سطح پروسه
+admission = AdmissionController()
@@ -0,0 +1,118 @@
+# app/core/EventBus.py
+import json
+import threading
+from collections import deque
+
+# EN: per-subscriber buffer bound; a client that falls this far behind is dropped
+#     (its EventSource reconnects and resyncs from a fresh "balance" event)
+# FA: حداکثر رویدادهای در صف هر مشترک؛ مشترک کند قطع می‌شود
+MAX_EVENTS = 256
+
+
+def sse_frame(event, data, event_id=None):
+    """
+    EN: One server-sent-events frame as bytes (data is JSON-encoded).
+    FA: ساخت یک فریم SSE.
+    """
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return (f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n").encode("utf-8")
+
+
+class Subscription:
+    """
+    EN: One subscriber of one topic: a bounded queue of encoded frames plus a
+        notify() callback set by whoever delivers them (SSE hub / event loop).
+    FA: یک مشترک با صف محدود از فریم‌ها.
+    """
+
+    __slots__ = ("topic", "frames", "max_events", "overflowed", "closed", "notify", "__weakref__")
+
+    def __init__(self, topic, max_events):
+        self.topic = topic
+        self.frames = deque()
+        self.max_events = max_events
+        self.overflowed = False
+        self.closed = False
+        self.notify = None
+
+    def push(self, frame):
+        if self.closed or self.overflowed:
+            return False
+        if len(self.frames) >= self.max_events:
+            self.overflowed = True
+            self.frames.clear()
+        else:
+            self.frames.append(frame)
+        notify = self.notify
+        if notify is not None:
+            notify(self)
+        return not self.overflowed
+
+    def drain(self):
+        # EN: all queued frames as one bytes object (b"" if none)
+        # FA: خالی کردن صف
+        frames = []
+        while self.frames:
+            frames.append(self.frames.popleft())
+        return b"".join(frames)
+
+
+class EventBus:
+    """
+    EN: In-process pub/sub keyed by topic (card number). publish() encodes
+        nothing itself: callers pass a ready frame, so one encoding is shared
+        by every subscriber of the topic. It never blocks the publisher: it
+        only appends to bounded queues and calls notify().
+    FA: انتشار/اشتراک درون‌پروسه‌ای بر اساس شماره کارت؛ انتشار هرگز منتظر مشترک‌ها نمی‌ماند.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.max_events = max_events
+        self._topics = {}                    # topic -> set of Subscription
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "delivered": 0, "overflows": 0}
+
+    def subscribe(self, topic, max_events=None):
+        sub = Subscription(topic, max_events or self.max_events)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        sub.closed = True
+        with self._lock:
+            subs = self._topics.get(sub.topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[sub.topic]
+
+    def has_subscribers(self, topic):
+        return topic in self._topics
+
+    def publish(self, topic, frame):
+        with self._lock:
+            subs = tuple(self._topics.get(topic, ()))
+            self._stats["published"] += 1
+        delivered = overflows = 0
+        for sub in subs:
+            if sub.push(frame):
+                delivered += 1
+            else:
+                overflows += 1
+        if subs:
+            with self._lock:
+                self._stats["delivered"] += delivered
+                self._stats["overflows"] += overflows
+        return delivered
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+            out.update(topics=len(self._topics), subscribers=sum(len(s) for s in self._topics.values()))
+        return out
+
+
+# EN: process-wide bus: AccountModel publishes committed transfers, /events subscribes
+# FA: گذرگاه رویداد مشترک در سطح پروسه
+bus = EventBus()
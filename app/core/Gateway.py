@@ -0,0 +1,413 @@
+# app/core/Gateway.py
+"""
+EN: WSGI and ASGI application objects built from the BankHandler routes.
+    The handler classes stay the single implementation of the HTTP API: each
+    request runs one handler instance with no socket. Its status line and
+    headers are collected as they are sent, and the body comes from an
+    in-memory wfile. Streamed bodies (_send_chunked) become the
+    response iterable, and event streams (attach_stream) are pumped by the
+    application until the client goes away.
+    Per-process state (pools, background threads) is the host's business:
+    on_worker_start runs once in every process that serves requests, so the
+    same object works when a pre-forking server imports it once in the
+    master and forks workers from there.
+    Usage: WSGIApp(BankHandler, on_worker_start=...) / ASGIApp(BankHandler, ...)
+FA: برنامه WSGI و ASGI از روی مسیرهای BankHandler؛ اجرای هر درخواست بدون سوکت و جمع‌آوری پاسخ در حافظه.
+"""
+import asyncio
+import http.client
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import quote
+
+from app.core.EventBus import bus
+from app.core.Streams import STREAM_CONFIG, PING
+
+# EN: headers the application server owns (WSGI forbids hop-by-hop headers)
+# FA: هدرهایی که سرور میزبان خودش تنظیم می‌کند
+HOST_HEADERS = frozenset(("connection", "keep-alive", "transfer-encoding", "server", "date"))
+
+# EN: ASGI request bodies larger than this are spooled to a temporary file
+# FA: بدنه‌های بزرگ‌تر از این مقدار در فایل موقت نگه داشته می‌شوند
+SPOOL_BYTES = 1 << 20
+
+
+class _GatewayRequestMixin:
+    """
+    EN: Runs exactly one request of a BaseHTTPRequestHandler subclass from
+        already-parsed request data; the response is collected, not written.
+    FA: اجرای یک درخواست بدون سوکت؛ پاسخ جمع‌آوری می‌شود.
+    """
+
+    def __init__(self, server, method, target, version, headers, body, client_address):
+        # EN: no BaseRequestHandler.__init__: there is no socket to set up
+        # FA: سازنده پایه اجرا نمی‌شود چون سوکتی وجود ندارد
+        self.server = server
+        self.client_address = client_address
+        self.request = None
+        self.command = method
+        self.path = target
+        self.request_version = version
+        self.requestline = f"{method} {target} {version}"
+        self.headers = headers
+        self.rfile = body
+        self.wfile = io.BytesIO()
+        self.close_connection = True
+        self.status = 500
+        self.response_headers = []
+        self.body_iter = None
+        self.stream = None
+
+    def run(self):
+        method = getattr(self, "do_" + self.command, None)
+        if method is None:
+            self.send_error(HTTPStatus.NOT_IMPLEMENTED, f"Unsupported method ({self.command!r})")
+        else:
+            method()
+        return self
+
+    def send_response_only(self, code, message=None):
+        self.status = int(code)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() not in HOST_HEADERS:
+            self.response_headers.append((keyword, str(value)))
+
+    def end_headers(self):
+        pass
+
+    def flush_headers(self):
+        pass
+
+    def log_request(self, code="-", size="-"):
+        # EN: access logs are written by the application server
+        # FA: لاگ درخواست‌ها با سرور میزبان است
+        pass
+
+    def _send_chunked(self, status, chunks, content_type="application/json"):
+        # EN: the iterable itself becomes the response body; the host frames it
+        # FA: خود iterable بدنه پاسخ می‌شود
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.body_iter = chunks
+
+    @property
+    def status_line(self):
+        try:
+            return f"{self.status} {HTTPStatus(self.status).phrase}"
+        except ValueError:
+            return f"{self.status} Unknown"
+
+
+def _encoded(chunks):
+    # EN: str/bytes chunks -> non-empty bytes, closing the source when done
+    # FA: تبدیل قطعه‌ها به bytes
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+class _GatewayApp:
+    """
+    EN: Shared plumbing: handler class, per-process start hook, stream
+        bookkeeping (the /events route calls stream_count / attach_stream)
+        and the host's queue length for admission control (queued).
+    FA: بخش مشترک WSGI و ASGI.
+    """
+
+    def __init__(self, handler_cls, on_worker_start=None, on_worker_stop=None):
+        self._handler_cls = type(
+            type(self).__name__ + handler_cls.__name__, (_GatewayRequestMixin, handler_cls), {}
+        )
+        self.on_worker_start = on_worker_start
+        self.on_worker_stop = on_worker_stop
+        self._pid = None
+        self._lock = threading.Lock()
+        self._streams = 0
+        # EN: callable -> requests waiting in the host server (PreforkServer sets it); None = unknown
+        # FA: تعداد درخواست‌های منتظر در سرور میزبان
+        self.queue_depth = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._streams = 0
+
+    def ensure_worker(self):
+        # EN: once per serving process (first request, or ASGI lifespan startup)
+        # FA: یک بار در هر پروسه
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                if self.on_worker_start is not None:
+                    self.on_worker_start()
+                self._pid = pid
+
+    def stop_worker(self):
+        with self._lock:
+            if self._pid == os.getpid() and self.on_worker_stop is not None:
+                self.on_worker_stop()
+            self._pid = None
+
+    def attach_stream(self, handler, sub):
+        handler.close_connection = True
+        handler.stream = sub
+
+    def stream_count(self):
+        return self._streams
+
+    def queued(self):
+        return self.queue_depth() if self.queue_depth is not None else 0
+
+    def _stream_opened(self, delta):
+        with self._lock:
+            self._streams += delta
+
+    def _handle(self, method, target, version, headers, body, client_address):
+        return self._handler_cls(self, method, target, version, headers, body, client_address).run()
+
+
+def _wsgi_target(environ):
+    # EN: routes are relative to where the application is mounted (PATH_INFO)
+    # FA: مسیر نسبت به محل نصب برنامه
+    path = environ.get("PATH_INFO") or "/"
+    # EN: PATH_INFO is decoded (latin-1 per PEP 3333); the handler expects the raw, quoted target
+    # FA: بازگرداندن مسیر به شکل خام
+    path = quote(path.encode("latin-1").decode("utf-8", "replace"), safe="/:@!$&'()*+,;=~")
+    query = environ.get("QUERY_STRING")
+    return path + "?" + query if query else path
+
+
+def _wsgi_headers(environ):
+    headers = http.client.HTTPMessage()
+    if environ.get("CONTENT_TYPE"):
+        headers["Content-Type"] = environ["CONTENT_TYPE"]
+    if environ.get("CONTENT_LENGTH"):
+        headers["Content-Length"] = environ["CONTENT_LENGTH"]
+    for key, value in environ.items():
+        if key.startswith("HTTP_") and key not in ("HTTP_CONTENT_TYPE", "HTTP_CONTENT_LENGTH"):
+            headers[key[5:].replace("_", "-").title()] = value
+    return headers
+
+
+class WSGIApp(_GatewayApp):
+    """
+    EN: WSGI callable. An event stream keeps its worker (thread, greenlet or
+        process, depending on the server) until the client disconnects, so
+        serve /events from a threaded or async worker class.
+    FA: برنامه WSGI؛ هر جریان رویداد یک worker را تا قطع اتصال نگه می‌دارد.
+    """
+
+    def __call__(self, environ, start_response):
+        self.ensure_worker()
+        handler = self._handle(
+            environ.get("REQUEST_METHOD", "GET").upper(), _wsgi_target(environ),
+            environ.get("SERVER_PROTOCOL", "HTTP/1.1"), _wsgi_headers(environ),
+            environ["wsgi.input"], (environ.get("REMOTE_ADDR", ""), int(environ.get("REMOTE_PORT") or 0)),
+        )
+        start_response(handler.status_line, handler.response_headers)
+        head = handler.wfile.getvalue()
+        if handler.stream is not None:
+            return self._events(head, handler.stream)
+        if handler.body_iter is not None:
+            return _encoded(handler.body_iter)
+        return [head]
+
+    def _events(self, head, sub):
+        # EN: block on the subscription; heartbeat while idle; stop on overflow
+        # FA: ارسال رویدادها تا قطع اتصال یا پر شدن صف
+        ready = threading.Event()
+        sub.notify = lambda _sub: ready.set()
+        self._stream_opened(1)
+        try:
+            yield head
+            while not sub.overflowed:
+                data = sub.drain()
+                if data:
+                    yield data
+                ready.clear()
+                if sub.frames:
+                    continue
+                if not ready.wait(STREAM_CONFIG["heartbeat"]):
+                    yield PING
+        finally:
+            self._stream_opened(-1)
+            sub.notify = None
+            bus.unsubscribe(sub)
+
+
+class ASGIApp(_GatewayApp):
+    """
+    EN: ASGI 3 callable (http and lifespan scopes). The blocking handler and
+        its DB calls run on a bounded thread executor, as in AsyncHTTPServer;
+        streamed bodies are pulled from the executor chunk by chunk and
+        event streams are pumped on the event loop.
+    FA: برنامه ASGI؛ هندلر روی executor و جریان رویدادها روی event loop.
+    """
+
+    def __init__(self, handler_cls, max_workers=16, on_worker_start=None, on_worker_stop=None):
+        super().__init__(handler_cls, on_worker_start, on_worker_stop)
+        self.max_workers = max_workers
+        self._executor = None
+        self._waiting = 0                  # requests not yet picked up by the executor
+        self._waiting_lock = threading.Lock()
+
+    def _after_fork(self):
+        super()._after_fork()
+        self._executor = None
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def queued(self):
+        return self._waiting + super().queued()
+
+    def _handle(self, *args):
+        with self._waiting_lock:
+            self._waiting -= 1
+        return super()._handle(*args)
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="bank-asgi")
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await loop.run_in_executor(None, self.ensure_worker)
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await loop.run_in_executor(None, self.stop_worker)
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(SPOOL_BYTES)
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            body.write(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body.seek(0)
+        return body
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        if self._pid != os.getpid():
+            await loop.run_in_executor(None, self.ensure_worker)
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        headers = http.client.HTTPMessage()
+        for name, value in scope.get("headers", ()):
+            headers[name.decode("latin-1")] = value.decode("latin-1")
+        # EN: the body is buffered whole (a chunked upload arrives without a length)
+        # FA: طول بدنه از داده دریافت‌شده
+        del headers["Content-Length"], headers["Transfer-Encoding"]
+        body.seek(0, os.SEEK_END)
+        headers["Content-Length"] = str(body.tell())
+        body.seek(0)
+        target = scope.get("raw_path") or scope["path"].encode("utf-8")
+        if isinstance(target, bytes):
+            target = target.decode("latin-1")
+        if scope.get("query_string"):
+            target += "?" + scope["query_string"].decode("latin-1")
+        client = scope.get("client") or ("", 0)
+        with self._waiting_lock:
+            self._waiting += 1
+        try:
+            handler = await loop.run_in_executor(
+                self._pool(), self._handle, scope["method"], target,
+                "HTTP/" + scope.get("http_version", "1.1"), headers, body, tuple(client))
+        finally:
+            body.close()
+
+        await send({
+            "type": "http.response.start",
+            "status": handler.status,
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in handler.response_headers],
+        })
+        head = handler.wfile.getvalue()
+        if handler.stream is not None:
+            await self._events(head, handler.stream, receive, send)
+        elif handler.body_iter is not None:
+            chunks = _encoded(handler.body_iter)
+            try:
+                while True:
+                    chunk = await loop.run_in_executor(self._pool(), next, chunks, None)
+                    if chunk is None:
+                        break
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            finally:
+                await loop.run_in_executor(self._pool(), chunks.close)
+            await send({"type": "http.response.body", "body": b""})
+        else:
+            await send({"type": "http.response.body", "body": head})
+
+    async def _events(self, head, sub, receive, send):
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        sub.notify = lambda _sub: loop.call_soon_threadsafe(ready.set)
+        disconnect = asyncio.ensure_future(receive())
+        self._stream_opened(1)
+        try:
+            await send({"type": "http.response.body", "body": head, "more_body": True})
+            while not sub.overflowed:
+                data = sub.drain()
+                if data:
+                    await send({"type": "http.response.body", "body": data, "more_body": True})
+                ready.clear()
+                if sub.frames:
+                    continue
+                waiter = asyncio.ensure_future(ready.wait())
+                done, _ = await asyncio.wait({waiter, disconnect}, timeout=STREAM_CONFIG["heartbeat"],
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not waiter.done():
+                    waiter.cancel()
+                if disconnect in done:
+                    break
+                if not done:
+                    await send({"type": "http.response.body", "body": PING, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            # EN: client went away mid-write
+            # FA: قطع اتصال کلاینت
+            pass
+        finally:
+            disconnect.cancel()
+            self._stream_opened(-1)
+            sub.notify = None
+            bus.unsubscribe(sub)
@@ -0,0 +1,356 @@
+# app/core/Metrics.py
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+
+# EN: Latency buckets in seconds (upper bounds, Prometheus "le")
+# FA: بازه‌های هیستوگرام زمان پاسخ (ثانیه)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """
+    EN: Fixed-bucket histogram (cumulative on export), thread-safe.
+    FA: هیستوگرام با بازه‌های ثابت.
+    """
+
+    __slots__ = ("buckets", "counts", "total", "count", "_lock")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+class Registry:
+    """
+    EN: Holds histograms and counters keyed by (metric name, label tuple), plus
+        gauge callbacks evaluated at scrape time. render() emits Prometheus
+        text exposition format.
+    FA: نگهداری متریک‌ها و خروجی با فرمت Prometheus.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._gauges = []          # (prefix, callback -> dict)
+        self._lock = threading.Lock()
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def histogram(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        h = self._histograms.get(key)
+        if h is None:
+            with self._lock:
+                h = self._histograms.setdefault(key, Histogram())
+        return h
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_gauges(self, prefix, callback):
+        # EN: callback() returns {metric_suffix: number}; non-numeric values are skipped
+        # FA: تابعی که مقادیر لحظه‌ای را برمی‌گرداند
+        self._gauges.append((prefix, callback))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        seen = set()
+        for (name, labels), h in histograms:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+            counts, total, count = h.snapshot()
+            cumulative = 0
+            for bound, c in zip(h.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for prefix, callback in self._gauges:
+            try:
+                values = callback()
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+registry = Registry()
+registry.describe("bank_request_seconds", "End-to-end request handling time")
+registry.describe("bank_request_phase_seconds", "Time spent per request phase")
+registry.describe("bank_sql_seconds", "Time per SQL statement (execute + fetch)")
+registry.describe("bank_responses_total", "Responses by endpoint and status")
+
+# ---------------------------------------------------------------------------
+# Per-request context
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+
+
+class RequestTimer:
+    __slots__ = ("endpoint", "method", "start", "db_seconds", "db_calls", "status")
+
+    def __init__(self, endpoint, method):
+        self.endpoint = endpoint
+        self.method = method
+        self.start = time.perf_counter()
+        self.db_seconds = 0.0
+        self.db_calls = 0
+        self.status = 0
+
+
+@contextmanager
+def request(endpoint, method):
+    """
+    EN: Time one HTTP request; phases and SQL issued inside are attributed to it.
+    FA: اندازه‌گیری زمان کل یک درخواست.
+    """
+    timer = RequestTimer(endpoint, method)
+    _local.request = timer
+    try:
+        yield timer
+    finally:
+        _local.request = None
+        elapsed = time.perf_counter() - timer.start
+        registry.histogram("bank_request_seconds", endpoint=endpoint, method=method).observe(elapsed)
+        registry.histogram("bank_request_phase_seconds", endpoint=endpoint, phase="db").observe(timer.db_seconds)
+        registry.inc("bank_responses_total", endpoint=endpoint, status=timer.status)
+        registry.inc("bank_sql_statements_total", timer.db_calls, endpoint=endpoint)
+
+
+@contextmanager
+def phase(name):
+    """
+    EN: Time a phase (parse, validate, model, encode, ...) of the current request.
+    FA: اندازه‌گیری زمان یک مرحله از درخواست جاری.
+    """
+    timer = getattr(_local, "request", None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timer is not None:
+            registry.histogram("bank_request_phase_seconds", endpoint=timer.endpoint, phase=name).observe(
+                time.perf_counter() - start)
+
+
+def set_status(status):
+    timer = getattr(_local, "request", None)
+    if timer is not None:
+        timer.status = status
+
+
+# ---------------------------------------------------------------------------
+# SQL instrumentation
+# ---------------------------------------------------------------------------
+
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_label(sql):
+    # EN: low-cardinality label such as "SELECT users" or "INSERT transactions"
+    # FA: برچسب کوتاه برای هر دستور SQL
+    words = sql.split(None, 1)
+    verb = words[0].upper() if words else "?"
+    table = _TABLE.search(sql)
+    return f"{verb} {table.group(1)}" if table else verb
+
+
+def _record_sql(sql, elapsed):
+    registry.histogram("bank_sql_seconds", statement=statement_label(sql)).observe(elapsed)
+    timer = getattr(_local, "request", None)
+    if timer is not None:
+        timer.db_seconds += elapsed
+        timer.db_calls += 1
+
+
+class InstrumentedCursor:
+    """
+    EN: Cursor proxy timing execute()/executemany() and the fetch that follows.
+    FA: پوشش cursor برای اندازه‌گیری زمان هر دستور SQL.
+    """
+
+    __slots__ = ("_cursor", "_sql", "_elapsed")
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._sql = None
+        self._elapsed = 0.0
+
+    def _flush(self):
+        if self._sql is not None:
+            _record_sql(self._sql, self._elapsed)
+            self._sql = None
+
+    def execute(self, sql, params=()):
+        self._flush()
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params)
+        finally:
+            self._sql, self._elapsed = sql, time.perf_counter() - start
+
+    def executemany(self, sql, seq_of_params):
+        self._flush()
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_of_params)
+        finally:
+            self._sql, self._elapsed = sql, time.perf_counter() - start
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return getattr(self._cursor, method)(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def fetchone(self):
+        return self._timed_fetch("fetchone")
+
+    def fetchmany(self, *args):
+        return self._timed_fetch("fetchmany", *args)
+
+    def fetchall(self):
+        return self._timed_fetch("fetchall")
+
+    def close(self):
+        self._flush()
+        return self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def instrument_cursor(cursor):
+    return InstrumentedCursor(cursor)
+
+
+# ---------------------------------------------------------------------------
+# Sampling profiler
+# ---------------------------------------------------------------------------
+
+class SamplingProfiler:
+    """
+    EN: Low-overhead wall-clock sampler: a background thread grabs every
+        thread's stack with sys._current_frames() every `interval` seconds and
+        counts collapsed stacks ("a;b;c N", flamegraph.pl compatible).
+        Started and stopped at runtime; nothing runs while it is off.
+    FA: پروفایلر نمونه‌برداری که در زمان اجرا روشن/خاموش می‌شود.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stacks = Counter()
+        self.interval = 0.005
+        self.samples = 0
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval=0.005):
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self.interval = interval
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return None
+        self._stop.set()
+        thread.join()
+        return self.report()
+
+    def report(self, limit=None):
+        items = self._stacks.most_common(limit)
+        return "\n".join(f"{stack} {count}" for stack, count in items) + "\n"
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,323 @@
+# app/core/Prefork.py
+"""
+EN: Pre-forking WSGI server (stdlib only), for when no external application
+    server (gunicorn, uWSGI) is installed.
+    The master binds the listening socket, runs `preload` (imports, templates,
+    static files, schema check), freezes the garbage collector and forks
+    `processes` workers. Every worker then accepts on the shared socket and
+    serves HTTP/1.1 keep-alive connections from its own thread pool, with
+    its own DB pool and caches (shared nothing). Because the preloaded
+    objects are frozen, the collector never writes to them, so their memory
+    pages stay shared copy-on-write between the workers. The master restarts
+    a worker that dies and stops all of them on SIGTERM / SIGINT.
+    POSIX only (os.fork).
+FA: سرور WSGI با پروسه‌های از پیش fork شده؛ بارگذاری اولیه در والد و اشتراک حافظه به صورت copy-on-write.
+"""
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import unquote_to_bytes
+
+from app.core.Servers import ThreadPoolHTTPServer
+
+# EN: processes = worker processes; threads = request threads per worker
+# FA: تعداد پروسه‌ها و threadهای هر پروسه
+PREFORK_CONFIG = dict(
+    processes=os.cpu_count() or 1,
+    threads=16,
+    backlog=128,
+    keepalive=5.0,
+    graceful_timeout=10.0,
+    respawn_delay=0.5,
+)
+
+
+class _BodyReader:
+    """
+    EN: wsgi.input limited to Content-Length, so an application can never read
+        into the next keep-alive request.
+    FA: ورودی WSGI محدود به طول بدنه درخواست.
+    """
+
+    def __init__(self, rfile, length):
+        self._rfile = rfile
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._rfile.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._rfile.readline(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def readlines(self, hint=-1):
+        return list(self)
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def drain(self, limit=1 << 20):
+        # EN: skip what the application left unread; False if too much to skip
+        # FA: رد کردن باقیمانده بدنه
+        if self.remaining > limit:
+            return False
+        while self.remaining:
+            if not self.read(min(self.remaining, 65536)):
+                return False
+        return True
+
+
+class WSGIRequestHandler(BaseHTTPRequestHandler):
+    """
+    EN: Serves one keep-alive connection by calling server.app (WSGI). Bodies
+        without a Content-Length are sent chunked and flushed chunk by chunk,
+        so streamed exports and event streams work.
+    FA: اجرای برنامه WSGI برای هر درخواست روی اتصال keep-alive.
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = PREFORK_CONFIG["keepalive"]
+    disable_nagle_algorithm = True
+
+    def _environ(self, body):
+        path, _, query = self.path.partition("?")
+        host, port = self.server.server_address[:2]
+        environ = {
+            "REQUEST_METHOD": self.command,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": _unquote_latin1(path),
+            "QUERY_STRING": query,
+            "SERVER_NAME": str(host),
+            "SERVER_PORT": str(port),
+            "SERVER_PROTOCOL": self.request_version,
+            "REMOTE_ADDR": self.client_address[0],
+            "REMOTE_PORT": str(self.client_address[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": body,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for name, value in self.headers.items():
+            key = name.upper().replace("-", "_")
+            if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[key] = value
+            elif "_" not in name:
+                # EN: header names with "_" would be ambiguous after the rename (header smuggling)
+                # FA: نام هدر با "_" پذیرفته نمی‌شود
+                key = "HTTP_" + key
+                environ[key] = environ[key] + "," + value if key in environ else value
+        return environ
+
+    def _run_app(self):
+        try:
+            length = max(0, int(self.headers.get("Content-Length") or 0))
+        except ValueError:
+            self.send_error(400, "Bad Content-Length")
+            return
+        body = _BodyReader(self.rfile, length)
+        state = {"status": None, "headers": None, "chunked": False, "sent": False}
+        head = self.command == "HEAD"
+
+        def send_head():
+            status, headers = state["status"], state["headers"]
+            code, _, reason = status.partition(" ")
+            self.send_response(int(code), reason or None)
+            names = {name.lower() for name, _ in headers}
+            for name, value in headers:
+                self.send_header(name, value)
+            if "content-length" not in names and not head:
+                if self.request_version >= "HTTP/1.1":
+                    state["chunked"] = True
+                    self.send_header("Transfer-Encoding", "chunked")
+                else:
+                    self.close_connection = True
+            self.end_headers()
+            state["sent"] = True
+
+        def write(data):
+            if not state["sent"]:
+                send_head()
+            if head or not data:
+                return
+            if state["chunked"]:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            else:
+                self.wfile.write(data)
+            self.wfile.flush()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and state["sent"]:
+                raise exc_info[1].with_traceback(exc_info[2])
+            state["status"], state["headers"] = status, list(headers)
+            return write
+
+        result = self.server.app(self._environ(body), start_response)
+        try:
+            for data in result:
+                write(data)
+            if not state["sent"]:
+                if not any(name.lower() == "content-length" for name, _ in state["headers"]):
+                    state["headers"].append(("Content-Length", "0"))
+                send_head()
+            if state["chunked"]:
+                self.wfile.write(b"0\r\n\r\n")
+        except ConnectionError:
+            # EN: client went away (e.g. closed an event stream)
+            # FA: قطع اتصال کلاینت
+            self.close_connection = True
+        finally:
+            close = getattr(result, "close", None)
+            if close:
+                close()
+        if not body.drain():
+            self.close_connection = True
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _run_app
+
+
+def _unquote_latin1(path):
+    # EN: PEP 3333: PATH_INFO is the percent-decoded path as latin-1 characters
+    # FA: رمزگشایی مسیر طبق PEP 3333
+    return unquote_to_bytes(path).decode("latin-1")
+
+
+class PreforkServer:
+    """
+    EN: Master process: owns the listening socket and the worker processes.
+        serve_forever() preloads, forks and supervises; server_close() closes
+        the socket. The application object is created before the fork and
+        inherited by every worker.
+    FA: پروسه اصلی: نگهداری سوکت و مدیریت پروسه‌های فرزند.
+    """
+
+    def __init__(self, server_address, app, processes=None, threads=None, backlog=None,
+                 keepalive=None, preload=None):
+        self.app = app
+        self.processes = processes or PREFORK_CONFIG["processes"]
+        self.threads = threads or PREFORK_CONFIG["threads"]
+        self.backlog = backlog or PREFORK_CONFIG["backlog"]
+        self.keepalive = keepalive or PREFORK_CONFIG["keepalive"]
+        self.preload = preload
+        self.socket = socket.create_server(server_address, backlog=self.backlog)
+        self.server_address = self.socket.getsockname()
+        self._handler_cls = type("PreforkWSGIRequestHandler", (WSGIRequestHandler,), {"timeout": self.keepalive})
+        self._children = set()
+        self._running = False
+
+    def serve_forever(self):
+        if self.preload is not None:
+            self.preload()
+        # EN: move everything loaded so far out of the collector's reach: in the
+        #     workers it is never written to, so its pages stay shared
+        # FA: جلوگیری از نوشتن GC روی اشیای بارگذاری‌شده تا حافظه مشترک بماند
+        gc.collect()
+        gc.freeze()
+        self._running = True
+        previous = {sig: signal.signal(sig, self._on_signal) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            for _ in range(self.processes):
+                self._spawn()
+            while self._children:
+                try:
+                    pid, _ = os.wait()
+                except ChildProcessError:
+                    break
+                self._children.discard(pid)
+                if self._running:
+                    # EN: a worker died unexpectedly; replace it after a short pause
+                    # FA: جایگزینی پروسه فرزند از کار افتاده
+                    time.sleep(PREFORK_CONFIG["respawn_delay"])
+                    if self._running:
+                        self._spawn()
+        finally:
+            self._running = False
+            self._stop_children()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def _on_signal(self, signum, frame):
+        self.shutdown()
+
+    def shutdown(self):
+        self._running = False
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self._children.discard(pid)
+
+    def _stop_children(self):
+        self.shutdown()
+        deadline = time.monotonic() + PREFORK_CONFIG["graceful_timeout"]
+        while self._children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self._children.discard(pid)
+            else:
+                time.sleep(0.05)
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._children.clear()
+
+    def server_close(self):
+        self.socket.close()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self._children.add(pid)
+            return
+        code = 0
+        try:
+            self._worker()
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _worker(self):
+        # EN: the master handles Ctrl-C and forwards SIGTERM
+        # FA: مدیریت سیگنال‌ها با پروسه والد است
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        httpd = ThreadPoolHTTPServer(self.server_address, self._handler_cls, max_workers=self.threads,
+                                     backlog=self.backlog, listen_socket=self.socket)
+        httpd.app = self.app
+        if hasattr(self.app, "queue_depth"):
+            # EN: the shared listen backlog, for admission control
+            # FA: طول صف listen مشترک برای کنترل پذیرش
+            self.app.queue_depth = httpd.queued
+        # EN: shutdown() waits for serve_forever, so it must not run on this (the serving) thread
+        # FA: توقف سرور از thread دیگر
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=httpd.shutdown, daemon=True).start())
+        try:
+            httpd.serve_forever()
+        finally:
+            stop = getattr(self.app, "stop_worker", None)
+            if stop is not None:
+                stop()
+            httpd.server_close()
@@ -0,0 +1,106 @@
+# app/core/Router.py
+import json
+from urllib.parse import parse_qs
+
+
+class Request:
+    """
+    EN: One parsed HTTP request. The body is read once and decoded lazily as
+        JSON or form-encoded depending on Content-Type; get() returns a single
+        field either way (parse_qs lists are unwrapped).
+    FA: درخواست پردازش‌شده؛ بدنه یک بار خوانده و به صورت JSON یا فرم تجزیه می‌شود.
+    """
+
+    __slots__ = ("method", "path", "query", "headers", "body", "_data")
+
+    def __init__(self, method, path, headers, body=b""):
+        self.method = method
+        self.path, _, self.query = path.partition("?")
+        self.headers = headers
+        self.body = body
+        self._data = None
+
+    @classmethod
+    def read(cls, handler):
+        length = int(handler.headers.get("Content-Length", 0) or 0)
+        body = handler.rfile.read(length) if length > 0 else b""
+        return cls(handler.command, handler.path, handler.headers, body)
+
+    @property
+    def is_json(self):
+        return self.headers.get("Content-Type", "").startswith("application/json")
+
+    @property
+    def data(self):
+        if self._data is None:
+            text = self.body.decode("utf-8") if self.body else ""
+            if self.is_json:
+                try:
+                    self._data = json.loads(text) if text else {}
+                except ValueError:
+                    self._data = {}
+            else:
+                self._data = parse_qs(text)
+        return self._data
+
+    def get(self, name, default=None):
+        data = self.data
+        if not isinstance(data, dict):
+            return default
+        value = data.get(name, default)
+        if isinstance(value, list):
+            return value[0] if value else default
+        return value
+
+    def accepts(self, content_type):
+        return self.headers.get("Accept", "").startswith(content_type)
+
+    @staticmethod
+    def body_lines(handler, max_line=1 << 20):
+        # EN: stream the body line by line (routes registered with raw_body=True)
+        # FA: خواندن تدریجی بدنه درخواست، خط به خط
+        remaining = int(handler.headers.get("Content-Length", 0) or 0)
+        while remaining > 0:
+            line = handler.rfile.readline(min(remaining, max_line))
+            if not line:
+                return
+            remaining -= len(line)
+            yield line.decode("utf-8")
+
+
+class Router:
+    """
+    EN: Exact-match dispatch table keyed by (method, path). Handlers are
+        registered with the get()/post() decorators and called as
+        handler(request_handler, request).
+    FA: جدول مسیریابی؛ هر مسیر مستقیماً به تابع پردازش‌گر خود نگاشت می‌شود.
+    """
+
+    def __init__(self):
+        self._routes = {}
+
+    def add(self, method, path, func):
+        key = (method.upper(), path)
+        if key in self._routes:
+            raise ValueError(f"route already registered: {method} {path}")
+        self._routes[key] = func
+        return func
+
+    def route(self, method, path, raw_body=False):
+        # raw_body: the body is left unread for the handler to stream (Request.body_lines)
+        def decorator(func):
+            func.raw_body = raw_body
+            return self.add(method, path, func)
+        return decorator
+
+    def get(self, path):
+        return self.route("GET", path)
+
+    def post(self, path, raw_body=False):
+        return self.route("POST", path, raw_body)
+
+    def resolve(self, method, path):
+        return self._routes.get((method, path.partition("?")[0]))
+
+    def paths(self):
+        return sorted({path for _, path in self._routes})
@@ -0,0 +1,424 @@
+# app/core/Servers.py
+import asyncio
+import io
+import json
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+from app.core.EventBus import bus
+from app.core.Streams import hub, STREAM_CONFIG, PING
+
+# EN: request body limits of the async server; a larger Content-Length gets 413
+#     before any of the body is read
+# FA: سقف اندازه بدنه درخواست در سرور async
+SERVER_CONFIG = dict(
+    max_body=1 << 20,             # ordinary requests, buffered in memory
+    max_stream_body=256 << 20,    # raw_body routes (e.g. /accounts/import), read as a stream
+    stream_chunk=64 * 1024,       # bytes pulled from the connection per read of a streamed body
+)
+
+_TOO_LARGE_BODY = json.dumps({"success": False, "message": "Request body too large."}).encode("utf-8")
+TOO_LARGE = (b"HTTP/1.1 413 Payload Too Large\r\nContent-Type: application/json\r\n"
+             b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(_TOO_LARGE_BODY), _TOO_LARGE_BODY))
+
+
+def accept_queue_length(sock):
+    """
+    EN: Connections waiting in the kernel accept queue of a listening socket
+        (Linux: tcpi_unacked of TCP_INFO); 0 where that is not available.
+    FA: تعداد اتصال‌های منتظر در صف listen.
+    """
+    try:
+        info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 104)
+    except (AttributeError, OSError):
+        return 0
+    return struct.unpack_from("I", info, 24)[0] if len(info) >= 28 else 0
+
+
+class StreamingMixin:
+    """
+    EN: Lets a handler turn its connection into a long-lived event stream:
+        attach_stream() hands the socket to the SSE hub and marks it so the
+        server does not close it when the handler returns.
+    FA: تحویل اتصال به hub برای جریان SSE بدون اشغال thread.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._detached = set()
+        super().__init__(*args, **kwargs)
+
+    def attach_stream(self, handler, sub):
+        handler.close_connection = True
+        handler.wfile.flush()
+        self._detached.add(handler.request)
+        hub.attach(handler.request, sub)
+
+    def stream_count(self):
+        return hub.count()
+
+    def shutdown_request(self, request):
+        # EN: a detached socket now belongs to the hub
+        # FA: سوکت تحویل‌شده به hub بسته نمی‌شود
+        if request in self._detached:
+            self._detached.discard(request)
+            return
+        super().shutdown_request(request)
+
+
+class SingleHTTPServer(StreamingMixin, HTTPServer):
+    """
+    EN: The original one-request-at-a-time server, plus event streams.
+    FA: سرور تک‌درخواستی اولیه با پشتیبانی SSE.
+    """
+
+    # EN: a keep-alive connection holds the server until it closes
+    # FA: هر اتصال تا بسته شدن سرور را در اختیار دارد
+    thread_per_connection = True
+
+    def queued(self):
+        return accept_queue_length(self.socket)
+
+
+class ThreadPoolHTTPServer(StreamingMixin, HTTPServer):
+    """
+    EN: HTTPServer that hands each accepted connection to a bounded worker pool.
+        When every worker is busy the accept loop blocks, so extra clients wait
+        in the kernel listen backlog instead of piling up in memory.
+    FA: سرور HTTP با استخر thread محدود؛ در صورت پر بودن، اتصال‌ها در صف backlog می‌مانند.
+    """
+
+    daemon_threads = True
+    # EN: a keep-alive connection holds its worker until it closes
+    # FA: هر اتصال keep-alive یک worker را تا بسته شدن اشغال می‌کند
+    thread_per_connection = True
+
+    def __init__(self, server_address, handler_cls, max_workers=16, backlog=128, listen_socket=None):
+        # EN: request_queue_size is what socketserver passes to listen()
+        # FA: اندازه صف listen
+        self.request_queue_size = backlog
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="bank-worker")
+        super().__init__(server_address, handler_cls, bind_and_activate=listen_socket is None)
+        if listen_socket is not None:
+            # EN: pre-forked worker: accept on the socket the master already listens on
+            # FA: پروسه فرزند روی سوکت باز شده توسط والد پذیرش می‌کند
+            self.socket.close()
+            self.socket = listen_socket
+            self.server_address = listen_socket.getsockname()
+
+    def queued(self):
+        # EN: clients waiting for a worker wait in the listen backlog
+        # FA: کلاینت‌های منتظر در صف listen هستند
+        return accept_queue_length(self.socket)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except Exception:
+            self._slots.release()
+            self.shutdown_request(request)
+            raise
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False)
+
+
+class _LoopWriter:
+    """
+    EN: File-like object used as the handler's wfile in async mode. Writes are
+        forwarded to the event loop's transport and wait for drain(), so large
+        or streamed bodies get real backpressure.
+    FA: wfile برای حالت async؛ داده‌ها را به event loop منتقل می‌کند.
+    """
+
+    def __init__(self, loop, writer):
+        self._loop = loop
+        self._writer = writer
+
+    async def _write(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def write(self, data):
+        if not data:
+            return 0
+        asyncio.run_coroutine_threadsafe(self._write(bytes(data)), self._loop).result()
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class _LoopReader:
+    """
+    EN: File-like rfile for raw_body routes in async mode: the request head
+        from memory, then at most Content-Length body bytes pulled from the
+        connection in stream_chunk pieces as the handler reads, so an upload
+        is never buffered whole. A read that stalls past `timeout` raises.
+    FA: rfile برای مسیرهای raw_body؛ بدنه به صورت تدریجی و محدود خوانده می‌شود.
+    """
+
+    def __init__(self, loop, reader, head, length, timeout):
+        self._loop = loop
+        self._reader = reader
+        self._timeout = timeout
+        self._buf = bytearray(head)
+        self.remaining = length            # body bytes not yet pulled from the connection
+
+    def _more(self):
+        if self.remaining <= 0:
+            return False
+        size = min(SERVER_CONFIG["stream_chunk"], self.remaining)
+        chunk = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(self._reader.read(size), self._timeout), self._loop
+        ).result()
+        if not chunk:
+            raise ConnectionError("request body ended before Content-Length")
+        self.remaining -= len(chunk)
+        self._buf += chunk
+        return True
+
+    def _take(self, size):
+        data = bytes(self._buf[:size])
+        del self._buf[:size]
+        return data
+
+    def read(self, size=-1):
+        while (size is None or size < 0 or len(self._buf) < size) and self._more():
+            pass
+        return self._take(len(self._buf) if size is None or size < 0 else size)
+
+    def readline(self, size=-1):
+        while b"\n" not in self._buf and (size < 0 or len(self._buf) < size) and self._more():
+            pass
+        end = self._buf.find(b"\n") + 1 or len(self._buf)
+        return self._take(end if size < 0 else min(end, size))
+
+
+class _InMemoryRequestMixin:
+    """
+    EN: Runs exactly one request of a BaseHTTPRequestHandler subclass over an
+        already-read request (head + body, or a _LoopReader) instead of a socket.
+    FA: اجرای یک درخواست روی داده‌ی از قبل خوانده‌شده به جای سوکت.
+    """
+
+    def setup(self):
+        rfile, out = self.request
+        self.connection = None
+        self.rfile = rfile
+        self.wfile = out
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+
+    def finish(self):
+        pass
+
+
+def _request_target(head):
+    method, _, rest = head.partition(b"\r\n")[0].partition(b" ")
+    return method.decode("latin-1"), rest.partition(b" ")[0].decode("latin-1")
+
+
+def _content_length(head):
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            try:
+                return max(0, int(value.strip()))
+            except ValueError:
+                return 0
+    return 0
+
+
+class AsyncHTTPServer:
+    """
+    EN: asyncio front end. Connections, keep-alive and slow clients are handled
+        on the event loop; each parsed request runs the (blocking) handler and
+        its AccountModel calls on a bounded thread executor. Bodies above
+        max_body get 413 unread; routes the handler class reports through
+        streams_body(method, path) get a _LoopReader bounded by max_stream_body
+        instead of buffered bytes.
+    FA: سرور مبتنی بر asyncio؛ اتصال‌ها روی event loop و منطق بلاک‌کننده روی executor.
+    """
+
+    def __init__(self, server_address, handler_cls, max_workers=16, backlog=128,
+                 keepalive_timeout=5.0, max_body=None, max_stream_body=None):
+        self.server_address = server_address
+        self.max_workers = max_workers
+        self.backlog = backlog
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body = max_body or SERVER_CONFIG["max_body"]
+        self.max_stream_body = max_stream_body or SERVER_CONFIG["max_stream_body"]
+        self._streams_body = getattr(handler_cls, "streams_body", None)
+        self._handler_cls = type(
+            "Async" + handler_cls.__name__, (_InMemoryRequestMixin, handler_cls), {}
+        )
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="bank-async")
+        self._server = None
+        self._loop = None
+        self._streams = 0
+        self._waiting = 0                  # parsed requests not yet picked up by the executor
+        self._waiting_lock = threading.Lock()
+
+    def attach_stream(self, handler, sub):
+        # EN: picked up by _handle_connection once the handler returns
+        # FA: پس از پایان هندلر، اتصال به جریان SSE تبدیل می‌شود
+        handler.close_connection = True
+        handler.stream = sub
+
+    def stream_count(self):
+        return self._streams
+
+    def queued(self):
+        return self._waiting
+
+    async def _stream(self, sub, reader, writer):
+        # EN: pump frames as the bus notifies; heartbeat on idle; stop on EOF or overflow
+        # FA: ارسال رویدادها تا قطع اتصال یا پر شدن صف
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        sub.notify = lambda _sub: loop.call_soon_threadsafe(ready.set)
+        eof = asyncio.ensure_future(reader.read(4096))
+        self._streams += 1
+        try:
+            while not sub.overflowed:
+                data = sub.drain()
+                if data:
+                    writer.write(data)
+                    await writer.drain()
+                ready.clear()
+                if sub.frames:
+                    continue
+                waiter = asyncio.ensure_future(ready.wait())
+                done, _ = await asyncio.wait({waiter, eof}, timeout=STREAM_CONFIG["heartbeat"],
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not waiter.done():
+                    waiter.cancel()
+                if eof in done:
+                    if not eof.result():
+                        break
+                    eof = asyncio.ensure_future(reader.read(4096))
+                if not done:
+                    writer.write(PING)
+                    await writer.drain()
+        finally:
+            self._streams -= 1
+            eof.cancel()
+            sub.notify = None
+            bus.unsubscribe(sub)
+
+    async def _linger(self, reader, length):
+        # EN: discard (never buffer) the refused body for up to keepalive_timeout,
+        #     so a client still uploading reads the 413 instead of a reset
+        # FA: دور ریختن بدنه ردشده برای مدتی کوتاه تا کلاینت پاسخ 413 را ببیند
+        deadline = asyncio.get_running_loop().time() + self.keepalive_timeout
+        try:
+            while length > 0:
+                left = deadline - asyncio.get_running_loop().time()
+                if left <= 0:
+                    return
+                chunk = await asyncio.wait_for(reader.read(min(length, SERVER_CONFIG["stream_chunk"])), left)
+                if not chunk:
+                    return
+                length -= len(chunk)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+    def _run_handler(self, rfile, client_address, out):
+        with self._waiting_lock:
+            self._waiting -= 1
+        return self._handler_cls((rfile, out), client_address, self)
+
+    async def _handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        peer = writer.get_extra_info("peername") or ("", 0)
+        client_address = tuple(peer[:2])
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout
+                    )
+                    length = _content_length(head)
+                    streamed = bool(length) and self._streams_body is not None \
+                        and self._streams_body(*_request_target(head))
+                    if length > (self.max_stream_body if streamed else self.max_body):
+                        # EN: refused unread, so the connection cannot be reused
+                        # FA: بدنه خوانده نمی‌شود و اتصال بسته می‌شود
+                        writer.write(TOO_LARGE)
+                        await writer.drain()
+                        await self._linger(reader, length)
+                        break
+                    if streamed:
+                        rfile = _LoopReader(loop, reader, head, length, self.keepalive_timeout)
+                    else:
+                        body = await reader.readexactly(length) if length else b""
+                        rfile = io.BytesIO(head + body)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                        asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                out = _LoopWriter(loop, writer)
+                with self._waiting_lock:
+                    self._waiting += 1
+                try:
+                    handler = await loop.run_in_executor(
+                        self._executor, self._run_handler, rfile, client_address, out
+                    )
+                except Exception:
+                    # EN: handler crashed mid-response; the connection state is unknown
+                    # FA: خطا در هندلر؛ اتصال بسته می‌شود
+                    break
+                stream = getattr(handler, "stream", None)
+                if stream is not None:
+                    await self._stream(stream, reader, writer)
+                    break
+                if handler.close_connection or getattr(rfile, "remaining", 0):
+                    # EN: a streamed body the handler left unread cannot be skipped
+                    # FA: بدنه‌ی خوانده‌نشده؛ اتصال قابل استفاده مجدد نیست
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # EN: peer went away or the loop is shutting down
+            # FA: قطع اتصال کلاینت یا خاموش شدن سرور
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        host, port = self.server_address
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(
+            self._handle_connection, host, port, backlog=self.backlog
+        )
+        async with self._server:
+            await self._server.serve_forever()
+
+    def serve_forever(self):
+        try:
+            asyncio.run(self.serve())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+
+    def shutdown(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    def server_close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,199 @@
+# app/core/Sessions.py
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# EN: session lifetime (seconds) and store bound
+# FA: مدت اعتبار نشست و حداکثر تعداد نشست‌ها در حافظه
+SESSION_CONFIG = dict(
+    ttl=1800,
+    max_sessions=100000,
+    # EN: accept any validly signed token, not only ones issued by this process (pre-forked workers)
+    # FA: پذیرش توکن معتبر صادرشده توسط پروسه‌های دیگر
+    stateless=False
+)
+
+
+def _secret():
+    # EN: BANK_SESSION_SECRET keeps tokens valid across restarts; otherwise one per process
+    # FA: کلید امضا؛ در صورت نبود متغیر محیطی به صورت تصادفی ساخته می‌شود
+    value = os.environ.get("BANK_SESSION_SECRET")
+    return value.encode("utf-8") if value else secrets.token_bytes(32)
+
+
+class Session:
+    __slots__ = ("session_id", "card_number", "user", "expires_at")
+
+    def __init__(self, session_id, card_number, user, expires_at):
+        self.session_id = session_id
+        self.card_number = card_number
+        self.user = user
+        self.expires_at = expires_at
+
+
+class SessionStore:
+    """
+    EN: Issues and verifies signed session tokens.
+        A token is "<session id>.<card>.<expiry>.<HMAC-SHA256 signature>", so
+        verifying it is one HMAC and a constant-time compare; the caller's
+        card comes out of the token itself with no DB lookup. The store keeps
+        the live sessions in memory (bounded, oldest evicted first) so logout
+        and eviction can revoke a token before it expires.
+        With stateless=True (several worker processes, one shared secret) a
+        validly signed token issued by another process is accepted too, and a
+        logout is passed on through on_revoke so the other processes forget()
+        the session as well.
+    FA: صدور و بررسی توکن‌های امضاشده؛ شماره کارت از خود توکن خوانده می‌شود و نیازی به دیتابیس نیست.
+    """
+
+    def __init__(self, secret=None, ttl=None, max_sessions=None, stateless=None):
+        self._secret = secret or _secret()
+        self.ttl = ttl or SESSION_CONFIG["ttl"]
+        self.max_sessions = max_sessions or SESSION_CONFIG["max_sessions"]
+        self.stateless = SESSION_CONFIG["stateless"] if stateless is None else stateless
+        self._sessions = OrderedDict()       # session id -> Session, in issue (= expiry) order
+        self._revoked = OrderedDict()        # stateless: revoked session id -> expires_at
+        self.on_revoke = None                # stateless: callback(session_id, expires_at) on logout
+        self._lock = threading.Lock()
+        self._stats = {"issued": 0, "verified": 0, "rejected": 0, "expired": 0,
+                       "evictions": 0, "revoked": 0}
+
+    def _sign(self, payload):
+        digest = hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+    def issue(self, card_number, user=None):
+        """
+        EN: Start a session for an authenticated card; returns (token, expires_at epoch seconds).
+        FA: ایجاد نشست برای کارت احراز هویت‌شده.
+        """
+        session_id = secrets.token_hex(12)
+        expires_at = int(time.time() + self.ttl)
+        payload = f"{session_id}.{card_number}.{expires_at}"
+        token = f"{payload}.{self._sign(payload)}"
+        with self._lock:
+            self._sweep(time.time())
+            self._sessions[session_id] = Session(session_id, card_number, dict(user or {}), expires_at)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._stats["issued"] += 1
+        return token, expires_at
+
+    def _sweep(self, now):
+        # EN: every session has the same ttl, so the expired ones are at the front
+        # FA: نشست‌های منقضی همیشه در ابتدای صف هستند
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.expires_at > now:
+                break
+            self._sessions.popitem(last=False)
+            self._stats["expired"] += 1
+
+    def _parse(self, token):
+        if not token or token.count(".") != 3:
+            return None
+        payload, _, signature = token.rpartition(".")
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        session_id, card_number, expires_at = payload.split(".")
+        if not expires_at.isdigit() or int(expires_at) <= time.time():
+            return None
+        return session_id, card_number, int(expires_at)
+
+    def resolve(self, token):
+        """
+        EN: Session for a valid, unexpired, unrevoked token; None otherwise.
+        FA: برگرداندن نشست برای توکن معتبر، در غیر این صورت None.
+        """
+        parsed = self._parse(token)
+        with self._lock:
+            session = self._sessions.get(parsed[0]) if parsed else None
+            if session is None and parsed and self.stateless and parsed[0] not in self._revoked:
+                # EN: issued by another worker: everything needed is in the signed token
+                # FA: توکن صادرشده در پروسه دیگر
+                session = Session(parsed[0], parsed[1], {"card_number": parsed[1]}, parsed[2])
+            if session is None or session.card_number != parsed[1]:
+                self._stats["rejected"] += 1
+                return None
+            self._stats["verified"] += 1
+            return session
+
+    def signed_card(self, token):
+        # EN: card of a validly signed, unexpired token (no store lookup; e.g. a rate-limit key)
+        # FA: شماره کارت توکن معتبر بدون جستجو در مخزن
+        parsed = self._parse(token)
+        return parsed[1] if parsed else None
+
+    def revoke(self, token):
+        parsed = self._parse(token)
+        if parsed is None:
+            return False
+        removed = self.forget(parsed[0], parsed[2])
+        if self.stateless and self.on_revoke is not None:
+            # EN: tell the other worker processes (see SessionRevocations)
+            # FA: اطلاع‌رسانی لغو نشست به پروسه‌های دیگر
+            self.on_revoke(parsed[0], parsed[2])
+        return removed
+
+    def forget(self, session_id, expires_at):
+        """
+        EN: Revoke a session by id, e.g. one logged out in another worker process.
+        FA: لغو نشست با شناسه آن.
+        """
+        with self._lock:
+            removed = self._sessions.pop(session_id, None) is not None
+            if self.stateless:
+                # EN: remember the id so this process keeps rejecting the token
+                # FA: نگه داشتن شناسه لغوشده تا زمان انقضا
+                now = time.time()
+                while self._revoked and next(iter(self._revoked.values())) <= now:
+                    self._revoked.popitem(last=False)
+                if expires_at > now and session_id not in self._revoked:
+                    self._revoked[session_id] = expires_at
+                    while len(self._revoked) > self.max_sessions:
+                        self._revoked.popitem(last=False)
+                    removed = True
+            if removed:
+                self._stats["revoked"] += 1
+        return removed
+
+    def revoke_card(self, card_number):
+        # EN: e.g. after a PIN change: end every session of this card
+        # FA: پایان همه نشست‌های یک کارت
+        with self._lock:
+            ids = [sid for sid, s in self._sessions.items() if s.card_number == card_number]
+            for sid in ids:
+                del self._sessions[sid]
+            self._stats["revoked"] += len(ids)
+        return len(ids)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            self._sweep(time.time())
+            out = dict(self._stats)
+            out.update(active=len(self._sessions), max_sessions=self.max_sessions, ttl=self.ttl)
+        return out
+
+
+def bearer_token(headers):
+    # EN: "Authorization: Bearer <token>" -> token (or None)
+    # FA: استخراج توکن از هدر Authorization
+    value = headers.get("Authorization") or ""
+    scheme, _, token = value.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return token.strip() or None
+
+
+# EN: process-wide session store used by the HTTP server
+# FA: مخزن نشست مشترک در سطح پروسه
+sessions = SessionStore()
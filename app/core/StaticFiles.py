@@ -0,0 +1,229 @@
+# app/core/StaticFiles.py
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import unquote
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are built without it
+    brotli = None
+
+# EN: text-like types worth compressing (images are already compressed)
+# FA: انواع فایل متنی که فشرده‌سازی برایشان مفید است
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+# EN: never served from public/ (server-side code, editor/OS files)
+# FA: فایل‌هایی که هرگز به عنوان فایل استاتیک ارسال نمی‌شوند
+HIDDEN_SUFFIXES = (".py", ".pyc")
+
+
+class StaticAsset:
+    """
+    EN: One file from public/ held in memory with its validators and
+        precompressed variants.
+    FA: یک فایل استاتیک در حافظه به همراه ETag و نسخه‌های فشرده.
+    """
+
+    __slots__ = ("path", "content_type", "mtime", "size", "etag", "last_modified",
+                 "cache_control", "variants")
+
+    def __init__(self, path, data, mtime, content_type, cache_control, min_compress):
+        self.path = path
+        self.content_type = content_type
+        self.mtime = mtime
+        self.size = len(data)
+        self.etag = '"%s"' % hashlib.blake2b(data, digest_size=12).hexdigest()
+        self.last_modified = formatdate(int(mtime), usegmt=True)
+        self.cache_control = cache_control
+        self.variants = {"identity": data}
+
+        if len(data) >= min_compress and content_type.startswith(COMPRESSIBLE):
+            packed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(packed) < len(data):
+                self.variants["gzip"] = packed
+            if brotli is not None:
+                packed = brotli.compress(data, quality=11)
+                if len(packed) < len(data):
+                    self.variants["br"] = packed
+
+    def negotiate(self, accept_encoding):
+        # EN: smallest variant the client accepts ("q=0" counts as refused)
+        # FA: انتخاب بهترین فشرده‌سازی مورد قبول کلاینت
+        accepted = set()
+        for item in (accept_encoding or "").split(","):
+            name, _, params = item.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(name.strip().lower())
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding, self.variants[encoding]
+        return "identity", self.variants["identity"]
+
+    def not_modified(self, headers):
+        """
+        EN: True if the request's If-None-Match / If-Modified-Since still match.
+        FA: آیا نسخه کش‌شده‌ی کلاینت هنوز معتبر است (پاسخ 304).
+        """
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            return self._tag_in(t.strip() for t in if_none_match.split(","))
+        if_modified_since = headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(self.mtime) <= since
+        return False
+
+    def _tag_in(self, tags):
+        # weak comparison: W/"x" matches "x"
+        for tag in tags:
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == self.etag:
+                return True
+        return False
+
+
+class StaticCache:
+    """
+    EN: Preloads every file under `root` into memory at startup and serves it
+        by URL path. Lookups never touch the filesystem, and URL paths are
+        resolved against the preloaded set only, so "..", encoded slashes or
+        symlinks cannot reach files outside `root`.
+        In dev mode a watcher thread rescans `root` every `interval` seconds
+        and reloads changed, new or deleted files.
+    FA: کش فایل‌های استاتیک در حافظه؛ در حالت توسعه تغییرات فایل‌ها را دنبال می‌کند.
+    """
+
+    def __init__(self, root, index="index.html", min_compress=512,
+                 max_age=3600, html_cache_control="no-cache"):
+        self.root = os.path.realpath(root)
+        self.index = index
+        self.min_compress = min_compress
+        self.max_age = max_age
+        self.html_cache_control = html_cache_control
+        self._assets = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self.reload()
+
+    def _cache_control(self, content_type):
+        # EN: pages revalidate every time (cheap 304); assets are cached for max_age
+        # FA: صفحات HTML همیشه اعتبارسنجی می‌شوند؛ بقیه برای max_age کش می‌شوند
+        if content_type.startswith("text/html"):
+            return self.html_cache_control
+        return f"public, max-age={self.max_age}"
+
+    def _scan(self):
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "__pycache__"]
+            for filename in filenames:
+                if filename.startswith(".") or filename.endswith(HIDDEN_SUFFIXES):
+                    continue
+                full = os.path.join(dirpath, filename)
+                real = os.path.realpath(full)
+                if os.path.commonpath([self.root, real]) != self.root:
+                    continue
+                try:
+                    mtime = os.stat(real).st_mtime
+                except OSError:
+                    continue
+                url = "/" + os.path.relpath(full, self.root).replace(os.sep, "/")
+                found[url] = (real, mtime)
+        return found
+
+    def _load(self, url, real, mtime):
+        with open(real, "rb") as f:
+            data = f.read()
+        content_type = mimetypes.guess_type(url)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        return StaticAsset(url, data, mtime, content_type, self._cache_control(content_type),
+                           self.min_compress)
+
+    def reload(self):
+        """
+        EN: Rescan root; only new or modified files are re-read.
+            Returns the list of URL paths that changed.
+        FA: اسکن دوباره پوشه؛ فقط فایل‌های جدید یا تغییرکرده دوباره خوانده می‌شوند.
+        """
+        found = self._scan()
+        current = self._assets
+        assets = {}
+        changed = []
+        for url, (real, mtime) in found.items():
+            asset = current.get(url)
+            if asset is None or asset.mtime != mtime:
+                try:
+                    asset = self._load(url, real, mtime)
+                except OSError:
+                    continue
+                changed.append(url)
+            assets[url] = asset
+        changed.extend(url for url in current if url not in assets)
+        with self._lock:
+            self._assets = assets
+        return changed
+
+    def resolve(self, path):
+        """
+        EN: Normalise a request path to a cache key ("/" -> "/index.html").
+            Returns None for anything that could escape root: ".." segments
+            (also percent-encoded), backslashes or NUL bytes.
+        FA: نرمال‌سازی مسیر درخواست؛ مسیرهای خارج از root رد می‌شوند.
+        """
+        path = unquote(path.split("?", 1)[0].split("#", 1)[0])
+        if "\x00" in path or "\\" in path:
+            return None
+        parts = []
+        for part in path.split("/"):
+            if part in ("", "."):
+                continue
+            if part == "..":
+                return None
+            parts.append(part)
+        url = "/" + "/".join(parts)
+        if url == "/" or path.endswith("/"):
+            url = posixpath.join(url, self.index)
+        return url
+
+    def lookup(self, path):
+        url = self.resolve(path)
+        if url is None:
+            return None
+        return self._assets.get(url)
+
+    def __len__(self):
+        return len(self._assets)
+
+    def watch(self, interval=1.0):
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except OSError:
+                    pass
+
+        self._watcher = threading.Thread(target=run, name="static-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.join()
@@ -0,0 +1,238 @@
+# app/core/Streams.py
+import selectors
+import socket
+import threading
+import time
+
+from app.core.EventBus import bus
+
+# EN: heartbeat: a comment line that keeps proxies from timing the stream out
+#     and lets a dead peer surface as a send error
+# FA: تنظیمات جریان‌های SSE
+STREAM_CONFIG = dict(
+    heartbeat=15.0,        # seconds between ": ping" comments
+    max_clients=10000,     # open streams per process; further /events get 503
+    retry_ms=3000,         # EventSource reconnect delay sent to the browser
+)
+
+PING = b": ping\n\n"
+
+
+class _Client:
+    __slots__ = ("sock", "sub", "out", "writing")
+
+    def __init__(self, sock, sub):
+        self.sock = sock
+        self.sub = sub
+        self.out = b""
+        self.writing = False
+
+
+class SSEHub:
+    """
+    EN: Owns every open server-sent-events connection of the threaded servers.
+        Once a handler has written the response headers it hands its socket
+        over (attach) and returns its worker thread to the pool, so an idle
+        stream costs one socket, one Subscription and one small object here
+        instead of a blocked thread. A single selector thread writes frames
+        as the bus notifies, sends heartbeats and notices disconnects. Frames
+        are only taken from the subscription queue when the previous write
+        has fully gone out: a client too slow to keep up overflows its
+        bounded queue and is disconnected (EventSource reconnects and
+        resyncs).
+    FA: نگهداری همه اتصال‌های SSE روی یک thread با selector؛ کلاینت کند پس از پر شدن صف قطع می‌شود.
+    """
+
+    def __init__(self, event_bus=bus, heartbeat=None):
+        self.bus = event_bus
+        self.heartbeat = heartbeat or STREAM_CONFIG["heartbeat"]
+        self._selector = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = []           # clients waiting to be registered
+        self._dirty = set()          # clients with new frames
+        self._signalled = False
+        self._clients = 0
+        self._stats = {"attached": 0, "closed": 0, "dropped_slow": 0, "bytes_sent": 0}
+
+    # ---------------------------------------------------------------
+    # EN: called from request / publisher threads
+    # FA: فراخوانی از threadهای دیگر
+    # ---------------------------------------------------------------
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._wake_w.setblocking(False)
+            self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="bank-sse", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            thread, self._running = self._thread, False
+        if thread is not None:
+            self._wake()
+            thread.join(timeout=2)
+
+    def count(self):
+        return self._clients
+
+    def attach(self, sock, sub):
+        """
+        EN: Take ownership of `sock` (headers already sent) and stream `sub` to it.
+        FA: تحویل سوکت به hub؛ از این پس hub آن را می‌بندد.
+        """
+        self.start()
+        sock.setblocking(False)
+        client = _Client(sock, sub)
+        sub.notify = lambda _sub: self._mark(client)
+        with self._lock:
+            self._pending.append(client)
+            self._clients += 1
+            self._stats["attached"] += 1
+        self._mark(client)
+
+    def _mark(self, client):
+        with self._lock:
+            self._dirty.add(client)
+            if self._signalled:
+                return
+            self._signalled = True
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+            out["clients"] = self._clients
+        return out
+
+    # ---------------------------------------------------------------
+    # EN: selector thread
+    # FA: thread اصلی hub
+    # ---------------------------------------------------------------
+
+    def _run(self):
+        next_ping = time.monotonic() + self.heartbeat
+        while self._running:
+            timeout = max(0.0, next_ping - time.monotonic())
+            for key, mask in self._selector.select(timeout):
+                client = key.data
+                if client is None:
+                    self._drain_wake()
+                    continue
+                if mask & selectors.EVENT_READ and not self._readable(client):
+                    continue
+                if mask & selectors.EVENT_WRITE:
+                    self._pump(client)
+
+            with self._lock:
+                pending, self._pending = self._pending, []
+                dirty, self._dirty = self._dirty, set()
+                self._signalled = False
+            for client in pending:
+                self._selector.register(client.sock, selectors.EVENT_READ, client)
+            for client in dirty:
+                if not client.sub.closed:
+                    self._pump(client)
+
+            if time.monotonic() >= next_ping:
+                next_ping = time.monotonic() + self.heartbeat
+                for key in list(self._selector.get_map().values()):
+                    client = key.data
+                    if client is not None and not client.out:
+                        client.out = PING
+                        self._pump(client)
+
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                self._close(key.data)
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _drain_wake(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _readable(self, client):
+        # EN: an SSE client sends nothing after its request: EOF or error means gone
+        # FA: دریافت EOF یعنی کلاینت قطع شده است
+        try:
+            if client.sock.recv(4096):
+                return True
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            pass
+        self._close(client)
+        return False
+
+    def _pump(self, client):
+        if client.sock is None:
+            return
+        sub = client.sub
+        # EN: checked even with a write pending: a peer that stopped reading never drains it
+        # FA: حتی با نوشتن ناتمام؛ کلاینتی که نمی‌خواند هرگز بافرش خالی نمی‌شود
+        if sub.overflowed:
+            self._stats["dropped_slow"] += 1
+            self._close(client)
+            return
+        if not client.out:
+            client.out = sub.drain()
+        while client.out:
+            try:
+                sent = client.sock.send(client.out)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                self._close(client)
+                return
+            self._stats["bytes_sent"] += sent
+            client.out = client.out[sent:]
+            if not client.out:
+                client.out = sub.drain()
+        writing = bool(client.out)
+        if writing != client.writing:
+            client.writing = writing
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+            self._selector.modify(client.sock, events, client)
+
+    def _close(self, client):
+        if client.sock is None:
+            return
+        self.bus.unsubscribe(client.sub)
+        client.sub.notify = None
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client.sock.close()
+        except OSError:
+            pass
+        client.sock = None
+        with self._lock:
+            self._dirty.discard(client)
+            self._clients -= 1
+            self._stats["closed"] += 1
+
+
+# EN: process-wide hub, started on the first attach
+# FA: hub مشترک، با اولین اتصال راه‌اندازی می‌شود
+hub = SSEHub()
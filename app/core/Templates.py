@@ -0,0 +1,52 @@
+# app/core/Templates.py
+import html
+import os
+import re
+from functools import lru_cache
+
+VIEWS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "views")
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class Template:
+    """
+    EN: Template compiled once into UTF-8 byte fragments and {{ name }} slots.
+        render() only escapes and encodes the substituted values and joins the
+        pieces; the static markup (CSS included) is never re-formatted.
+    FA: قالب از پیش کامپایل‌شده؛ فقط مقادیر متغیر در هر درخواست جایگزین می‌شوند.
+    """
+
+    __slots__ = ("_parts", "names")
+
+    def __init__(self, source):
+        parts = []
+        names = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(source):
+            parts.append(source[pos:match.start()].encode("utf-8"))
+            parts.append(match.group(1))
+            names.append(match.group(1))
+            pos = match.end()
+        parts.append(source[pos:].encode("utf-8"))
+        self._parts = tuple(parts)
+        self.names = tuple(names)
+
+    def render(self, **values):
+        out = []
+        for part in self._parts:
+            if isinstance(part, bytes):
+                out.append(part)
+            else:
+                out.append(html.escape(str(values[part]), quote=True).encode("utf-8"))
+        return b"".join(out)
+
+
+@lru_cache(maxsize=None)
+def load_template(name):
+    """
+    EN: Compile app/views/<name> on first use and keep it for the process lifetime.
+    FA: بارگذاری و کامپایل قالب از پوشه views (یک بار برای هر پروسه).
+    """
+    with open(os.path.join(VIEWS_DIR, name), encoding="utf-8") as f:
+        return Template(f.read())
@@ -0,0 +1,94 @@
+# app/models/AccountCache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class AccountCache:
+    """
+    EN: Bounded in-process LRU cache of account rows keyed by card number,
+        with a TTL so rows changed outside this process go stale for at most
+        `ttl` seconds.
+        Writers call invalidate() after their commit. Readers take a token
+        with read_token() before querying the DB and pass it to put(); a put
+        whose token predates an invalidation of the same card is dropped, so
+        a slow reader can never overwrite a newer commit with an old row.
+    FA: کش LRU با TTL برای اطلاعات حساب؛ پس از هر commit نامعتبر می‌شود.
+    """
+
+    def __init__(self, max_entries=10000, ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()        # card -> (row, expires_at)
+        self._invalidated = OrderedDict()    # card -> sequence of last invalidation
+        self._seq = 0
+        self._floor = 0                      # oldest sequence still tracked
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0,
+                       "invalidations": 0, "stale_puts": 0}
+
+    def get(self, card):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(card)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            row, expires_at = entry
+            if expires_at <= now:
+                del self._entries[card]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(card)
+            self._stats["hits"] += 1
+            return dict(row)
+
+    def read_token(self):
+        with self._lock:
+            return self._seq
+
+    def put(self, card, row, token):
+        with self._lock:
+            if token < self._floor or self._invalidated.get(card, -1) > token:
+                self._stats["stale_puts"] += 1
+                return False
+            self._entries[card] = (dict(row), time.monotonic() + self.ttl)
+            self._entries.move_to_end(card)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            return True
+
+    def invalidate(self, *cards):
+        with self._lock:
+            self._seq += 1
+            for card in cards:
+                self._entries.pop(card, None)
+                self._invalidated[card] = self._seq
+                self._invalidated.move_to_end(card)
+                self._stats["invalidations"] += 1
+            # EN: bound the invalidation log; anything older than the floor is
+            #     treated as possibly invalidated
+            # FA: محدود کردن اندازه لاگ نامعتبرسازی
+            while len(self._invalidated) > self.max_entries:
+                _, seq = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, seq)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._seq += 1
+            self._floor = self._seq
+            self._invalidated.clear()
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+            out.update(size=len(self._entries), max_entries=self.max_entries, ttl=self.ttl)
+        return out
+
+
+# EN: Process-wide cache used by AccountModel
+# FA: کش مشترک در سطح پروسه
+account_cache = AccountCache()
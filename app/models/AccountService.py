@@ -0,0 +1,524 @@
+# app/models/AccountService.py
+"""
+EN: Account service: registration, login, balances, transfers and
+    transaction history, used by both the HTTP server and the CGI/WSGI entry
+    point (public/index.py). The service keeps no per-call state, so one
+    instance is shared by every thread. Database work goes through an
+    explicit UnitOfWork: one borrowed connection and one cursor per unit,
+    commit() to keep the work, rollback on any other way out, and the
+    connection handed back when the unit ends.
+    Connections come from an injected `connect` callable (the shared pool by
+    default). A unit can also join a connection the caller already holds
+    (unit_of_work(conn=...)); then the caller owns the connection and the
+    transaction boundaries. Statements are fixed module-level strings, so
+    the SQL translation cache and the per-connection prepared-statement
+    cache reuse them instead of re-preparing.
+FA: سرویس حساب‌ها (ثبت‌نام، ورود، موجودی، انتقال و تراکنش‌ها) که سرور HTTP و ورودی CGI/WSGI مشترکا استفاده می‌کنند.
+"""
+from decimal import Decimal, InvalidOperation
+
+from app.models.Database import get_connection, begin_write
+from app.models.TransferEngine import run_with_retry, lock_order, RetryExhausted
+from app.models.CardAllocator import allocate_card_number, DEFAULT_PREFIX
+from app.models.AccountCache import account_cache
+from app.models.Ledger import record_transfer, record_transfers, apply_balance_deltas, CENT
+from app.models.HotAccounts import slot_count, pick_slot, credit_slot, fold_slots, slot_total, hot_accounts
+from app.models.Credentials import credentials, needs_rehash
+from app.models.LiveFeed import publish_transfers
+
+# جستجوی حساب تکراری؛ UNION ALL به جای OR تا هر شاخه از ایندکس خودش استفاده کند
+SQL_FIND_EXISTING = (
+    "SELECT card_number FROM users WHERE id_card=%s "
+    "UNION ALL "
+    "SELECT card_number FROM users WHERE phone=%s LIMIT 1"
+)
+SQL_INSERT_USER = (
+    "INSERT INTO users (first_name, last_name, phone, address, id_card, card_number, pin, balance) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+)
+SQL_GET_ACCOUNT = "SELECT * FROM users WHERE card_number=%s"
+SQL_LOCK_ACCOUNT = "SELECT id, balance FROM users WHERE card_number=%s FOR UPDATE"
+SQL_LOCK_EXISTS = "SELECT id FROM users WHERE card_number=%s FOR UPDATE"
+SQL_UPGRADE_PIN = "UPDATE users SET pin=%s WHERE card_number=%s AND pin=%s"
+
+# تعداد تلاش در صورت برخورد شماره کارت جدید با کارت‌های قدیمی (تصادفی)
+CARD_ALLOCATION_ATTEMPTS = 3
+
+# حداکثر اندازه صفحه برای صفحه‌بندی تراکنش‌ها
+MAX_PAGE_SIZE = 500
+
+# حداکثر تعداد پارامتر در هر دستور IN (محدودیت SQLite و اندازه بسته MySQL)
+LOCK_CHUNK = 500
+
+
+def _is_card_collision(e):
+    # خطای unique روی card_number (فقط با کارت‌های صادر شده به روش قدیمی ممکن است)
+    return "card_number" in str(e) and ("Duplicate" in str(e) or "UNIQUE" in str(e))
+
+
+def registration_error(pin, phone, id_card):
+    # قوانین اعتبارسنجی ثبت‌نام (مشترک بین /register و ورود گروهی)؛ None یعنی معتبر
+    if not (isinstance(pin, str) and pin.isdigit() and len(pin) == 4):
+        return "PIN must be a 4-digit number!"
+    if not (isinstance(phone, str) and phone.isdigit() and len(phone) == 11 and phone.startswith("09")):
+        return "Phone must be 11 digits and start with 09."
+    if not (isinstance(id_card, str) and id_card.isdigit() and len(id_card) == 10):
+        return "ID Card must be 10 digits."
+    return None
+
+
+def _parse_amount(amount):
+    # تبدیل امن مقدار به Decimal (None در صورت نامعتبر بودن)
+    try:
+        if isinstance(amount, (float, int)):
+            value = Decimal(str(amount))
+        else:
+            value = Decimal(str(amount).strip())
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    return value if value.is_finite() else None
+
+
+def _amount_error(amount_dec):
+    # پیام خطا برای مبلغ نامعتبر (None اگر مبلغ قابل ثبت در دفتر کل باشد)
+    if amount_dec is None:
+        return "Invalid amount format."
+    if amount_dec <= 0:
+        return "Amount must be greater than zero."
+    if amount_dec != amount_dec.quantize(CENT):
+        return "Amount can have at most 2 decimal places."
+    return None
+
+
+def _transfer_error(e):
+    # پیام خطای قابل فهم برای خطاهای قفل پس از اتمام تلاش‌ها
+    if isinstance(e, RetryExhausted):
+        # retryable: هیچ تغییری ثبت نشده و تکرار درخواست (حتی با همان کلید یکتایی) مجاز است
+        return {"success": False, "retryable": True,
+                "message": "Transfer could not be completed due to concurrent activity. Please try again."}
+    return {"success": False, "message": str(e)}
+
+
+def _transactions_query(card_number, limit, before_id=None, before_date=None):
+    """
+    صفحه‌بندی keyset روی (date, id) به جای OFFSET.
+    شرط sender OR receiver به دو شاخه UNION ALL شکسته می‌شود تا هر شاخه
+    از ایندکس (sender, date) یا (receiver, date) استفاده کند.
+    """
+    keyset, keyset_params = "", []
+    if before_id is not None and before_date is not None:
+        # date <= ? محدوده ایندکس را مشخص می‌کند، بقیه فقط فیلتر است
+        keyset = " AND date <= %s AND (date < %s OR id < %s)"
+        keyset_params = [before_date, before_date, before_id]
+    elif before_id is not None:
+        keyset = " AND id < %s"
+        keyset_params = [before_id]
+
+    order = " ORDER BY date DESC, id DESC"
+    branch_limit = " LIMIT %s" if limit is not None else ""
+    limit_params = [limit] if limit is not None else []
+
+    sql = (
+        "SELECT * FROM (SELECT id, sender, receiver, amount, date FROM transactions "
+        "WHERE sender=%s" + keyset + order + branch_limit + ") AS sent "
+        "UNION ALL "
+        "SELECT * FROM (SELECT id, sender, receiver, amount, date FROM transactions "
+        "WHERE receiver=%s AND sender<>%s" + keyset + order + branch_limit + ") AS received"
+        + order + branch_limit
+    )
+    params = ([card_number] + keyset_params + limit_params +
+              [card_number, card_number] + keyset_params + limit_params + limit_params)
+    return sql, params
+
+
+def _transaction_row(r):
+    # تبدیل amount به float
+    r["amount"] = float(r["amount"]) if r.get("amount") is not None else 0.0
+    return r
+
+
+def next_cursor(rows, limit):
+    # cursor صفحه بعد (None اگر صفحه آخر باشد)
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return {"before_id": last["id"], "before_date": str(last["date"])}
+
+
+class UnitOfWork:
+    """
+    EN: One connection and one (dictionary) cursor for a group of statements.
+        write=True opens a write transaction up front (BEGIN IMMEDIATE on
+        SQLite, row locks on MySQL). Work is kept only by commit(); leaving
+        the block any other way rolls back. An owned connection goes back
+        to the pool on exit; a joined one (owns=False) is left to its owner,
+        including commit / rollback.
+    FA: واحد کار: یک اتصال و یک cursor؛ فقط با commit() ثبت می‌شود و در غیر این صورت rollback.
+    """
+
+    __slots__ = ("conn", "cursor", "write", "_owns", "_begin", "_finished")
+
+    def __init__(self, conn, write=False, owns=True, begin=begin_write):
+        self.conn = conn
+        self.cursor = None
+        self.write = write
+        self._owns = owns
+        self._begin = begin
+        self._finished = False
+
+    def __enter__(self):
+        self.cursor = self.conn.cursor(dictionary=True)
+        if self.write and self._owns:
+            self._begin(self.conn)
+        return self
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(sql, params)
+        return self.cursor
+
+    def fetchone(self, sql, params=()):
+        return self.execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        return self.execute(sql, params).fetchall()
+
+    def commit(self):
+        if self._owns:
+            self.conn.commit()
+        self._finished = True
+
+    def rollback(self):
+        self._finished = True
+        if self._owns:
+            try: self.conn.rollback()
+            except Exception: pass
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._finished:
+            self.rollback()
+        try: self.cursor.close()
+        except Exception: pass
+        if self._owns:
+            try: self.conn.close()
+            except Exception: pass
+        return False
+
+
+class AccountService:
+    """
+    EN: Thread-safe account operations. Results keep the shapes server.py
+        already returns: (success, message, card) for registration, dicts for
+        transfers, lists of rows for history.
+          connect: callable returning a DB connection (pooled by default)
+          begin:   starts a write transaction on such a connection
+    FA: عملیات حساب به صورت thread-safe؛ اتصال دیتابیس از بیرون تزریق می‌شود.
+    """
+
+    def __init__(self, connect=get_connection, begin=begin_write):
+        self._connect = connect
+        self._begin = begin
+
+    def unit_of_work(self, write=False, conn=None):
+        """
+        EN: New unit on a fresh connection, or joined to `conn` (caller-owned).
+        FA: واحد کار جدید، یا روی اتصال موجود فراخواننده.
+        """
+        if conn is not None:
+            return UnitOfWork(conn, write=write, owns=False, begin=self._begin)
+        return UnitOfWork(self._connect(), write=write, begin=self._begin)
+
+    # ---------------------------------------------------------------
+    # ثبت‌نام و ورود
+    # ---------------------------------------------------------------
+
+    def create_user(self, first_name, last_name, phone, address, id_card, pin, conn=None):
+        # هش پین (کند، در استخر پروسه) قبل از گرفتن اتصال
+        pin_hash = credentials.hash(pin)
+        for attempt in range(CARD_ALLOCATION_ATTEMPTS):
+            # تخصیص شماره کارت قبل از گرفتن اتصال (رزرو بلاک از اتصال جداگانه انجام می‌شود)
+            card_number = allocate_card_number(DEFAULT_PREFIX)
+            try:
+                # چک تکراری و درج به صورت اتمیک در یک تراکنش نوشتن
+                with self.unit_of_work(write=True, conn=conn) as uow:
+                    existing = uow.fetchone(SQL_FIND_EXISTING, (id_card, phone))
+                    if existing:
+                        return (False, "Account already exists for this national ID or phone. Using existing card.",
+                                existing.get("card_number"))
+                    uow.execute(SQL_INSERT_USER, (first_name, last_name, phone, address, id_card,
+                                                  card_number, pin_hash, Decimal("0.00")))
+                    uow.commit()
+            except Exception as e:
+                if _is_card_collision(e) and attempt + 1 < CARD_ALLOCATION_ATTEMPTS and conn is None:
+                    continue
+                return False, str(e), None
+            account_cache.invalidate(card_number)
+            return True, "Account created successfully.", card_number
+
+    def get_account(self, card_number):
+        """
+        خواندن اطلاعات حساب از کش؛ در صورت نبودن از دیتابیس خوانده و در کش ذخیره می‌شود
+        """
+        user = account_cache.get(card_number)
+        if user is not None:
+            return user
+
+        token = account_cache.read_token()
+        with self.unit_of_work() as uow:
+            user = uow.fetchone(SQL_GET_ACCOUNT, (card_number,))
+            # موجودی حساب پرتراکنش شامل زیرحساب‌ها هم هست
+            if user is not None and slot_count(card_number):
+                user["balance"] = Decimal(str(user.get("balance") or "0")) + slot_total(uow.cursor, card_number)
+
+        if user is not None:
+            account_cache.put(card_number, user, token)
+        return user
+
+    def login_attempt(self, card_number, pin):
+        """
+        ورود کاربر با شماره کارت و پین (اطلاعات حساب از کش خوانده می‌شود)
+        خروجی: (کاربر یا None، ثانیه‌های باقی‌مانده از قفل کارت پس از تلاش‌های ناموفق)
+        """
+        if not card_number or not pin:
+            return None, 0.0
+        user = self.get_account(card_number)
+        if user is None:
+            return None, 0.0
+        ok, retry_after = credentials.verify(card_number, pin, user.get("pin"))
+        if not ok:
+            return None, retry_after
+        # پین ساده (قدیمی) یا هش با پارامترهای قدیمی: هش دوباره پس از ورود موفق
+        if needs_rehash(user.get("pin")):
+            self._upgrade_pin(card_number, pin, user.get("pin"))
+        return user, 0.0
+
+    def login_user(self, card_number, pin):
+        return self.login_attempt(card_number, pin)[0]
+
+    def _upgrade_pin(self, card_number, pin, old_value):
+        try:
+            with self.unit_of_work(write=True) as uow:
+                # فقط اگر پین در این فاصله تغییر نکرده باشد
+                uow.execute(SQL_UPGRADE_PIN, (credentials.hash(pin), card_number, old_value))
+                uow.commit()
+        except Exception:
+            # ورود کاربر به خاطر خطای بروزرسانی هش رد نمی‌شود
+            pass
+        account_cache.invalidate(card_number)
+
+    def get_balance(self, card_number):
+        # موجودی حساب (None اگر کارت وجود نداشته باشد)
+        user = self.get_account(card_number)
+        if user is None:
+            return None
+        return Decimal(str(user.get("balance") or "0.00"))
+
+    # ---------------------------------------------------------------
+    # انتقال
+    # ---------------------------------------------------------------
+
+    def transfer_money(self, sender_card, receiver_card, amount):
+        """
+        تبدیل امن amount به Decimal و انتقال با تلاش مجدد در صورت deadlock
+        """
+        # نرمال‌سازی مقدار ورودی
+        amount_dec = _parse_amount(amount)
+        error = _amount_error(amount_dec)
+        if error:
+            return {"success": False, "message": error}
+
+        # انتقال به همان کارت (در غیر این صورت موجودی اشتباه افزایش می‌یافت)
+        if sender_card == receiver_card:
+            return {"success": False, "message": "Sender and receiver must be different cards."}
+
+        try:
+            return run_with_retry(lambda: self._transfer_once(sender_card, receiver_card, amount_dec))
+        except Exception as e:
+            return _transfer_error(e)
+
+    def _transfer_once(self, sender_card, receiver_card, amount_dec):
+        # یک تلاش کامل برای انتقال؛ بدون commit (هر خروج دیگر) rollback می‌شود
+        with self.unit_of_work(write=True) as uow:
+            cursor = uow.cursor
+
+            # واریز به حساب پرتراکنش: ردیف users گیرنده قفل نمی‌شود و مبلغ به یکی از زیرحساب‌ها می‌رود
+            receiver_slots = slot_count(receiver_card)
+
+            # قفل کردن رکورد‌ها به ترتیب ثابت شماره کارت (جلوگیری از deadlock)
+            rows = {}
+            locked = (sender_card,) if receiver_slots else (sender_card, receiver_card)
+            for card in lock_order(*locked):
+                rows[card] = uow.fetchone(SQL_LOCK_ACCOUNT, (card,))
+            sender = rows[sender_card]
+            # حساب پرتراکنش فقط برای کارت موجود تعریف می‌شود
+            receiver = rows[receiver_card] if not receiver_slots else True
+
+            # بررسی وجود داشتن کارت‌ها
+            if not sender:
+                return {"success": False, "message": "Sender card not found."}
+            if not receiver:
+                return {"success": False, "message": "Receiver card not found."}
+
+            # دریافت موجودی فرستنده (برای حساب پرتراکنش ابتدا زیرحساب‌ها ادغام می‌شوند)
+            sender_balance = Decimal(str(sender.get("balance", "0.00")))
+            if slot_count(sender_card):
+                sender_balance += fold_slots(cursor, sender_card)
+
+            # بررسی موجودی کافی
+            if sender_balance < amount_dec:
+                return {"success": False, "message": "Insufficient funds."}
+
+            # بروزرسانی تدریجی موجودی‌ها و ثبت تراکنش با دو ردیف بدهکار/بستانکار در دفتر کل
+            deltas = {sender_card: -amount_dec}
+            slot = pick_slot(receiver_card, receiver_slots, sender_card) if receiver_slots else None
+            if slot is None or not credit_slot(cursor, receiver_card, amount_dec, slot):
+                if slot is not None:
+                    # زیرحساب حذف شده (توسط پروسه دیگر)؛ واریز مستقیم به موجودی اصلی
+                    hot_accounts.reload()
+                    if uow.fetchone(SQL_LOCK_EXISTS, (receiver_card,)) is None:
+                        return {"success": False, "message": "Receiver card not found."}
+                deltas[receiver_card] = amount_dec
+            apply_balance_deltas(cursor, deltas)
+            transaction_id = record_transfer(cursor, sender_card, receiver_card, amount_dec)
+            uow.commit()
+
+        account_cache.invalidate(sender_card, receiver_card)
+        # انتشار رویداد زنده پس از commit (موجودی گیرنده پرتراکنش بدون کوئری اضافه معلوم نیست)
+        receiver_balance = None
+        if not receiver_slots:
+            receiver_balance = Decimal(str(receiver.get("balance") or "0.00")) + amount_dec
+        publish_transfers([(transaction_id, sender_card, receiver_card, amount_dec,
+                            sender_balance - amount_dec, receiver_balance)])
+        return {"success": True, "message": f"Transferred ${float(amount_dec):.2f} to {receiver_card} successfully!"}
+
+    def transfer_many(self, transfers):
+        """
+        انتقال گروهی در یک تراکنش دیتابیس:
+        قفل حساب‌ها به ترتیب شماره کارت، اعمال تغییرات موجودی با executemany
+        و درج گروهی تراکنش‌ها. خروجی: نتیجه جداگانه برای هر آیتم.
+        """
+        results = [None] * len(transfers)
+        items = []
+        for i, t in enumerate(transfers):
+            t = t if isinstance(t, dict) else {}
+            sender = str(t.get("sender") or "")
+            receiver = str(t.get("receiver") or "")
+            amount_dec = _parse_amount(t.get("amount"))
+            error = _amount_error(amount_dec)
+            if error:
+                results[i] = {"success": False, "message": error}
+            elif sender == receiver:
+                results[i] = {"success": False, "message": "Sender and receiver must be different cards."}
+            else:
+                items.append((i, sender, receiver, amount_dec))
+
+        if not items:
+            return results
+
+        try:
+            return run_with_retry(lambda: self._transfer_many_once(items, list(results)))
+        except Exception as e:
+            error = _transfer_error(e)
+            return [r if r is not None else error for r in results]
+
+    def _transfer_many_once(self, items, results):
+        with self.unit_of_work(write=True) as uow:
+            cursor = uow.cursor
+
+            # قفل کردن همه حساب‌ها به ترتیب ثابت (جلوگیری از deadlock)
+            cards = lock_order(*(c for _, s, r, _ in items for c in (s, r)))
+            balances = {}
+            for start in range(0, len(cards), LOCK_CHUNK):
+                chunk = cards[start:start + LOCK_CHUNK]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                rows = uow.fetchall(
+                    "SELECT card_number, balance FROM users WHERE card_number IN (" + placeholders + ") "
+                    "ORDER BY card_number FOR UPDATE",
+                    chunk
+                )
+                for row in rows:
+                    balances[row["card_number"]] = Decimal(str(row.get("balance") or "0.00"))
+
+            # زیرحساب‌های حساب‌های پرتراکنش ابتدا در موجودی اصلی ادغام می‌شوند
+            for card in cards:
+                if card in balances and slot_count(card):
+                    balances[card] += fold_slots(cursor, card)
+
+            # اعمال آیتم‌ها به ترتیب روی موجودی‌های داخل حافظه
+            opening = dict(balances)
+            changed = set()
+            rows = []
+            for i, sender, receiver, amount_dec in items:
+                if sender not in balances:
+                    results[i] = {"success": False, "message": "Sender card not found."}
+                    continue
+                if receiver not in balances:
+                    results[i] = {"success": False, "message": "Receiver card not found."}
+                    continue
+                if balances[sender] < amount_dec:
+                    results[i] = {"success": False, "message": "Insufficient funds."}
+                    continue
+                balances[sender] -= amount_dec
+                balances[receiver] += amount_dec
+                changed.update((sender, receiver))
+                rows.append([sender, receiver, amount_dec, balances[sender], balances[receiver]])
+                results[i] = {"success": True, "message": f"Transferred ${float(amount_dec):.2f} to {receiver} successfully!"}
+
+            if rows:
+                # بروزرسانی گروهی موجودی‌ها (تغییر خالص هر حساب فقط یک بار) و ثبت تراکنش‌ها در دفتر کل
+                apply_balance_deltas(cursor, {c: balances[c] - opening[c] for c in changed})
+                for row, tx_id in zip(rows, record_transfers(cursor, [row[:3] for row in rows])):
+                    row.append(tx_id)
+            uow.commit()
+
+        if changed:
+            account_cache.invalidate(*changed)
+            # رویداد زنده هر تراکنش با موجودی دو طرف بلافاصله پس از همان تراکنش
+            publish_transfers([(tx_id, s, r, a, sb, rb) for s, r, a, sb, rb, tx_id in rows])
+        return results
+
+    # ---------------------------------------------------------------
+    # تاریخچه تراکنش‌ها
+    # ---------------------------------------------------------------
+
+    def get_transactions(self, card_number, limit=200, before_id=None, before_date=None):
+        # دریافت آخرین تراکنش‌های کارت (با امکان ادامه از cursor قبلی)
+        try:
+            with self.unit_of_work() as uow:
+                rows = uow.fetchall(*_transactions_query(card_number, limit, before_id, before_date))
+        except Exception:
+            return []
+        return [_transaction_row(r) for r in rows]
+
+    def iter_transactions(self, card_number, before_id=None, before_date=None, limit=None, batch_size=500):
+        """
+        تولید تدریجی تراکنش‌ها از cursor سمت سرور بدون ساخت کل لیست در حافظه.
+        اتصال تا پایان پیمایش (یا بسته شدن generator) نگه داشته می‌شود.
+        """
+        with self.unit_of_work() as uow:
+            cursor = uow.execute(*_transactions_query(card_number, limit, before_id, before_date))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for r in rows:
+                    yield _transaction_row(r)
+
+
+def hot_queries():
+    """
+    کوئری‌های پرتکرار همراه با پارامتر نمونه (برای بررسی EXPLAIN در Migrations)
+    """
+    card = "5859831100000000"
+    return {
+        "card_exists": ("SELECT id FROM users WHERE card_number=%s", (card,)),
+        "account_lookup": (SQL_GET_ACCOUNT, (card,)),
+        "lock_account": (SQL_LOCK_ACCOUNT, (card,)),
+        "find_existing": (SQL_FIND_EXISTING, ("0000000000", "09000000000")),
+        "transactions_first_page": _transactions_query(card, 50),
+        "transactions_next_page": _transactions_query(card, 50, 1000, "2025-01-01 00:00:00"),
+    }
+
+
+# EN: shared instance on the connection pool (server.py, GroupCommit, AccountModel)
+# FA: نمونه مشترک روی استخر اتصال
+accounts = AccountService()
@@ -0,0 +1,333 @@
+# app/models/BulkAccounts.py
+"""
+EN: Streaming bulk import / export of accounts (CSV or NDJSON).
+    Import reads one record at a time, validates it with the same rules as
+    /register, dedupes against the id_card / phone values already in users
+    (preloaded once into in-memory sets) and inserts in batched
+    transactions: one executemany and one commit per `batch_size` rows. Only
+    the current batch and the dedupe sets are held in memory, whatever the
+    file size. A batch that fails (e.g. a concurrent /register took the same
+    phone) is retried row by row so only the offending rows are rejected.
+    Records: first_name, last_name, phone, address, id_card, pin[, balance].
+    `pin` may be a 4-digit PIN (hashed here) or an existing scrypt/PBKDF2
+    hash; `balance` is booked as an opening ledger posting.
+    Export streams every account (without PINs) ordered by id.
+    CLI:  python -m app.models.BulkAccounts [--db sqlite] import customers.csv
+          python -m app.models.BulkAccounts [--db sqlite] export accounts.ndjson
+FA: ورود و خروج گروهی حساب‌ها به صورت جریانی (CSV/NDJSON) با حافظه محدود و درج دسته‌ای.
+"""
+import csv
+import io
+import json
+import time
+from decimal import Decimal
+
+from app.models.Database import get_connection, begin_write
+from app.models.AccountModel import registration_error
+from app.models.AccountCache import account_cache
+from app.models.CardAllocator import allocate_card_number, DEFAULT_PREFIX
+from app.models.Credentials import credentials, is_hashed
+from app.models.Ledger import post_openings, to_minor, CENT
+
+IMPORT_FIELDS = ("first_name", "last_name", "phone", "address", "id_card", "pin", "balance")
+EXPORT_FIELDS = ("card_number", "first_name", "last_name", "phone", "address", "id_card", "balance")
+FORMATS = ("csv", "ndjson")
+
+SQL_INSERT_USER = (
+    "INSERT INTO users (first_name, last_name, phone, address, id_card, card_number, pin, balance) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+
+def format_for(name, default="csv"):
+    # EN: "customers.ndjson" / "application/x-ndjson" -> "ndjson"
+    # FA: تشخیص قالب از نام فایل یا Content-Type
+    name = (name or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in name or "json" in name:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in name:
+        return "csv"
+    return default
+
+
+def read_records(lines, fmt):
+    """
+    EN: Yield (line number, record dict or None) from an iterable of text lines.
+        None marks a record that could not be parsed.
+    FA: خواندن تدریجی رکوردها از خطوط ورودی.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_no, record if isinstance(record, dict) else None
+
+
+def _key(value):
+    # EN: digit strings as ints: a fraction of the memory in the dedupe sets
+    # FA: نگهداری مقادیر عددی به صورت int برای مصرف حافظه کمتر
+    return int(value) if value.isdigit() else value
+
+
+def load_existing_keys(batch_size=10000):
+    """
+    EN: (id_card set, phone set) of every account, streamed from the DB.
+    FA: بارگذاری کد ملی و تلفن حساب‌های موجود برای حذف تکراری‌ها.
+    """
+    id_cards, phones = set(), set()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id_card, phone FROM users")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for id_card, phone in rows:
+                id_cards.add(_key(str(id_card)))
+                phones.add(_key(str(phone)))
+    finally:
+        cursor.close()
+        conn.close()
+    return id_cards, phones
+
+
+def _clean(record):
+    # EN: (error, row) with row = normalised field dict
+    # FA: اعتبارسنجی و نرمال‌سازی یک رکورد
+    if record is None:
+        return "Malformed record.", None
+    row = {}
+    for field in IMPORT_FIELDS:
+        value = record.get(field)
+        row[field] = "" if value is None else str(value).strip()
+    # EN: an already-hashed PIN skips only the 4-digit check
+    # FA: پین هش‌شده فقط از بررسی ۴ رقمی معاف است
+    pin_for_check = "0000" if is_hashed(row["pin"]) else row["pin"]
+    error = registration_error(pin_for_check, row["phone"], row["id_card"])
+    if error:
+        return error, None
+    try:
+        balance = Decimal(row["balance"] or "0")
+        if not balance.is_finite() or balance < 0:
+            raise ValueError
+        to_minor(balance)
+    except (ArithmeticError, ValueError):
+        return "Balance must be a non-negative amount with at most 2 decimal places.", None
+    row["balance"] = balance.quantize(CENT)
+    return None, row
+
+
+class _Report:
+    def __init__(self, max_report):
+        self.max_report = max_report
+        self.counts = {"read": 0, "imported": 0, "invalid": 0, "duplicates": 0, "failed": 0}
+        self.errors = []
+
+    def reject(self, kind, line_no, message):
+        self.counts[kind] += 1
+        if len(self.errors) < self.max_report:
+            self.errors.append({"line": line_no, "error": message})
+
+
+def _insert(rows):
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        begin_write(conn)
+        cursor.executemany(SQL_INSERT_USER, [
+            (r["first_name"], r["last_name"], r["phone"], r["address"], r["id_card"],
+             r["card_number"], r["pin"], r["balance"]) for r in rows
+        ])
+        post_openings(cursor, [(r["card_number"], r["balance"]) for r in rows])
+        conn.commit()
+    except Exception:
+        try: conn.rollback()
+        except Exception: pass
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _flush(batch, report, prefix):
+    rows = [row for _, row in batch]
+    plain = [i for i, row in enumerate(rows) if not is_hashed(row["pin"])]
+    for i, hashed in zip(plain, credentials.hash_many(rows[i]["pin"] for i in plain)):
+        rows[i]["pin"] = hashed
+    for row in rows:
+        row["card_number"] = allocate_card_number(prefix)
+    try:
+        _insert(rows)
+        report.counts["imported"] += len(rows)
+    except Exception:
+        # EN: find the offending rows: one transaction per row for this batch only
+        # FA: در صورت خطا، ردیف‌های این دسته تک‌تک درج می‌شوند
+        for line_no, row in batch:
+            try:
+                _insert([row])
+                report.counts["imported"] += 1
+            except Exception as e:
+                report.reject("failed", line_no, str(e))
+    account_cache.invalidate(*(row["card_number"] for row in rows))
+
+
+def import_accounts(records, batch_size=1000, prefix=DEFAULT_PREFIX, max_report=100, progress=None):
+    """
+    EN: Import (line number, record) pairs from read_records(). Returns counts,
+        the first `max_report` rejected rows and rows/sec. `progress`, if given,
+        is called with the running counts after every batch.
+    FA: ورود گروهی رکوردها؛ خروجی شامل آمار، ردیف‌های رد شده و سرعت است.
+    """
+    started = time.perf_counter()
+    id_cards, phones = load_existing_keys()
+    report = _Report(max_report)
+    batch = []
+    for line_no, record in records:
+        report.counts["read"] += 1
+        error, row = _clean(record)
+        if error:
+            report.reject("invalid", line_no, error)
+            continue
+        id_key, phone_key = _key(row["id_card"]), _key(row["phone"])
+        if id_key in id_cards or phone_key in phones:
+            report.reject("duplicates", line_no, "Account already exists for this national ID or phone.")
+            continue
+        id_cards.add(id_key)
+        phones.add(phone_key)
+        batch.append((line_no, row))
+        if len(batch) >= batch_size:
+            _flush(batch, report, prefix)
+            batch = []
+            if progress:
+                progress(dict(report.counts))
+    if batch:
+        _flush(batch, report, prefix)
+
+    elapsed = time.perf_counter() - started
+    out = dict(report.counts)
+    out.update(errors=report.errors, seconds=round(elapsed, 3),
+               rows_per_sec=round(out["read"] / elapsed, 1) if elapsed else 0.0)
+    return out
+
+
+def iter_accounts(batch_size=1000):
+    """
+    EN: Stream every account as a dict (EXPORT_FIELDS) ordered by id.
+        The balance of a hot account includes its slots.
+    FA: پیمایش تدریجی همه حساب‌ها.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT u.card_number, u.first_name, u.last_name, u.phone, u.address, u.id_card, "
+            "u.balance + COALESCE(s.total, 0) FROM users u "
+            "LEFT JOIN (SELECT card_number, SUM(balance) AS total FROM balance_slots GROUP BY card_number) s "
+            "ON s.card_number = u.card_number ORDER BY u.id"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                record = dict(zip(EXPORT_FIELDS, row))
+                record["balance"] = str(Decimal(str(record["balance"] or "0")).quantize(CENT))
+                yield record
+    finally:
+        try: cursor.close()
+        except Exception: pass
+        try: conn.close()
+        except Exception: pass
+
+
+def export_accounts(fmt="csv", batch_size=1000, counter=None):
+    """
+    EN: Yield the export as text chunks (one chunk per batch of rows).
+        counter["rows"], if a dict is given, is kept up to date.
+    FA: خروجی گروهی حساب‌ها به صورت تکه‌های متنی.
+    """
+    rows = iter_accounts(batch_size)
+    counter = counter if counter is not None else {}
+    try:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n") if fmt == "csv" else None
+        if writer is not None:
+            writer.writeheader()
+        count = 0
+        for record in rows:
+            if writer is not None:
+                writer.writerow(record)
+            else:
+                buffer.write(json.dumps(record) + "\n")
+            count += 1
+            counter["rows"] = count
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        rows.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from app.models.Database import configure_backend
+
+    parser = argparse.ArgumentParser(description="Bulk account import / export (CSV or NDJSON)")
+    parser.add_argument("--db", choices=("mysql", "sqlite"), default=None)
+    parser.add_argument("--sqlite-path", default="database/bank_app.db")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from the file name")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("path", help="input / output file, - for stdin / stdout")
+    args = parser.parse_args()
+
+    if args.db == "sqlite":
+        configure_backend("sqlite", path=args.sqlite_path)
+    elif args.db == "mysql":
+        configure_backend("mysql")
+    fmt = args.format or format_for(args.path)
+
+    if args.action == "import":
+        marks = [100000]
+
+        def show(counts):
+            if counts["read"] >= marks[0]:
+                marks[0] += 100000
+                print(f"read {counts['read']}  imported {counts['imported']}", file=sys.stderr)
+
+        source = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+        try:
+            result = import_accounts(read_records(source, fmt), args.batch_size, progress=show)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            credentials.shutdown()
+        print(json.dumps(result, indent=2))
+    else:
+        started = time.perf_counter()
+        counter = {"rows": 0}
+        target = sys.stdout if args.path == "-" else open(args.path, "w", newline="", encoding="utf-8")
+        try:
+            for chunk in export_accounts(fmt, args.batch_size, counter):
+                target.write(chunk)
+        finally:
+            if target is not sys.stdout:
+                target.close()
+        elapsed = time.perf_counter() - started
+        print(json.dumps({"exported": counter["rows"], "seconds": round(elapsed, 3),
+                          "rows_per_sec": round(counter["rows"] / elapsed, 1) if elapsed else 0.0}),
+              file=sys.stderr)
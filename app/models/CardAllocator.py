@@ -0,0 +1,180 @@
+# app/models/CardAllocator.py
+import hashlib
+import os
+import secrets
+import threading
+from app.models.Database import get_connection, begin_write, get_backend
+
+# EN: Secret for the card-number permutation. Without BANK_CARD_KEY a random
+#     key is generated once per sequence and kept in card_sequences.secret.
+#     It must not change once cards have been issued, otherwise new numbers
+#     can collide with old ones (registration retries such a collision).
+# FA: کلید جایگشت شماره کارت؛ در صورت نبود متغیر محیطی، کلید تصادفی در دیتابیس ذخیره می‌شود.
+PERMUTATION_KEY = os.environ.get("BANK_CARD_KEY", "").encode("utf-8") or None
+
+DEFAULT_PREFIX = "58598311"
+CARD_LENGTH = 16
+
+
+def luhn_check_digit(digits):
+    """
+    EN: Luhn (mod 10) check digit for a string of digits.
+    FA: محاسبه رقم کنترل Luhn.
+    """
+    total = 0
+    # EN: double every second digit starting from the rightmost payload digit
+    # FA: دو برابر کردن یک رقم در میان از سمت راست
+    for i, ch in enumerate(reversed(digits)):
+        d = ord(ch) - 48
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return str((10 - total % 10) % 10)
+
+
+def luhn_valid(card_number):
+    return (isinstance(card_number, str) and card_number.isdigit() and len(card_number) > 1
+            and luhn_check_digit(card_number[:-1]) == card_number[-1])
+
+
+def _round(value, round_no, key, bits):
+    digest = hashlib.blake2b(
+        value.to_bytes(8, "big") + bytes((round_no,)), key=key, digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big") & ((1 << bits) - 1)
+
+
+def permute(value, domain, key, rounds=4):
+    """
+    EN: Keyed bijection on [0, domain): a balanced Feistel network over the
+        next even power of two, with cycle-walking to stay inside the domain.
+        Distinct inputs always give distinct outputs, so sequence numbers map
+        to unique, non-sequential card bodies without any lookup.
+    FA: جایگشت یک‌به‌یک و کلیددار روی بازه [0, domain).
+    """
+    if not 0 <= value < domain:
+        raise ValueError("value out of range")
+    bits = max(2, (domain - 1).bit_length())
+    bits += bits % 2
+    half = bits // 2
+    mask = (1 << half) - 1
+
+    while True:
+        left, right = value >> half, value & mask
+        for r in range(rounds):
+            left, right = right, left ^ _round(right, r, key, half)
+        value = (left << half) | right
+        if value < domain:
+            return value
+
+
+class CardAllocator:
+    """
+    EN: Hands out card numbers: prefix + permuted sequence number + Luhn digit.
+        Sequence numbers come from the card_sequences table in blocks of
+        `block_size`, so one short DB transaction serves a whole block and no
+        per-candidate existence query is needed. Unused numbers in a block are
+        simply skipped after a restart. The permutation key is `key`, else
+        the sequence's secret read with the block (created on first use).
+    FA: تخصیص شماره کارت از بلاک‌های رزرو شده بدون کوئری تکراری بودن.
+    """
+
+    def __init__(self, prefix=DEFAULT_PREFIX, block_size=100, key=PERMUTATION_KEY):
+        prefix = str(prefix)
+        if not prefix.isdigit() or len(prefix) >= CARD_LENGTH - 1:
+            raise ValueError("prefix must be numeric and shorter than 15 digits")
+        self.prefix = prefix
+        self.block_size = block_size
+        self.fixed_key = key
+        self.key = key
+        self.body_length = CARD_LENGTH - len(prefix) - 1
+        self.domain = 10 ** self.body_length
+        self.sequence_name = "card:" + prefix
+        self._next = 0
+        self._end = 0
+        self._backend = None
+        self._lock = threading.Lock()
+
+    def _reserve_block(self):
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            begin_write(conn)
+            cursor.execute(
+                "SELECT next_value, secret FROM card_sequences WHERE name=%s FOR UPDATE", (self.sequence_name,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                start, secret = 0, secrets.token_hex(32)
+                cursor.execute(
+                    "INSERT INTO card_sequences (name, next_value, secret) VALUES (%s, %s, %s)",
+                    (self.sequence_name, self.block_size, secret)
+                )
+            else:
+                start, secret = int(row[0]), row[1] or secrets.token_hex(32)
+                cursor.execute(
+                    "UPDATE card_sequences SET next_value=%s, secret=%s WHERE name=%s",
+                    (start + self.block_size, secret, self.sequence_name)
+                )
+            conn.commit()
+        except Exception:
+            try: conn.rollback()
+            except: pass
+            raise
+        finally:
+            try: cursor.close()
+            except: pass
+            try: conn.close()
+            except: pass
+
+        if start + self.block_size > self.domain:
+            raise RuntimeError(f"card number space for prefix {self.prefix} is exhausted")
+        return start, start + self.block_size, bytes.fromhex(secret)
+
+    def card_for(self, sequence, key=None):
+        body = str(permute(sequence, self.domain, key or self.key)).zfill(self.body_length)
+        payload = self.prefix + body
+        return payload + luhn_check_digit(payload)
+
+    def allocate(self):
+        with self._lock:
+            # EN: a block is only valid for the database it was reserved from
+            # FA: بلاک فقط برای همان دیتابیسی که از آن رزرو شده معتبر است
+            backend = get_backend()
+            if self._next >= self._end or backend is not self._backend:
+                self._next, self._end, secret = self._reserve_block()
+                self.key = self.fixed_key or secret
+                self._backend = backend
+            sequence = self._next
+            self._next += 1
+            key = self.key
+        return self.card_for(sequence, key)
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def _after_fork():
+    # EN: a reserved block is one process's; a forked worker reserves its own
+    # FA: بلاک رزرو شده متعلق به پروسه والد است؛ فرزند بلاک جدید رزرو می‌کند
+    global _allocators_lock
+    _allocators.clear()
+    _allocators_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def get_allocator(prefix=DEFAULT_PREFIX):
+    allocator = _allocators.get(prefix)
+    if allocator is None:
+        with _allocators_lock:
+            allocator = _allocators.setdefault(prefix, CardAllocator(prefix))
+    return allocator
+
+
+def allocate_card_number(prefix=DEFAULT_PREFIX):
+    return get_allocator(prefix).allocate()
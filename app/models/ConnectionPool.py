@@ -0,0 +1,258 @@
+# app/models/ConnectionPool.py
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """
+    EN: Raised when no connection could be checked out before the timeout.
+    FA: وقتی در زمان مشخص هیچ اتصالی از استخر آزاد نشود.
+    """
+
+
+class PooledConnection:
+    """
+    EN: Thin proxy around a raw DB connection. close() returns it to the pool
+        instead of tearing down the socket, so model code keeps its
+        get_connection() / conn.close() shape.
+    FA: پوشش سبک روی اتصال دیتابیس؛ close() اتصال را به استخر برمی‌گرداند.
+    """
+
+    __slots__ = ("_conn", "_pool")
+
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def __getattr__(self, name):
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            raise AttributeError(f"connection already returned to pool ({name})")
+        return getattr(conn, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        wrap = self._pool.cursor_wrapper
+        return wrap(cursor) if wrap is not None else cursor
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def discard(self):
+        """
+        EN: Drop the underlying connection instead of reusing it (e.g. after a fatal error).
+        FA: اتصال خراب را به جای برگرداندن به استخر، دور می‌اندازد.
+        """
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn, discard=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    EN: Bounded, thread-safe connection pool.
+        - factory():        opens a new raw connection
+        - health_check(c):  returns True if an idle connection is still usable
+        - min_size:         connections opened eagerly and kept warm
+        - max_size:         hard upper bound on open connections
+        - timeout:          seconds acquire() waits for a free connection
+        - ping_interval:    idle seconds after which a connection is health-checked
+                            before reuse (0 = check on every reuse)
+        - cursor_wrapper:   optional callable applied to every cursor (instrumentation)
+    FA: استخر اتصال محدود و thread-safe با حداقل/حداکثر اندازه، timeout و health check.
+    """
+
+    def __init__(self, factory, min_size=1, max_size=10, timeout=5.0,
+                 health_check=None, ping_interval=30.0, cursor_wrapper=None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._factory = factory
+        self._health_check = health_check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.cursor_wrapper = cursor_wrapper
+
+        self._idle = deque()          # (conn, last_used)
+        self._size = 0                # idle + checked out
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+            "timeouts": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+        }
+
+        # EN: Warm up the minimum number of connections
+        # FA: ساخت اتصال‌های اولیه
+        for _ in range(min_size):
+            conn = self._factory()
+            with self._cond:
+                self._size += 1
+                self._stats["created"] += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def acquire(self, timeout=None):
+        """
+        EN: Check out a connection, opening a new one if under max_size,
+            otherwise waiting up to `timeout` seconds for one to be released.
+        FA: گرفتن یک اتصال از استخر؛ در صورت پر بودن تا timeout صبر می‌کند.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_start = None
+
+        while True:
+            conn = None
+            last_used = None
+            create = False
+
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeout("connection pool is closed")
+                    if self._idle:
+                        # EN: LIFO reuse keeps the hottest connections warm
+                        # FA: استفاده LIFO تا اتصال‌های گرم دوباره استفاده شوند
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"no connection available within {timeout:.2f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    if not waited:
+                        waited = True
+                        wait_start = time.monotonic()
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+
+                if waited:
+                    self._stats["wait_seconds_total"] += time.monotonic() - wait_start
+                    waited = False
+
+            # EN: Network work (connect / ping) happens outside the lock
+            # FA: کارهای شبکه خارج از قفل انجام می‌شوند
+            if create:
+                try:
+                    conn = self._factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+                    self._stats["checkouts"] += 1
+                return PooledConnection(conn, self)
+
+            if self._is_healthy(conn, last_used):
+                with self._cond:
+                    self._stats["checkouts"] += 1
+                return PooledConnection(conn, self)
+
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            self._drop(conn)
+
+    def _is_healthy(self, conn, last_used):
+        if self._health_check is None:
+            return True
+        if self.ping_interval and time.monotonic() - last_used < self.ping_interval:
+            return True
+        try:
+            return bool(self._health_check(conn))
+        except Exception:
+            return False
+
+    def release(self, conn, discard=False):
+        """
+        EN: Return a connection to the pool. Open transactions are rolled back so
+            row locks never leak to the next borrower.
+        FA: برگرداندن اتصال به استخر؛ تراکنش باز rollback می‌شود.
+        """
+        if not discard and getattr(conn, "in_transaction", False):
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                pass
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+                return
+        self._drop(conn)
+
+    def _drop(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def stats(self):
+        """
+        EN: Snapshot of pool gauges and counters (safe to scrape from any thread).
+        FA: آمار لحظه‌ای استخر اتصال.
+        """
+        with self._cond:
+            idle = len(self._idle)
+            out = dict(self._stats)
+            out.update(
+                size=self._size,
+                idle=idle,
+                in_use=self._size - idle,
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+        return out
+
+    def close(self):
+        """
+        EN: Close all idle connections; checked-out ones are closed on release.
+        FA: بستن همه اتصال‌های بیکار.
+        """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._drop(conn)
@@ -0,0 +1,348 @@
+# app/models/Credentials.py
+"""
+EN: PIN storage and verification.
+    PINs are stored as salted scrypt hashes ("scrypt$n$r$p$salt$hash"; PBKDF2
+    is available as a fallback scheme). Hashing is deliberately slow, so:
+      - verification runs in a process pool (the GIL-bound request thread
+        only waits on a future),
+      - recent successful verifications are cached for a short TTL, keyed by
+        an HMAC of (card, PIN, stored hash) under a per-process key, so the
+        cache never holds a PIN or anything usable offline,
+      - failed attempts are counted per card in memory and a card is locked
+        out for the rest of the window after too many.
+    Rows still holding a plaintext PIN (created before hashing) are accepted
+    once and re-hashed on that successful login.
+    Hash all remaining plaintext PINs:  python -m app.models.Credentials [--db sqlite] rehash
+FA: ذخیره و بررسی پین به صورت هش (scrypt)؛ بررسی در استخر پروسه، کش کوتاه‌مدت و محدودیت تلاش ناموفق.
+"""
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+# EN: hash parameters, pool size, cache and lockout settings
+# FA: پارامترهای هش، اندازه استخر، کش و محدودیت تلاش
+CREDENTIAL_CONFIG = dict(
+    scheme="scrypt",
+    scrypt_n=2 ** 14,
+    scrypt_r=8,
+    scrypt_p=1,
+    pbkdf2_iterations=600000,
+    workers=os.cpu_count() or 1,
+    cache_ttl=60.0,
+    cache_size=10000,
+    max_failures=5,
+    failure_window=300.0
+)
+
+SALT_BYTES = 16
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def hash_pin(pin, scheme=None):
+    """
+    EN: Salted hash of `pin` in the configured scheme.
+    FA: هش نمک‌دار پین.
+    """
+    scheme = scheme or CREDENTIAL_CONFIG["scheme"]
+    salt = secrets.token_bytes(SALT_BYTES)
+    pin = str(pin).encode("utf-8")
+    if scheme == "scrypt":
+        n, r, p = CREDENTIAL_CONFIG["scrypt_n"], CREDENTIAL_CONFIG["scrypt_r"], CREDENTIAL_CONFIG["scrypt_p"]
+        digest = hashlib.scrypt(pin, salt=salt, n=n, r=r, p=p)
+        return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(digest)}"
+    if scheme == "pbkdf2_sha256":
+        iterations = CREDENTIAL_CONFIG["pbkdf2_iterations"]
+        digest = hashlib.pbkdf2_hmac("sha256", pin, salt, iterations)
+        return f"pbkdf2_sha256${iterations}${_b64(salt)}${_b64(digest)}"
+    raise ValueError(f"unknown PIN hash scheme: {scheme}")
+
+
+def is_hashed(stored):
+    return str(stored or "").startswith(("scrypt$", "pbkdf2_sha256$"))
+
+
+def needs_rehash(stored):
+    # EN: plaintext, another scheme or weaker parameters than configured
+    # FA: پین ساده یا پارامترهای قدیمی
+    stored = str(stored or "")
+    scheme = CREDENTIAL_CONFIG["scheme"]
+    if scheme == "scrypt":
+        prefix = f"scrypt${CREDENTIAL_CONFIG['scrypt_n']}${CREDENTIAL_CONFIG['scrypt_r']}${CREDENTIAL_CONFIG['scrypt_p']}$"
+    else:
+        prefix = f"pbkdf2_sha256${CREDENTIAL_CONFIG['pbkdf2_iterations']}$"
+    return not stored.startswith(prefix)
+
+
+def check_pin(pin, stored):
+    """
+    EN: True if `pin` matches the stored value (hash, or legacy plaintext).
+        Pure function: this is what the process pool runs.
+    FA: مقایسه پین با مقدار ذخیره‌شده (اجرا در استخر پروسه).
+    """
+    stored = str(stored or "")
+    pin_bytes = str(pin).encode("utf-8")
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            expected = _unb64(parts[5])
+            digest = hashlib.scrypt(pin_bytes, salt=_unb64(parts[4]), n=n, r=r, p=p, dklen=len(expected))
+            return hmac.compare_digest(digest, expected)
+        if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            expected = _unb64(parts[3])
+            digest = hashlib.pbkdf2_hmac("sha256", pin_bytes, _unb64(parts[2]), int(parts[1]), len(expected))
+            return hmac.compare_digest(digest, expected)
+    except (ValueError, TypeError):
+        return False
+    if is_hashed(stored):
+        return False
+    # EN: legacy plaintext row
+    # FA: ردیف قدیمی با پین ساده
+    return bool(stored) and hmac.compare_digest(stored.encode("utf-8"), pin_bytes)
+
+
+class FailureLimiter:
+    """
+    EN: Per-card count of failed attempts in a sliding window; a card with
+        max_failures failures in the window is locked until the oldest one ages out.
+    FA: شمارش تلاش‌های ناموفق هر کارت در یک بازه زمانی.
+    """
+
+    def __init__(self, max_failures=None, window=None, max_cards=100000):
+        self.max_failures = max_failures or CREDENTIAL_CONFIG["max_failures"]
+        self.window = window or CREDENTIAL_CONFIG["failure_window"]
+        self.max_cards = max_cards
+        self._failures = OrderedDict()       # card -> deque of failure times
+        self._lock = threading.Lock()
+
+    def retry_after(self, card):
+        # EN: seconds until the card may try again (0 if not locked)
+        # FA: زمان باقی‌مانده تا رفع قفل
+        now = time.monotonic()
+        with self._lock:
+            times = self._failures.get(card)
+            if not times:
+                return 0.0
+            while times and times[0] <= now - self.window:
+                times.popleft()
+            if not times:
+                del self._failures[card]
+                return 0.0
+            if len(times) < self.max_failures:
+                return 0.0
+            return times[0] + self.window - now
+
+    def failed(self, card):
+        with self._lock:
+            times = self._failures.pop(card, None) or deque()
+            times.append(time.monotonic())
+            while len(times) > self.max_failures:
+                times.popleft()
+            self._failures[card] = times
+            while len(self._failures) > self.max_cards:
+                self._failures.popitem(last=False)
+
+    def succeeded(self, card):
+        with self._lock:
+            self._failures.pop(card, None)
+
+    def locked_cards(self):
+        with self._lock:
+            return sum(1 for t in self._failures.values() if len(t) >= self.max_failures)
+
+
+class CredentialVerifier:
+    """
+    EN: Verifies PINs through a process pool, with a short-TTL cache of
+        successful verifications and per-card failure limiting.
+        workers=0 hashes in the calling thread (CLI / tools).
+    FA: بررسی پین در استخر پروسه به همراه کش و محدودیت تلاش.
+    """
+
+    def __init__(self, workers=None, cache_ttl=None, cache_size=None, limiter=None):
+        self.workers = CREDENTIAL_CONFIG["workers"] if workers is None else workers
+        self.cache_ttl = CREDENTIAL_CONFIG["cache_ttl"] if cache_ttl is None else cache_ttl
+        self.cache_size = cache_size or CREDENTIAL_CONFIG["cache_size"]
+        self.limiter = limiter or FailureLimiter()
+        self._key = secrets.token_bytes(32)
+        self._cache = OrderedDict()          # keyed digest -> expires_at
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {"verifications": 0, "hashes": 0, "cache_hits": 0, "failures": 0, "locked_out": 0}
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # EN: forkserver: never fork the threaded server itself
+                # FA: استفاده از forkserver به جای fork پروسه چندنخی
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        return self._pool().submit(fn, *args).result()
+
+    def hash(self, pin):
+        with self._lock:
+            self._stats["hashes"] += 1
+        return self._run(hash_pin, pin)
+
+    def hash_many(self, pins, chunksize=16):
+        # EN: batch hashing spread over all pool workers (bulk import)
+        # FA: هش گروهی با همه پروسه‌های استخر
+        pins = list(pins)
+        with self._lock:
+            self._stats["hashes"] += len(pins)
+        if self.workers <= 0:
+            return [hash_pin(pin) for pin in pins]
+        return list(self._pool().map(hash_pin, pins, chunksize=chunksize))
+
+    def _cache_key(self, card, pin, stored):
+        message = "\0".join((str(card), str(pin), str(stored))).encode("utf-8")
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def verify(self, card, pin, stored):
+        """
+        EN: (ok, retry_after). retry_after > 0 means the card is locked out and
+            the PIN was not checked.
+        FA: خروجی (درستی پین، زمان انتظار در صورت قفل بودن کارت).
+        """
+        wait = self.limiter.retry_after(card)
+        if wait > 0:
+            with self._lock:
+                self._stats["locked_out"] += 1
+            return False, wait
+
+        key = self._cache_key(card, pin, stored)
+        now = time.monotonic()
+        with self._lock:
+            self._stats["verifications"] += 1
+            expires_at = self._cache.get(key)
+            if expires_at is not None:
+                if expires_at > now:
+                    self._stats["cache_hits"] += 1
+                    return True, 0.0
+                del self._cache[key]
+
+        ok = self._run(check_pin, pin, stored)
+        if not ok:
+            self.limiter.failed(card)
+            with self._lock:
+                self._stats["failures"] += 1
+            return False, 0.0
+
+        self.limiter.succeeded(card)
+        if self.cache_ttl > 0:
+            with self._lock:
+                self._cache[key] = time.monotonic() + self.cache_ttl
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return True, 0.0
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _after_fork(self):
+        # EN: the parent's pool (and its manager threads) does not exist in a
+        #     forked worker; the worker starts its own on first use
+        # FA: استخر پروسه والد در فرزند قابل استفاده نیست
+        self._executor = None
+        self._lock = threading.Lock()
+        self.limiter._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+            out.update(cache_size=len(self._cache), workers=self.workers)
+        out["locked_cards"] = self.limiter.locked_cards()
+        return out
+
+
+# EN: process-wide verifier used by AccountService
+# FA: نمونه مشترک در سطح پروسه
+credentials = CredentialVerifier()
+os.register_at_fork(after_in_child=credentials._after_fork)
+
+
+def rehash_plaintext(batch_size=500):
+    """
+    EN: Replace every plaintext PIN still in users with its hash.
+        Each row is updated only if its PIN is unchanged since it was read.
+    FA: هش کردن همه پین‌های ساده باقی‌مانده.
+    """
+    from app.models.Database import get_connection, begin_write
+    from app.models.AccountCache import account_cache
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT card_number, pin FROM users WHERE pin NOT LIKE %s AND pin NOT LIKE %s",
+                       ("scrypt$%", "pbkdf2_sha256$%"))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    updated = 0
+    for start in range(0, len(rows), batch_size):
+        chunk = [(credentials.hash(pin), card, pin) for card, pin in rows[start:start + batch_size]]
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            begin_write(conn)
+            cursor.executemany("UPDATE users SET pin=%s WHERE card_number=%s AND pin=%s", chunk)
+            conn.commit()
+        except Exception:
+            try: conn.rollback()
+            except Exception: pass
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        account_cache.invalidate(*(card for _, card, _ in chunk))
+        updated += len(chunk)
+    return updated
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from app.models.Database import configure_backend
+
+    parser = argparse.ArgumentParser(description="PIN hashing maintenance")
+    parser.add_argument("--db", choices=("mysql", "sqlite"), default=None)
+    parser.add_argument("--sqlite-path", default="database/bank_app.db")
+    parser.add_argument("action", choices=("rehash",))
+    args = parser.parse_args()
+
+    if args.db == "sqlite":
+        configure_backend("sqlite", path=args.sqlite_path)
+    elif args.db == "mysql":
+        configure_backend("mysql")
+
+    print(json.dumps({"rehashed": rehash_plaintext()}, indent=2))
+    credentials.shutdown()
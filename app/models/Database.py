@@ -1,9 +1,120 @@
-import mysql.connector
+import os
+import threading
+from app.models.ConnectionPool import ConnectionPool
+from app.models.Storage import create_backend
+from app.models.AccountCache import account_cache
+from app.core.Metrics import instrument_cursor
+
+# EN: Storage backend ("mysql" or "sqlite"), selectable from the environment
+# FA: انتخاب نوع دیتابیس از طریق متغیر محیطی
+DB_BACKEND = os.environ.get("BANK_DB_BACKEND", "mysql")
+
+DB_CONFIG = dict(
+    host="localhost",
+    user="root",
+    password="",
+    database="bank_app"
+)
+
+SQLITE_CONFIG = dict(
+    path=os.environ.get("BANK_SQLITE_PATH", "database/bank_app.db")
+)
+
+# EN: Pool sizing; override with configure_pool() before the first request
+# FA: تنظیمات استخر اتصال
+POOL_CONFIG = dict(
+    min_size=2,
+    max_size=10,
+    timeout=5.0,
+    ping_interval=30.0
+)
+
+_backend = None
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _pool_lock:
+            if _backend is None:
+                options = SQLITE_CONFIG if DB_BACKEND == "sqlite" else DB_CONFIG
+                _backend = create_backend(DB_BACKEND, **options)
+    return _backend
+
+
+def configure_backend(name, **options):
+    """
+    EN: Switch storage backend at runtime (e.g. from a CLI flag); the pool is
+        rebuilt lazily on next use.
+    FA: تغییر نوع دیتابیس در زمان اجرا.
+    """
+    global DB_BACKEND, _backend, _pool
+    if not options:
+        options = SQLITE_CONFIG if name == "sqlite" else DB_CONFIG
+    backend = create_backend(name, **options)
+    with _pool_lock:
+        DB_BACKEND, _backend = name, backend
+        old, _pool = _pool, None
+    if old is not None:
+        old.close()
+    # EN: cached rows belong to the previous database
+    # FA: داده‌های کش متعلق به دیتابیس قبلی هستند
+    account_cache.clear()
+    return backend
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        backend = get_backend()
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(backend.connect, health_check=backend.ping,
+                                       cursor_wrapper=instrument_cursor, **POOL_CONFIG)
+    return _pool
+
+
+def configure_pool(**options):
+    """
+    EN: Replace the pool settings (min_size, max_size, timeout, ping_interval)
+        and rebuild the pool lazily on next use.
+    FA: تغییر تنظیمات استخر اتصال.
+    """
+    global _pool
+    unknown = set(options) - set(POOL_CONFIG)
+    if unknown:
+        raise ValueError(f"unknown pool options: {', '.join(sorted(unknown))}")
+    with _pool_lock:
+        POOL_CONFIG.update(options)
+        old, _pool = _pool, None
+    if old is not None:
+        old.close()
+
 
 def get_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="", 
-        database="bank_app"
-    )
+    # EN: Borrow a pooled connection; conn.close() hands it back to the pool
+    # FA: گرفتن اتصال از استخر؛ close() آن را برمی‌گرداند
+    return get_pool().acquire()
+
+
+def begin_write(conn):
+    # EN: Start a write transaction the way the active backend needs it
+    # FA: شروع تراکنش نوشتن متناسب با نوع دیتابیس
+    get_backend().begin_write(conn)
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def _after_fork():
+    # EN: a forked worker must not share the parent's sockets: forget (never
+    #     close) inherited connections; the child builds its own pool lazily
+    # FA: پروسه فرزند اتصال‌های والد را استفاده نمی‌کند و استخر خودش را می‌سازد
+    global _pool, _pool_lock
+    _pool, _pool_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
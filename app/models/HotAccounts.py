@@ -0,0 +1,284 @@
+# app/models/HotAccounts.py
+"""
+EN: Hot-account mode for cards that receive a very high rate of transfers.
+    Credits to a designated card do not touch (or lock) its users row; they
+    go to one of N rows in balance_slots, picked by hash, so concurrent
+    receivers only contend when they land on the same slot. The account's
+    balance is users.balance + SUM(slots). Debits, batch transfers and the
+    background compactor fold the slots back into users.balance, always
+    locking the users row before the slot rows.
+    Manage:  python -m app.models.HotAccounts [--db sqlite] add <card> [--slots 8]
+             python -m app.models.HotAccounts remove <card> | list | compact
+FA: حالت حساب پرتراکنش؛ واریزها بین چند زیرحساب پخش می‌شوند تا روی یک ردیف قفل صف نکشند.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from app.models.Database import get_connection, begin_write, get_backend
+
+# EN: default slot count, compactor period and how often each process re-reads
+#     hot_accounts to see add/remove done elsewhere (seconds)
+# FA: تعداد پیش‌فرض زیرحساب‌ها، فاصله اجرای فشرده‌ساز و فاصله بازخوانی فهرست
+HOT_ACCOUNT_CONFIG = dict(
+    slots=8,
+    compact_interval=1.0,
+    refresh_interval=1.0
+)
+
+SQL_CREDIT_SLOT = "UPDATE balance_slots SET balance = ROUND(balance + %s, 2) WHERE card_number=%s AND slot=%s"
+SQL_SLOT_TOTAL = "SELECT COALESCE(SUM(balance), 0) FROM balance_slots WHERE card_number=%s"
+
+
+class HotAccountRegistry:
+    """
+    EN: In-process view of the hot_accounts table ({card: slot count}).
+        Reloaded when the storage backend changes, after add/remove in this
+        process, and every `refresh_interval` seconds so that add/remove from
+        the command line or another worker process is picked up. One caller
+        re-reads the table; the others keep using the current view meanwhile.
+    FA: فهرست حساب‌های پرتراکنش در حافظه (بازخوانی دوره‌ای از دیتابیس).
+    """
+
+    def __init__(self, refresh_interval=None):
+        self.refresh_interval = refresh_interval or HOT_ACCOUNT_CONFIG["refresh_interval"]
+        self._slots = {}
+        self._backend = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT card_number, slots FROM hot_accounts")
+            return {card: int(slots) for card, slots in cursor.fetchall()}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def reload(self):
+        with self._lock:
+            self._slots = self._load()
+            self._backend = get_backend()
+            self._expires = time.monotonic() + self.refresh_interval
+
+    def _fresh(self):
+        if self._backend is not get_backend():
+            self.reload()
+        elif time.monotonic() >= self._expires and self._lock.acquire(blocking=False):
+            try:
+                self._slots = self._load()
+            except Exception:
+                # EN: keep the current view; retried after the next interval
+                # FA: در صورت خطا فهرست فعلی حفظ می‌شود
+                pass
+            finally:
+                self._expires = time.monotonic() + self.refresh_interval
+                self._lock.release()
+        return self._slots
+
+    def slots(self, card):
+        return self._fresh().get(card, 0)
+
+    def cards(self):
+        return dict(self._fresh())
+
+
+hot_accounts = HotAccountRegistry()
+
+
+def slot_count(card):
+    return hot_accounts.slots(card)
+
+
+def pick_slot(card, slots, salt):
+    # EN: spread concurrent writers: same thread + sender keeps hitting the same slot
+    # FA: انتخاب زیرحساب بر اساس hash
+    return hash((threading.get_ident(), salt, card)) % slots
+
+
+def credit_slot(cursor, card, amount_dec, slot):
+    # EN: False if the slot row is gone (card un-designated by another process)
+    # FA: اگر زیرحساب وجود نداشته باشد False برمی‌گرداند
+    cursor.execute(SQL_CREDIT_SLOT, (amount_dec, card, slot))
+    return cursor.rowcount == 1
+
+
+def fold_slots(cursor, card):
+    """
+    EN: Move the slot balances into users.balance; returns the amount moved.
+        The caller must already hold the users row lock (lock order: users, then slots).
+    FA: انتقال موجودی زیرحساب‌ها به موجودی اصلی (قفل users باید گرفته شده باشد).
+    """
+    cursor.execute(
+        "SELECT slot, balance FROM balance_slots WHERE card_number=%s ORDER BY slot FOR UPDATE", (card,)
+    )
+    rows = cursor.fetchall()
+    total = Decimal("0")
+    for row in rows:
+        value = row["balance"] if isinstance(row, dict) else row[1]
+        total += Decimal(str(value or "0"))
+    if total:
+        cursor.execute("UPDATE users SET balance = ROUND(balance + %s, 2) WHERE card_number=%s", (total, card))
+        cursor.execute("UPDATE balance_slots SET balance=0 WHERE card_number=%s", (card,))
+    return total
+
+
+def slot_total(cursor, card):
+    cursor.execute(SQL_SLOT_TOTAL, (card,))
+    row = cursor.fetchone()
+    value = (list(row.values())[0] if isinstance(row, dict) else row[0]) if row else 0
+    return Decimal(str(value or "0"))
+
+
+def add_hot_account(card, slots=None):
+    """
+    EN: Designate an existing card as hot with `slots` sub-balances.
+    FA: تعریف یک کارت موجود به عنوان حساب پرتراکنش.
+    """
+    slots = int(slots or HOT_ACCOUNT_CONFIG["slots"])
+    if slots < 1:
+        return {"success": False, "message": "slots must be at least 1."}
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        begin_write(conn)
+        cursor.execute("SELECT id FROM users WHERE card_number=%s FOR UPDATE", (card,))
+        if cursor.fetchone() is None:
+            conn.rollback()
+            return {"success": False, "message": "Card not found."}
+        # EN: changing the slot count: fold everything first, then rebuild the slot rows
+        # FA: در صورت تغییر تعداد زیرحساب‌ها ابتدا موجودی‌ها ادغام می‌شوند
+        fold_slots(cursor, card)
+        cursor.execute("DELETE FROM balance_slots WHERE card_number=%s", (card,))
+        cursor.execute("DELETE FROM hot_accounts WHERE card_number=%s", (card,))
+        cursor.execute("INSERT INTO hot_accounts (card_number, slots) VALUES (%s, %s)", (card, slots))
+        cursor.executemany("INSERT INTO balance_slots (card_number, slot, balance) VALUES (%s, %s, 0)",
+                           [(card, slot) for slot in range(slots)])
+        conn.commit()
+    except Exception as e:
+        try: conn.rollback()
+        except: pass
+        return {"success": False, "message": str(e)}
+    finally:
+        cursor.close()
+        conn.close()
+    hot_accounts.reload()
+    return {"success": True, "card_number": card, "slots": slots}
+
+
+def remove_hot_account(card):
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        begin_write(conn)
+        cursor.execute("SELECT id FROM users WHERE card_number=%s FOR UPDATE", (card,))
+        fold_slots(cursor, card)
+        cursor.execute("DELETE FROM balance_slots WHERE card_number=%s", (card,))
+        cursor.execute("DELETE FROM hot_accounts WHERE card_number=%s", (card,))
+        removed = cursor.rowcount > 0
+        conn.commit()
+    except Exception as e:
+        try: conn.rollback()
+        except: pass
+        return {"success": False, "message": str(e)}
+    finally:
+        cursor.close()
+        conn.close()
+    hot_accounts.reload()
+    return {"success": removed, "card_number": card}
+
+
+def compact(cards=None):
+    """
+    EN: Fold the slots of every hot account (or of `cards`) into users.balance,
+        one short transaction per card. Returns {card: amount folded}.
+        The account's total balance does not change, so cached rows stay valid.
+    FA: ادغام زیرحساب‌ها در موجودی اصلی (هر کارت در یک تراکنش کوتاه).
+    """
+    folded = {}
+    for card in (cards if cards is not None else sorted(hot_accounts.cards())):
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            begin_write(conn)
+            cursor.execute("SELECT id FROM users WHERE card_number=%s FOR UPDATE", (card,))
+            amount = fold_slots(cursor, card)
+            conn.commit()
+            if amount:
+                folded[card] = amount
+        except Exception:
+            try: conn.rollback()
+            except: pass
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+    return folded
+
+
+class SlotCompactor:
+    """
+    EN: Background thread running compact() every `interval` seconds.
+        Errors (e.g. a lock timeout under load) are counted and retried on the next tick.
+    FA: اجرای دوره‌ای فشرده‌ساز در پس‌زمینه.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or HOT_ACCOUNT_CONFIG["compact_interval"]
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"runs": 0, "folded": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="slot-compactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.stats["folded"] += len(compact())
+            except Exception:
+                self.stats["errors"] += 1
+            self.stats["runs"] += 1
+
+    def stop(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from app.models.Database import configure_backend
+
+    parser = argparse.ArgumentParser(description="Manage hot (slotted) accounts")
+    parser.add_argument("--db", choices=("mysql", "sqlite"), default=None)
+    parser.add_argument("--sqlite-path", default="database/bank_app.db")
+    parser.add_argument("action", choices=("add", "remove", "list", "compact"))
+    parser.add_argument("card", nargs="?")
+    parser.add_argument("--slots", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.db == "sqlite":
+        configure_backend("sqlite", path=args.sqlite_path)
+    elif args.db == "mysql":
+        configure_backend("mysql")
+
+    if args.action in ("add", "remove") and not args.card:
+        parser.error(f"{args.action} needs a card number")
+    if args.action == "add":
+        result = add_hot_account(args.card, args.slots)
+    elif args.action == "remove":
+        result = remove_hot_account(args.card)
+    elif args.action == "list":
+        result = hot_accounts.cards()
+    else:
+        result = {card: str(amount) for card, amount in compact().items()}
+    print(json.dumps(result, indent=2))
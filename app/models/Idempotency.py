@@ -0,0 +1,301 @@
+# app/models/Idempotency.py
+"""
+EN: Idempotency keys for money-moving requests.
+    A client sends the same key with every retry of one logical request
+    (Idempotency-Key header or "idempotency_key" field). The first request
+    with a key executes; later ones get the stored (status, result) back
+    instead of running again, and a duplicate that arrives while the first
+    is still running waits for that same result. Keys are scoped per caller
+    card and bound to a fingerprint of the request parameters: reusing a key
+    for a different transfer is rejected.
+    Results are kept in a bounded in-memory map with a TTL. With
+    persist=True the key is also claimed in the idempotency_keys table
+    *before* executing, so retries that land on another process (or after
+    a restart) are still deduplicated; a key whose request was in flight
+    when a process died stays "in progress" until it expires, which is the
+    safe choice for transfers.
+    Results that must not stick (status >= 500, or result["retryable"]) are
+    not stored: a retry with the same key executes again.
+    In-flight keys count against max_keys too: when every slot is taken by
+    a request still running, a new key is refused with 503 (not executed)
+    instead of growing the map.
+FA: کلید یکتایی برای درخواست‌های انتقال؛ تکرار درخواست با همان کلید دوباره اجرا نمی‌شود و نتیجه قبلی برمی‌گردد.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from app.models.Database import get_connection
+
+# EN: ttl in seconds; wait = how long a duplicate waits for the in-flight original
+# FA: مدت نگهداری کلیدها و حداکثر انتظار درخواست تکراری
+IDEMPOTENCY_CONFIG = dict(
+    ttl=86400,
+    max_keys=100000,
+    max_key_length=128,
+    wait=30.0,
+    persist=False,
+    purge_interval=60.0,
+)
+
+SQL_CLAIM = (
+    "INSERT INTO idempotency_keys (scope, idem_key, fingerprint, status, response, expires_at) "
+    "VALUES (%s, %s, %s, NULL, NULL, %s)"
+)
+SQL_LOOKUP = "SELECT fingerprint, status, response, expires_at FROM idempotency_keys WHERE scope=%s AND idem_key=%s"
+
+
+def valid_key(key):
+    # EN: 1..max_key_length printable ASCII characters, no spaces
+    # FA: اعتبارسنجی کلید
+    return (isinstance(key, str) and 0 < len(key) <= IDEMPOTENCY_CONFIG["max_key_length"]
+            and all("!" <= ch <= "~" for ch in key))
+
+
+def fingerprint(*parts):
+    # EN: digest of the request parameters a key is bound to
+    # FA: اثر انگشت پارامترهای درخواست
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _cacheable(status, result):
+    return status < 500 and not (isinstance(result, dict) and result.get("retryable"))
+
+
+def _is_duplicate(e):
+    return "Duplicate" in str(e) or "UNIQUE" in str(e)
+
+
+def _conflict():
+    return 422, {"success": False, "message": "Idempotency key was already used for a different request."}
+
+
+def _in_progress():
+    return 409, {"success": False, "retryable": True,
+                 "message": "A request with this idempotency key is still in progress."}
+
+
+def _busy():
+    return 503, {"success": False, "retryable": True,
+                 "message": "Too many requests in progress. Try again later."}
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint, expires_at):
+        self.fingerprint = fingerprint
+        self.future = Future()
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    """
+    EN: execute(scope, key, fingerprint, fn) -> (status, result, outcome), where
+        fn() -> (status, result) runs at most once per (scope, key) and
+        outcome is "executed", "replayed", "coalesced", "conflict",
+        "in_progress" or "busy" (store full of in-flight keys; fn not run).
+    FA: اجرای حداکثر یک‌باره fn برای هر کلید و برگرداندن نتیجه ذخیره‌شده برای تکرارها.
+    """
+
+    def __init__(self, ttl=None, max_keys=None, persist=None, wait=None):
+        self.ttl = ttl or IDEMPOTENCY_CONFIG["ttl"]
+        self.max_keys = max_keys or IDEMPOTENCY_CONFIG["max_keys"]
+        self.persist = IDEMPOTENCY_CONFIG["persist"] if persist is None else persist
+        self.wait = wait or IDEMPOTENCY_CONFIG["wait"]
+        self._entries = OrderedDict()        # (scope, key) -> _Entry, in insertion (= expiry) order
+        self._inflight = 0                   # entries whose request is still running
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self._stats = {"executed": 0, "replayed": 0, "coalesced": 0, "conflicts": 0,
+                       "in_progress": 0, "busy": 0, "not_stored": 0, "expired": 0, "evictions": 0}
+
+    def execute(self, scope, key, fingerprint, fn):
+        ident = (scope, key)
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            entry = self._entries.get(ident)
+            owner = entry is None
+            if owner:
+                if not self._evict(self.max_keys - 1):
+                    self._stats["busy"] += 1
+                    return _busy() + ("busy",)
+                entry = self._entries[ident] = _Entry(fingerprint, now + self.ttl)
+                self._inflight += 1
+            elif entry.fingerprint != fingerprint:
+                self._stats["conflicts"] += 1
+                return _conflict() + ("conflict",)
+
+        if not owner:
+            outcome = "replayed" if entry.future.done() else "coalesced"
+            try:
+                status, result = entry.future.result(self.wait)
+            except FutureTimeout:
+                outcome = "in_progress"
+                status, result = _in_progress()
+            with self._lock:
+                self._stats[outcome] += 1
+            return status, result, outcome
+
+        try:
+            status, result, outcome = self._run_owned(scope, key, fingerprint, fn, now)
+        except BaseException as e:
+            self._forget(ident, entry)
+            entry.future.set_exception(e)
+            with self._lock:
+                self._inflight -= 1
+            raise
+        stored = outcome != "executed" or _cacheable(status, result)
+        if not stored:
+            self._forget(ident, entry)
+        elif outcome in ("conflict", "in_progress"):
+            # EN: decided by another process: do not pin it in this one
+            # FA: نتیجه از پروسه دیگر؛ در حافظه نگه داشته نمی‌شود
+            self._forget(ident, entry)
+        entry.future.set_result((status, result))
+        with self._lock:
+            self._inflight -= 1
+            self._stats["conflicts" if outcome == "conflict" else outcome] += 1
+            self._stats["not_stored"] += not stored
+        return status, result, outcome
+
+    def _run_owned(self, scope, key, fingerprint, fn, now):
+        if not self.persist:
+            status, result = fn()
+            return status, result, "executed"
+
+        claimed = self._claim(scope, key, fingerprint, now)
+        if claimed is not None:
+            return claimed
+        try:
+            status, result = fn()
+        except BaseException:
+            self._release(scope, key)
+            raise
+        if _cacheable(status, result):
+            self._save(scope, key, status, result)
+        else:
+            self._release(scope, key)
+        return status, result, "executed"
+
+    def _forget(self, ident, entry):
+        with self._lock:
+            if self._entries.get(ident) is entry:
+                del self._entries[ident]
+
+    def _sweep(self, now):
+        # EN: one ttl for every key, so the expired ones are at the front
+        # FA: کلیدهای منقضی همیشه در ابتدای صف هستند
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at > now or not entry.future.done():
+                break
+            self._entries.popitem(last=False)
+            self._stats["expired"] += 1
+
+    def _evict(self, limit):
+        # EN: drop the oldest finished keys until at most `limit` remain; an
+        #     in-flight key is never evicted, only skipped (they are few: the
+        #     scan stops after passing at most self._inflight of them).
+        #     False if the in-flight keys alone exceed the limit.
+        # FA: حذف قدیمی‌ترین کلیدهای تمام‌شده؛ کلیدهای در حال اجرا حذف نمی‌شوند
+        if self._inflight > limit:
+            return False
+        if len(self._entries) > limit:
+            finished = []
+            for ident, entry in self._entries.items():
+                if entry.future.done():
+                    finished.append(ident)
+                    if len(self._entries) - len(finished) <= limit:
+                        break
+            for ident in finished:
+                del self._entries[ident]
+            self._stats["evictions"] += len(finished)
+        return True
+
+    # ---------------------------------------------------------------
+    # EN: persistence (idempotency_keys table)
+    # FA: ذخیره در دیتابیس
+    # ---------------------------------------------------------------
+
+    def _claim(self, scope, key, fingerprint, now):
+        # EN: None if this process now owns the key, else (status, result, outcome)
+        # FA: ثبت کلید قبل از اجرا؛ None یعنی اجرا با این پروسه است
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            self._purge(cursor, conn, now)
+            for _ in range(3):
+                try:
+                    cursor.execute(SQL_CLAIM, (scope, key, fingerprint, int(now + self.ttl)))
+                    conn.commit()
+                    return None
+                except Exception as e:
+                    try: conn.rollback()
+                    except Exception: pass
+                    if not _is_duplicate(e):
+                        raise
+                cursor.execute(SQL_LOOKUP, (scope, key))
+                row = cursor.fetchone()
+                if row is None:
+                    continue
+                stored_fingerprint, status, response, expires_at = row
+                if int(expires_at) <= now:
+                    cursor.execute(
+                        "DELETE FROM idempotency_keys WHERE scope=%s AND idem_key=%s AND expires_at <= %s",
+                        (scope, key, int(now)))
+                    conn.commit()
+                    continue
+                if stored_fingerprint != fingerprint:
+                    return _conflict() + ("conflict",)
+                if status is None:
+                    return _in_progress() + ("in_progress",)
+                return int(status), json.loads(response), "replayed"
+            return _in_progress() + ("in_progress",)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _save(self, scope, key, status, result):
+        self._write(
+            "UPDATE idempotency_keys SET status=%s, response=%s WHERE scope=%s AND idem_key=%s",
+            (status, json.dumps(result, default=str), scope, key))
+
+    def _release(self, scope, key):
+        self._write("DELETE FROM idempotency_keys WHERE scope=%s AND idem_key=%s AND status IS NULL",
+                    (scope, key))
+
+    def _write(self, sql, params):
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _purge(self, cursor, conn, now):
+        # EN: drop expired rows at most once per purge_interval
+        # FA: حذف دوره‌ای ردیف‌های منقضی
+        if now < self._next_purge:
+            return
+        self._next_purge = now + IDEMPOTENCY_CONFIG["purge_interval"]
+        cursor.execute("DELETE FROM idempotency_keys WHERE expires_at <= %s", (int(now),))
+        conn.commit()
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+            out.update(keys=len(self._entries), inflight=self._inflight, max_keys=self.max_keys, ttl=self.ttl,
+                       persist=int(self.persist))
+        return out
+
+
+# EN: process-wide store used by /transfer
+# FA: نمونه مشترک برای /transfer
+idempotency = IdempotencyStore()
@@ -0,0 +1,301 @@
+# app/models/Ledger.py
+"""
+EN: Double-entry ledger.
+    Every transfer appends two postings to ledger_entries (a debit on the
+    sender, a credit on the receiver) in integer minor units, so amounts are
+    exact on every backend and each transaction's postings sum to zero.
+    users.balance is the materialized balance: it is only ever changed by the
+    same deltas, in the same DB transaction, as the postings.
+    Money that did not come from a transfer (balances that existed before the
+    ledger, seeded accounts) is booked as an opening posting against
+    OPENING_ACCOUNT, so the whole ledger always sums to zero.
+    Verify integrity:  python -m app.models.Ledger [--db sqlite] [--repair]
+FA: دفتر کل دوطرفه؛ هر انتقال دو ردیف بدهکار/بستانکار ثبت می‌کند و موجودی‌ها از آن قابل بازسازی است.
+"""
+import time
+from decimal import Decimal
+
+from app.models.Database import get_connection, begin_write
+from app.models.AccountCache import account_cache
+
+# EN: amounts are stored as integer cents
+# FA: مبالغ به صورت عدد صحیح (سنت) ذخیره می‌شوند
+MINOR_UNITS = 100
+CENT = Decimal("0.01")
+
+# EN: contra account for opening balances; not a valid card (no users row)
+# FA: حساب مقابل برای موجودی‌های اولیه
+OPENING_ACCOUNT = "0000000000000000"
+
+SQL_POST = "INSERT INTO ledger_entries (transaction_id, card_number, amount_minor) VALUES (%s, %s, %s)"
+SQL_RECORD_TRANSFER = "INSERT INTO transactions (sender, receiver, amount) VALUES (%s, %s, %s)"
+# EN: ids of the rows a bulk insert just added (see record_transfers)
+# FA: شناسه ردیف‌های درج‌شده در ثبت گروهی
+SQL_LAST_TRANSACTION_ID = "SELECT COALESCE(MAX(id), 0) AS last_id FROM transactions"
+SQL_TRANSACTIONS_AFTER = "SELECT id, sender FROM transactions WHERE id > %s ORDER BY id"
+# EN: ROUND keeps SQLite (which stores NUMERIC as REAL) from accumulating float error
+# FA: ROUND برای جلوگیری از خطای اعشاری در SQLite
+SQL_APPLY_DELTA = "UPDATE users SET balance = ROUND(balance + %s, 2) WHERE card_number=%s"
+
+
+def to_minor(amount):
+    """
+    EN: Decimal amount -> integer cents; ValueError if it has sub-cent digits.
+    FA: تبدیل مبلغ به سنت؛ مبلغ با بیش از دو رقم اعشار خطا می‌دهد.
+    """
+    minor = Decimal(str(amount)) * MINOR_UNITS
+    if minor != minor.to_integral_value():
+        raise ValueError("Amount can have at most 2 decimal places.")
+    return int(minor)
+
+
+def from_minor(minor):
+    return (Decimal(int(minor)) / MINOR_UNITS).quantize(CENT)
+
+
+def record_transfer(cursor, sender_card, receiver_card, amount_dec):
+    """
+    EN: Append the transfer row and its two postings; returns the transaction id.
+        Must run inside the caller's write transaction.
+    FA: ثبت تراکنش و دو ردیف دفتر کل (داخل تراکنش فراخواننده).
+    """
+    amount_minor = to_minor(amount_dec)
+    cursor.execute(SQL_RECORD_TRANSFER, (sender_card, receiver_card, from_minor(amount_minor)))
+    transaction_id = cursor.lastrowid
+    cursor.executemany(SQL_POST, [
+        (transaction_id, sender_card, -amount_minor),
+        (transaction_id, receiver_card, amount_minor),
+    ])
+    return transaction_id
+
+
+def record_transfers(cursor, transfers):
+    """
+    EN: record_transfer for many [(sender, receiver, amount)] in a fixed number
+        of statements: the transfer rows with one executemany, then their ids
+        (in insert order), then every posting with one more executemany.
+        The caller must hold the users row locks of all the senders, so no
+        other transaction can add a row from one of them meanwhile; returns
+        the transaction ids in the order of `transfers`.
+    FA: ثبت گروهی تراکنش‌ها و ردیف‌های دفتر کل با تعداد ثابت دستور SQL.
+    """
+    if not transfers:
+        return []
+    amounts = [to_minor(amount) for _, _, amount in transfers]
+    cursor.execute(SQL_LAST_TRANSACTION_ID)
+    row = cursor.fetchone()
+    last_id = (row["last_id"] if isinstance(row, dict) else row[0]) or 0
+    cursor.executemany(SQL_RECORD_TRANSFER, [
+        (sender, receiver, from_minor(minor)) for (sender, receiver, _), minor in zip(transfers, amounts)
+    ])
+    senders = {sender for sender, _, _ in transfers}
+    cursor.execute(SQL_TRANSACTIONS_AFTER, (last_id,))
+    ids = []
+    for row in cursor.fetchall():
+        tx_id, sender = (row["id"], row["sender"]) if isinstance(row, dict) else row[:2]
+        if sender in senders:
+            ids.append(tx_id)
+    if len(ids) != len(transfers):
+        raise RuntimeError(f"expected {len(transfers)} new transactions, found {len(ids)}")
+    postings = []
+    for tx_id, (sender, receiver, _), minor in zip(ids, transfers, amounts):
+        postings.append((tx_id, sender, -minor))
+        postings.append((tx_id, receiver, minor))
+    cursor.executemany(SQL_POST, postings)
+    return ids
+
+
+def apply_balance_deltas(cursor, deltas):
+    """
+    EN: Incrementally maintain users.balance from {card: Decimal delta}.
+        Relative updates (balance = balance + delta) in card order.
+    FA: بروزرسانی تدریجی موجودی‌ها با مقدار تغییر هر کارت.
+    """
+    rows = [(delta, card) for card, delta in sorted(deltas.items()) if delta]
+    if rows:
+        cursor.executemany(SQL_APPLY_DELTA, rows)
+
+
+def post_openings(cursor, balances):
+    """
+    EN: Book opening balances [(card, amount)] against OPENING_ACCOUNT.
+        The caller sets users.balance itself (e.g. in the INSERT).
+    FA: ثبت موجودی اولیه حساب‌ها در دفتر کل.
+    """
+    rows = []
+    for card, amount in balances:
+        amount_minor = to_minor(amount)
+        if amount_minor:
+            rows.append((None, card, amount_minor))
+            rows.append((None, OPENING_ACCOUNT, -amount_minor))
+    if rows:
+        cursor.executemany(SQL_POST, rows)
+
+
+def _minor_from_balance(value):
+    return int(Decimal(str(value if value is not None else "0")).quantize(CENT) * MINOR_UNITS)
+
+
+def _stream(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def reconcile(repair=False, batch_size=5000, max_report=100):
+    """
+    EN: Recompute every balance from the postings in one streaming pass and
+        compare it with users.balance. Both sides are read ordered by card
+        number and merge-joined, so memory stays flat however many accounts
+        there are. Also checks that the ledger and every transaction sum to
+        zero. With repair=True mismatched users.balance values are rewritten
+        from the ledger.
+    FA: بازسازی موجودی‌ها از دفتر کل در یک پیمایش و مقایسه با users.balance.
+    """
+    started = time.perf_counter()
+    # EN: two connections: MySQL cannot interleave two unbuffered result sets on one
+    # FA: دو اتصال جدا برای پیمایش همزمان دو نتیجه
+    ledger_conn = get_connection()
+    users_conn = get_connection()
+    ledger_cursor = ledger_conn.cursor()
+    users_cursor = users_conn.cursor()
+    report = {
+        "accounts": 0,
+        "ledger_accounts": 0,
+        "mismatch_count": 0,
+        "mismatches": [],
+        "unbalanced_transactions": [],
+        "ledger_total": "0.00",
+        "opening_total": "0.00",
+    }
+    mismatched = []
+    try:
+        ledger_cursor.execute(
+            "SELECT card_number, SUM(amount_minor) FROM ledger_entries "
+            "GROUP BY card_number ORDER BY card_number"
+        )
+        # EN: a hot account's balance includes its slots (see HotAccounts)
+        # FA: موجودی حساب پرتراکنش شامل زیرحساب‌هاست
+        users_cursor.execute(
+            "SELECT u.card_number, u.balance + COALESCE(s.total, 0) FROM users u "
+            "LEFT JOIN (SELECT card_number, SUM(balance) AS total FROM balance_slots GROUP BY card_number) s "
+            "ON s.card_number = u.card_number ORDER BY u.card_number"
+        )
+
+        ledger_rows = _stream(ledger_cursor, batch_size)
+        user_rows = _stream(users_cursor, batch_size)
+        ledger_row = next(ledger_rows, None)
+        user_row = next(user_rows, None)
+        total = 0
+
+        while ledger_row is not None or user_row is not None:
+            if user_row is None or (ledger_row is not None and ledger_row[0] < user_row[0]):
+                # EN: postings without an account: only the opening contra account is expected
+                # FA: ردیف دفتر کل بدون حساب کاربر
+                card, ledger_minor = ledger_row[0], int(ledger_row[1] or 0)
+                total += ledger_minor
+                report["ledger_accounts"] += 1
+                if card == OPENING_ACCOUNT:
+                    report["opening_total"] = str(from_minor(ledger_minor))
+                elif ledger_minor:
+                    mismatched.append((card, None, ledger_minor))
+                ledger_row = next(ledger_rows, None)
+                continue
+
+            card = user_row[0]
+            balance_minor = _minor_from_balance(user_row[1])
+            ledger_minor = 0
+            if ledger_row is not None and ledger_row[0] == card:
+                ledger_minor = int(ledger_row[1] or 0)
+                total += ledger_minor
+                report["ledger_accounts"] += 1
+                ledger_row = next(ledger_rows, None)
+            report["accounts"] += 1
+            if balance_minor != ledger_minor:
+                mismatched.append((card, balance_minor, ledger_minor))
+            user_row = next(user_rows, None)
+
+        report["ledger_total"] = str(from_minor(total))
+
+        # EN: every transfer's postings must cancel out
+        # FA: مجموع ردیف‌های هر تراکنش باید صفر باشد
+        ledger_cursor.execute(
+            "SELECT transaction_id, SUM(amount_minor) FROM ledger_entries "
+            "WHERE transaction_id IS NOT NULL GROUP BY transaction_id HAVING SUM(amount_minor) <> 0"
+        )
+        for transaction_id, amount_minor in _stream(ledger_cursor, batch_size):
+            if len(report["unbalanced_transactions"]) < max_report:
+                report["unbalanced_transactions"].append(
+                    {"transaction_id": transaction_id, "sum": str(from_minor(amount_minor))})
+    finally:
+        for resource in (ledger_cursor, users_cursor, ledger_conn, users_conn):
+            try: resource.close()
+            except Exception: pass
+
+    report["mismatch_count"] = len(mismatched)
+    for card, balance_minor, ledger_minor in mismatched[:max_report]:
+        report["mismatches"].append({
+            "card_number": card,
+            "balance": None if balance_minor is None else str(from_minor(balance_minor)),
+            "ledger": str(from_minor(ledger_minor)),
+        })
+    report["ok"] = not mismatched and total == 0 and not report["unbalanced_transactions"]
+
+    if repair:
+        report["repaired"] = _repair([(card, ledger_minor) for card, balance_minor, ledger_minor in mismatched
+                                      if balance_minor is not None])
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def _repair(rows):
+    # EN: rewrite materialized balances from the ledger (the ledger is the source of truth)
+    # FA: اصلاح موجودی‌ها بر اساس دفتر کل
+    if not rows:
+        return 0
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        begin_write(conn)
+        # EN: slots of hot accounts keep their amounts; users.balance takes the rest
+        # FA: سهم زیرحساب‌ها از موجودی کم می‌شود
+        cursor.executemany(
+            "UPDATE users SET balance = %s - COALESCE("
+            "(SELECT SUM(balance) FROM balance_slots WHERE card_number=%s), 0) WHERE card_number=%s",
+            [(from_minor(minor), card, card) for card, minor in rows]
+        )
+        conn.commit()
+    except Exception:
+        try: conn.rollback()
+        except Exception: pass
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    account_cache.invalidate(*(card for card, _ in rows))
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+    from app.models.Database import configure_backend
+
+    parser = argparse.ArgumentParser(description="Reconcile balances against the ledger")
+    parser.add_argument("--db", choices=("mysql", "sqlite"), default=None)
+    parser.add_argument("--sqlite-path", default="database/bank_app.db")
+    parser.add_argument("--repair", action="store_true", help="rewrite mismatched balances from the ledger")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.db == "sqlite":
+        configure_backend("sqlite", path=args.sqlite_path)
+    elif args.db == "mysql":
+        configure_backend("mysql")
+
+    result = reconcile(repair=args.repair, batch_size=args.batch_size)
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["ok"] else 1)
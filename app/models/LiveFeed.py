@@ -0,0 +1,164 @@
+# app/models/LiveFeed.py
+"""
+EN: Live balance / transaction events for the dashboard. AccountModel calls
+    publish_transfers() after a transfer has committed; each side of the
+    transfer gets one "transaction" event on its card's topic carrying the
+    signed delta and, when it is known without another query, the new
+    balance. Nothing is encoded for a card with no open stream.
+    With several worker processes each has its own bus and account cache;
+    a TransferFollower in every worker polls the transactions table for
+    transfers committed elsewhere, invalidates those cards in the local
+    cache and publishes their events (without balances).
+FA: انتشار رویداد تراکنش و موجودی پس از commit برای داشبورد زنده.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from app.core.EventBus import bus, sse_frame
+from app.models.AccountCache import account_cache
+from app.models.Database import get_connection
+
+# EN: follower poll interval (seconds), rows per poll, how far below the highest
+#     seen id to look again (ids that committed out of order), ids remembered
+# FA: تنظیمات دنبال‌کننده تراکنش‌های پروسه‌های دیگر
+FEED_CONFIG = dict(
+    poll_interval=0.5,
+    batch=500,
+    id_lag=256,
+    remembered=8192,
+)
+
+SQL_LATEST_ID = "SELECT MAX(id) AS id FROM transactions"
+SQL_SINCE = "SELECT id, sender, receiver, amount, date FROM transactions WHERE id > %s ORDER BY id LIMIT %s"
+
+# EN: transaction ids already published (or skipped) by this process
+# FA: شناسه تراکنش‌هایی که این پروسه منتشر کرده است
+_seen = OrderedDict()
+_seen_lock = threading.Lock()
+
+
+def _remember(tx_id):
+    # EN: False if the id was already known
+    # FA: ثبت شناسه؛ False اگر قبلا دیده شده باشد
+    with _seen_lock:
+        if tx_id in _seen:
+            return False
+        _seen[tx_id] = None
+        while len(_seen) > FEED_CONFIG["remembered"]:
+            _seen.popitem(last=False)
+        return True
+
+
+def balance_frame(card, balance):
+    # EN: initial snapshot sent when a stream opens
+    # FA: موجودی اولیه هنگام باز شدن جریان
+    return sse_frame("balance", {"card_number": card, "balance": float(balance)})
+
+
+def _side(payload, delta, balance):
+    data = dict(payload, delta=float(delta))
+    if balance is not None:
+        data["balance"] = float(balance)
+    return sse_frame("transaction", data, payload["id"])
+
+
+def publish_transfers(transfers):
+    """
+    EN: transfers: [(transaction id, sender, receiver, Decimal amount,
+        sender balance or None, receiver balance or None)], already committed.
+    FA: انتشار تراکنش‌های commit شده برای فرستنده و گیرنده.
+    """
+    date = None
+    for tx_id, sender, receiver, amount, sender_balance, receiver_balance in transfers:
+        _remember(tx_id)
+        to_sender, to_receiver = bus.has_subscribers(sender), bus.has_subscribers(receiver)
+        if not (to_sender or to_receiver):
+            continue
+        date = date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        payload = {"id": tx_id, "sender": sender, "receiver": receiver, "amount": float(amount), "date": date}
+        if to_sender:
+            bus.publish(sender, _side(payload, -amount, sender_balance))
+        if to_receiver:
+            bus.publish(receiver, _side(payload, amount, receiver_balance))
+
+
+class TransferFollower:
+    """
+    EN: Background thread that follows the transactions table by id and
+        handles the transfers this process did not commit itself.
+    FA: دنبال کردن تراکنش‌های commit شده در پروسه‌های دیگر.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or FEED_CONFIG["poll_interval"]
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = None
+        self.stats = {"polls": 0, "followed": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="transfer-follower", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                self.stats["errors"] += 1
+            self.stats["polls"] += 1
+
+    def poll(self):
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            if self._last is None:
+                # EN: start from now: older transfers are already in every snapshot
+                # FA: شروع از آخرین تراکنش موجود
+                cursor.execute(SQL_LATEST_ID)
+                self._last = (cursor.fetchone() or {}).get("id") or 0
+                return 0
+            # EN: look back id_lag ids once, then page forward until caught up
+            # FA: یک بار بازبینی شناسه‌های اخیر، سپس ادامه تا آخرین تراکنش
+            rows, since = [], max(0, self._last - FEED_CONFIG["id_lag"])
+            while True:
+                cursor.execute(SQL_SINCE, (since, FEED_CONFIG["batch"]))
+                page = cursor.fetchall()
+                rows.extend(page)
+                if len(page) < FEED_CONFIG["batch"]:
+                    break
+                since = page[-1]["id"]
+        finally:
+            cursor.close()
+            conn.close()
+
+        followed = 0
+        for row in rows:
+            self._last = max(self._last, row["id"])
+            if not _remember(row["id"]):
+                continue
+            sender, receiver = row["sender"], row["receiver"]
+            account_cache.invalidate(sender, receiver)
+            to_sender, to_receiver = bus.has_subscribers(sender), bus.has_subscribers(receiver)
+            if to_sender or to_receiver:
+                amount = Decimal(str(row["amount"]))
+                payload = {"id": row["id"], "sender": sender, "receiver": receiver,
+                           "amount": float(amount), "date": str(row["date"])}
+                if to_sender:
+                    bus.publish(sender, _side(payload, -amount, None))
+                if to_receiver:
+                    bus.publish(receiver, _side(payload, amount, None))
+            followed += 1
+        self.stats["followed"] += followed
+        return followed
+
+    def stop(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
@@ -0,0 +1,388 @@
+# app/models/Migrations.py
+"""
+EN: Versioned schema migrations for MySQL and SQLite.
+    Run pending migrations:   python -m app.models.Migrations [--db sqlite]
+    Check hot query plans:    python -m app.models.Migrations --check-plans
+FA: مهاجرت‌های نسخه‌دار اسکیمای دیتابیس برای MySQL و SQLite.
+"""
+import re
+
+# EN: (version, name, {dialect: [statements]}) — append only, never edit a shipped entry
+# FA: فقط مهاجرت جدید اضافه کنید؛ مهاجرت‌های قبلی را تغییر ندهید
+MIGRATIONS = [
+    (1, "create users and transactions", {
+        "mysql": [
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                first_name VARCHAR(100) NOT NULL,
+                last_name VARCHAR(100) NOT NULL,
+                phone VARCHAR(11) NOT NULL,
+                address VARCHAR(255) NOT NULL DEFAULT '',
+                id_card VARCHAR(10) NOT NULL,
+                card_number CHAR(16) NOT NULL,
+                pin VARCHAR(255) NOT NULL,
+                balance DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
+                UNIQUE KEY ux_users_card_number (card_number)
+            ) ENGINE=InnoDB
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS transactions (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                sender CHAR(16) NOT NULL,
+                receiver CHAR(16) NOT NULL,
+                amount DECIMAL(15, 2) NOT NULL,
+                date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB
+            """,
+        ],
+        "sqlite": [
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                first_name TEXT NOT NULL,
+                last_name TEXT NOT NULL,
+                phone TEXT NOT NULL,
+                address TEXT NOT NULL DEFAULT '',
+                id_card TEXT NOT NULL,
+                card_number TEXT NOT NULL UNIQUE,
+                pin TEXT NOT NULL,
+                balance NUMERIC NOT NULL DEFAULT 0
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sender TEXT NOT NULL,
+                receiver TEXT NOT NULL,
+                amount NUMERIC NOT NULL,
+                date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        ],
+    }),
+    (2, "indexes for hot queries", {
+        # EN: id_card / phone lookups back the duplicate check; (sender|receiver, date)
+        #     serve the newest-first history page for each side of the UNION ALL
+        # FA: ایندکس‌ها برای چک تکراری و تاریخچه تراکنش‌ها
+        "mysql": [
+            "CREATE UNIQUE INDEX ux_users_id_card ON users (id_card)",
+            "CREATE UNIQUE INDEX ux_users_phone ON users (phone)",
+            "CREATE INDEX ix_transactions_sender_date ON transactions (sender, date)",
+            "CREATE INDEX ix_transactions_receiver_date ON transactions (receiver, date)",
+        ],
+        "sqlite": [
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_users_id_card ON users (id_card)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_users_phone ON users (phone)",
+            "CREATE INDEX IF NOT EXISTS ix_transactions_sender_date ON transactions (sender, date)",
+            "CREATE INDEX IF NOT EXISTS ix_transactions_receiver_date ON transactions (receiver, date)",
+        ],
+    }),
+    (3, "card number sequences", {
+        "mysql": [
+            """
+            CREATE TABLE IF NOT EXISTS card_sequences (
+                name VARCHAR(32) PRIMARY KEY,
+                next_value BIGINT NOT NULL
+            ) ENGINE=InnoDB
+            """,
+        ],
+        "sqlite": [
+            """
+            CREATE TABLE IF NOT EXISTS card_sequences (
+                name TEXT PRIMARY KEY,
+                next_value INTEGER NOT NULL
+            )
+            """,
+        ],
+    }),
+    (4, "double-entry ledger", {
+        # EN: postings in integer cents (+ credit, - debit); transaction_id is NULL
+        #     for opening balances. Existing balances are booked as opening postings
+        #     against the 0000000000000000 contra account so the ledger sums to zero.
+        # FA: جدول دفتر کل و ثبت موجودی‌های فعلی به عنوان موجودی اولیه
+        "mysql": [
+            """
+            CREATE TABLE IF NOT EXISTS ledger_entries (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                transaction_id BIGINT NULL,
+                card_number CHAR(16) NOT NULL,
+                amount_minor BIGINT NOT NULL,
+                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                KEY ix_ledger_card (card_number, amount_minor),
+                KEY ix_ledger_transaction (transaction_id)
+            ) ENGINE=InnoDB
+            """,
+            """
+            INSERT INTO ledger_entries (transaction_id, card_number, amount_minor)
+            SELECT NULL, card_number, CAST(ROUND(balance * 100) AS SIGNED) FROM users WHERE balance <> 0
+            """,
+            """
+            INSERT INTO ledger_entries (transaction_id, card_number, amount_minor)
+            SELECT NULL, '0000000000000000', -total FROM (
+                SELECT COALESCE(SUM(amount_minor), 0) AS total FROM ledger_entries
+            ) AS opening WHERE total <> 0
+            """,
+        ],
+        "sqlite": [
+            """
+            CREATE TABLE IF NOT EXISTS ledger_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transaction_id INTEGER NULL,
+                card_number TEXT NOT NULL,
+                amount_minor INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_ledger_card ON ledger_entries (card_number, amount_minor)",
+            "CREATE INDEX IF NOT EXISTS ix_ledger_transaction ON ledger_entries (transaction_id)",
+            """
+            INSERT INTO ledger_entries (transaction_id, card_number, amount_minor)
+            SELECT NULL, card_number, CAST(ROUND(balance * 100) AS INTEGER) FROM users WHERE balance <> 0
+            """,
+            """
+            INSERT INTO ledger_entries (transaction_id, card_number, amount_minor)
+            SELECT NULL, '0000000000000000', -total FROM (
+                SELECT COALESCE(SUM(amount_minor), 0) AS total FROM ledger_entries
+            ) AS opening WHERE total <> 0
+            """,
+        ],
+    }),
+    (5, "hot account balance slots", {
+        # EN: an account's balance is users.balance + SUM(balance_slots.balance)
+        # FA: موجودی حساب پرتراکنش = موجودی اصلی + مجموع زیرحساب‌ها
+        "mysql": [
+            """
+            CREATE TABLE IF NOT EXISTS hot_accounts (
+                card_number CHAR(16) PRIMARY KEY,
+                slots INT NOT NULL
+            ) ENGINE=InnoDB
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS balance_slots (
+                card_number CHAR(16) NOT NULL,
+                slot INT NOT NULL,
+                balance DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
+                PRIMARY KEY (card_number, slot)
+            ) ENGINE=InnoDB
+            """,
+        ],
+        "sqlite": [
+            """
+            CREATE TABLE IF NOT EXISTS hot_accounts (
+                card_number TEXT PRIMARY KEY,
+                slots INTEGER NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS balance_slots (
+                card_number TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                balance NUMERIC NOT NULL DEFAULT 0,
+                PRIMARY KEY (card_number, slot)
+            )
+            """,
+        ],
+    }),
+    (6, "idempotency keys", {
+        # EN: status / response are NULL while the request is in flight;
+        #     expires_at is a unix timestamp
+        # FA: کلیدهای یکتایی درخواست؛ status خالی یعنی درخواست در حال اجراست
+        "mysql": [
+            """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                scope CHAR(16) NOT NULL,
+                idem_key VARCHAR(128) NOT NULL,
+                fingerprint CHAR(64) NOT NULL,
+                status INT NULL,
+                response TEXT NULL,
+                expires_at BIGINT NOT NULL,
+                PRIMARY KEY (scope, idem_key),
+                KEY ix_idempotency_expires (expires_at)
+            ) ENGINE=InnoDB
+            """,
+        ],
+        "sqlite": [
+            """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                scope TEXT NOT NULL,
+                idem_key TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                status INTEGER NULL,
+                response TEXT NULL,
+                expires_at INTEGER NOT NULL,
+                PRIMARY KEY (scope, idem_key)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_idempotency_expires ON idempotency_keys (expires_at)",
+        ],
+    }),
+    (7, "revoked sessions", {
+        # EN: logouts seen by every worker process; expires_at is the token's expiry (unix time)
+        # FA: نشست‌های لغوشده برای اطلاع همه پروسه‌ها
+        "mysql": [
+            """
+            CREATE TABLE IF NOT EXISTS revoked_sessions (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                session_id CHAR(24) NOT NULL,
+                expires_at BIGINT NOT NULL,
+                KEY ix_revoked_sessions_expires (expires_at)
+            ) ENGINE=InnoDB
+            """,
+        ],
+        "sqlite": [
+            """
+            CREATE TABLE IF NOT EXISTS revoked_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                expires_at INTEGER NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_revoked_sessions_expires ON revoked_sessions (expires_at)",
+        ],
+    }),
+    (8, "card permutation secrets", {
+        # EN: random key of each card sequence (hex), generated with its first block;
+        #     NULL for rows created before this migration until their next block
+        # FA: کلید تصادفی جایگشت شماره کارت برای هر دنباله
+        "mysql": [
+            "ALTER TABLE card_sequences ADD COLUMN secret CHAR(64) NULL",
+        ],
+        "sqlite": [
+            "ALTER TABLE card_sequences ADD COLUMN secret TEXT NULL",
+        ],
+    }),
+]
+
+_VERSION_TABLE = {
+    "mysql": """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """,
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+}
+
+
+def current_version(conn, dialect):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(_VERSION_TABLE[dialect])
+        cursor.execute("SELECT MAX(version) FROM schema_migrations")
+        row = cursor.fetchone()
+        return (row[0] if row else None) or 0
+    finally:
+        cursor.close()
+
+
+def migrate(conn, dialect, target=None):
+    """
+    EN: Apply pending migrations in order; returns the list of applied versions.
+        Each version is recorded in schema_migrations right after it runs.
+        (MySQL DDL auto-commits, so a failed version must be fixed by hand.)
+    FA: اجرای مهاجرت‌های باقی‌مانده به ترتیب نسخه.
+    """
+    if dialect not in _VERSION_TABLE:
+        raise ValueError(f"unsupported dialect: {dialect}")
+
+    applied = []
+    cursor = conn.cursor()
+    try:
+        for number, name, statements in MIGRATIONS:
+            if target is not None and number > target:
+                break
+            if dialect == "sqlite":
+                # EN: SQLite DDL is transactional; the write lock also stops two
+                #     processes from applying the same version
+                # FA: اجرای هر نسخه در یک تراکنش
+                cursor.execute("BEGIN IMMEDIATE")
+            if number <= current_version(conn, dialect):
+                conn.commit()
+                continue
+            for statement in statements[dialect]:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (number, name)
+            )
+            conn.commit()
+            applied.append(number)
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        cursor.close()
+    return applied
+
+
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (users|transactions)\b")
+
+
+def _is_full_scan(dialect, plan_row):
+    if dialect == "sqlite":
+        return bool(_SQLITE_FULL_SCAN.match(plan_row.get("detail", "")))
+    return str(plan_row.get("type", "")).upper() == "ALL"
+
+
+def check_query_plans(conn, dialect):
+    """
+    EN: EXPLAIN every hot query and return {name: [offending plan rows]} for
+        queries that fall back to a full table scan (empty dict = all good).
+    FA: بررسی EXPLAIN کوئری‌های پرتکرار و گزارش full scan.
+    """
+    from app.models.AccountModel import hot_queries
+
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    problems = {}
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for name, (sql, params) in hot_queries().items():
+            cursor.execute(prefix + sql, params)
+            bad = [row for row in cursor.fetchall() if _is_full_scan(dialect, row)]
+            if bad:
+                problems[name] = bad
+    finally:
+        cursor.close()
+    return problems
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from app.models.Database import configure_backend, get_backend
+
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--db", choices=("mysql", "sqlite"), default=None)
+    parser.add_argument("--sqlite-path", default="database/bank_app.db")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="fail if a hot query does a full table scan")
+    args = parser.parse_args()
+
+    if args.db == "sqlite":
+        configure_backend("sqlite", path=args.sqlite_path)
+    elif args.db == "mysql":
+        configure_backend("mysql")
+
+    backend = get_backend()
+    connection = backend.connect()
+    try:
+        done = migrate(connection, backend.name)
+        print(f"schema at version {current_version(connection, backend.name)}"
+              f" (applied: {done or 'none'})")
+        if args.check_plans:
+            found = check_query_plans(connection, backend.name)
+            for query, rows in found.items():
+                print(f"FULL SCAN in {query}: {rows}")
+            sys.exit(1 if found else 0)
+    finally:
+        connection.close()
@@ -0,0 +1,124 @@
+# app/models/SessionRevocations.py
+"""
+EN: Logout across worker processes. With stateless sessions every worker
+    accepts any validly signed token, so a logout handled by one worker is
+    recorded in the revoked_sessions table (record_revocation, installed as
+    sessions.on_revoke) and a RevocationFollower in every worker polls that
+    table and forgets the session locally. A logged-out token therefore
+    stops working everywhere within one poll interval. Rows are deleted once
+    the token would have expired anyway.
+FA: لغو نشست در همه پروسه‌ها از طریق جدول revoked_sessions.
+"""
+import threading
+import time
+
+from app.core.Sessions import sessions
+from app.models.Database import get_connection
+
+# EN: poll interval (seconds), rows per poll, how far below the highest seen id
+#     to look again (ids that committed out of order), expired-row purge interval
+# FA: تنظیمات دنبال‌کردن نشست‌های لغوشده
+REVOCATION_CONFIG = dict(
+    poll_interval=0.5,
+    batch=500,
+    id_lag=64,
+    purge_interval=60.0,
+)
+
+SQL_RECORD = "INSERT INTO revoked_sessions (session_id, expires_at) VALUES (%s, %s)"
+SQL_SINCE = "SELECT id, session_id, expires_at FROM revoked_sessions WHERE id > %s ORDER BY id LIMIT %s"
+SQL_PURGE = "DELETE FROM revoked_sessions WHERE expires_at <= %s"
+
+
+def record_revocation(session_id, expires_at):
+    # EN: best effort: the logout already took effect in this process
+    # FA: ثبت لغو نشست برای پروسه‌های دیگر
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_RECORD, (session_id, int(expires_at)))
+        conn.commit()
+        return True
+    except Exception:
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class RevocationFollower:
+    """
+    EN: Background thread that applies the logouts recorded by other processes.
+    FA: اعمال لغو نشست‌های ثبت‌شده در پروسه‌های دیگر.
+    """
+
+    def __init__(self, store=None, interval=None):
+        self.store = store or sessions
+        self.interval = interval or REVOCATION_CONFIG["poll_interval"]
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = 0
+        self._next_purge = 0.0
+        self.stats = {"polls": 0, "revoked": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            # EN: catch up before serving: the table holds every unexpired
+            #     logout, including those from before a worker was (re)spawned
+            # FA: خواندن همه لغوهای معتبر پیش از شروع
+            try:
+                self.poll()
+            except Exception:
+                self.stats["errors"] += 1
+            self._thread = threading.Thread(target=self._run, name="revocation-follower", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                self.stats["errors"] += 1
+            self.stats["polls"] += 1
+
+    def poll(self):
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        now = time.time()
+        try:
+            # EN: forget() ignores ids it already knows, so looking back is cheap
+            # FA: بازبینی شناسه‌های اخیر؛ لغو تکراری نادیده گرفته می‌شود
+            rows, since = [], max(0, self._last - REVOCATION_CONFIG["id_lag"])
+            while True:
+                cursor.execute(SQL_SINCE, (since, REVOCATION_CONFIG["batch"]))
+                page = cursor.fetchall()
+                rows.extend(page)
+                if page:
+                    since = page[-1]["id"]
+                    self._last = max(self._last, since)
+                if len(page) < REVOCATION_CONFIG["batch"]:
+                    break
+            if now >= self._next_purge:
+                # EN: every worker may purge; deleting expired rows twice is harmless
+                # FA: حذف دوره‌ای ردیف‌های منقضی
+                self._next_purge = now + REVOCATION_CONFIG["purge_interval"]
+                cursor.execute(SQL_PURGE, (int(now),))
+                conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+        revoked = 0
+        for row in rows:
+            if self.store.forget(row["session_id"], int(row["expires_at"])):
+                revoked += 1
+        self.stats["revoked"] += revoked
+        return revoked
+
+    def stop(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
@@ -0,0 +1,422 @@
+# app/models/Statement.py
+"""
+EN: Account statements and transaction analytics.
+    A card's ledger postings (joined to transactions for date and
+    counterparty) are loaded as columns: dates, signed amounts in integer
+    cents and counterparties. The running balance, per-period in/out sums
+    and counterparty rankings are then computed over whole columns with
+    NumPy (cumsum, reduceat over date runs, add.at over counterparty
+    codes). The balance comes from the ledger: opening postings plus
+    everything before the range, so it is exact and never mixes with a
+    concurrent users.balance update.
+    bank_summary() does the same for the whole transactions table (volume
+    per period, top senders / receivers).
+    NumPy is optional: without it the same results are computed with a
+    plain per-row loop (also the baseline in benchmarks/bench_statement.py).
+    CLI:  python -m app.models.Statement [--db sqlite] card <card> [--period month]
+          python -m app.models.Statement [--db sqlite] bank [--from 2026-01-01]
+FA: صورت‌حساب و تحلیل تراکنش‌ها به صورت برداری با NumPy (در صورت نصب).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:  # optional: the per-row Python engine is used instead
+    np = None
+
+from app.models.Database import get_connection
+from app.models.Ledger import from_minor, CENT, MINOR_UNITS
+
+# EN: period -> length of the "YYYY-MM-DD HH:MM:SS" prefix that labels it
+# FA: طول پیشوند تاریخ برای هر بازه
+PERIODS = {"day": 10, "month": 7, "year": 4}
+MAX_TOP = 100
+MAX_ROWS = 500
+
+
+class Columns:
+    """
+    EN: Column-oriented rows, ordered by (date, id).
+    FA: داده‌ها به صورت ستونی.
+    """
+
+    __slots__ = ("ids", "dates", "amounts", "parties")
+
+    def __init__(self, ids=None, dates=None, amounts=None, parties=None):
+        self.ids = ids if ids is not None else []
+        self.dates = dates if dates is not None else []
+        self.amounts = amounts if amounts is not None else []
+        self.parties = parties if parties is not None else []
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def _date_text(value):
+    # EN: MySQL returns datetime, SQLite the stored "YYYY-MM-DD HH:MM:SS" text
+    # FA: یکسان‌سازی قالب تاریخ
+    return value if isinstance(value, str) else value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _cents(value):
+    return int(Decimal(str(value if value is not None else "0")).quantize(CENT) * MINOR_UNITS)
+
+
+def _bounds(date_from, date_to):
+    # EN: inclusive "YYYY-MM-DD" days -> [start, end) timestamps; ValueError if malformed
+    # FA: تبدیل بازه تاریخ ورودی به محدوده زمانی
+    start = date.fromisoformat(date_from).isoformat() + " 00:00:00" if date_from else None
+    end = (date.fromisoformat(date_to) + timedelta(days=1)).isoformat() + " 00:00:00" if date_to else None
+    return start, end
+
+
+def _range_sql(column, start, end):
+    sql, params = "", []
+    if start:
+        sql += f" AND {column} >= %s"
+        params.append(start)
+    if end:
+        sql += f" AND {column} < %s"
+        params.append(end)
+    return sql, params
+
+
+def _fetch(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def load_card(card_number, start=None, end=None, batch_size=5000):
+    """
+    EN: (opening balance in cents at `start`, Columns of the card's postings in [start, end)).
+    FA: بارگذاری ردیف‌های دفتر کل یک کارت به صورت ستونی.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        before = " OR t.date < %s" if start else ""
+        cursor.execute(
+            "SELECT COALESCE(SUM(l.amount_minor), 0) FROM ledger_entries l "
+            "LEFT JOIN transactions t ON t.id = l.transaction_id "
+            "WHERE l.card_number=%s AND (l.transaction_id IS NULL" + before + ")",
+            [card_number] + ([start] if start else [])
+        )
+        opening = int(cursor.fetchone()[0] or 0)
+
+        range_sql, range_params = _range_sql("t.date", start, end)
+        cursor.execute(
+            "SELECT t.id, t.date, l.amount_minor, "
+            "CASE WHEN l.amount_minor < 0 THEN t.receiver ELSE t.sender END "
+            "FROM ledger_entries l JOIN transactions t ON t.id = l.transaction_id "
+            "WHERE l.card_number=%s" + range_sql + " ORDER BY t.date, t.id",
+            [card_number] + range_params
+        )
+        cols = Columns()
+        for transaction_id, when, amount_minor, party in _fetch(cursor, batch_size):
+            cols.ids.append(transaction_id)
+            cols.dates.append(_date_text(when))
+            cols.amounts.append(int(amount_minor))
+            cols.parties.append(party)
+        return opening, cols
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def load_transactions(start=None, end=None, batch_size=5000):
+    """
+    EN: Columns of the whole transactions table in [start, end): amounts are
+        positive cents, `parties` holds (sender, receiver) columns as a pair.
+    FA: بارگذاری همه تراکنش‌ها به صورت ستونی.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        range_sql, range_params = _range_sql("date", start, end)
+        cursor.execute(
+            "SELECT id, date, sender, receiver, amount FROM transactions WHERE 1=1" + range_sql +
+            " ORDER BY date, id", range_params
+        )
+        cols = Columns(parties=([], []))
+        senders, receivers = cols.parties
+        for transaction_id, when, sender, receiver, amount in _fetch(cursor, batch_size):
+            cols.ids.append(transaction_id)
+            cols.dates.append(_date_text(when))
+            cols.amounts.append(_cents(amount))
+            senders.append(sender)
+            receivers.append(receiver)
+        return cols
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# EN: engines: both return the same plain-Python structures
+# FA: دو موتور محاسبه با خروجی یکسان
+# ---------------------------------------------------------------------------
+
+def _group_python(keys, values):
+    # EN: {key: [count, sum(values[0]), sum(values[1]), ...]} in first-seen order
+    groups = {}
+    for i, key in enumerate(keys):
+        entry = groups.get(key)
+        if entry is None:
+            entry = groups[key] = [0] * (len(values) + 1)
+        entry[0] += 1
+        for j, column in enumerate(values):
+            entry[j + 1] += column[i]
+    return groups
+
+
+def _card_python(cols, opening, width, rows):
+    balance = opening
+    running = []
+    periods = {}
+    parties = {}
+    for when, amount, party in zip(cols.dates, cols.amounts, cols.parties):
+        balance += amount
+        running.append(balance)
+        credit, debit = (amount, 0) if amount > 0 else (0, -amount)
+        label = when[:width]
+        p = periods.get(label)
+        if p is None:
+            p = periods[label] = [0, 0, 0, 0]
+        p[0] += credit
+        p[1] += debit
+        p[2] += 1
+        p[3] = balance
+        c = parties.get(party)
+        if c is None:
+            c = parties[party] = [0, 0, 0]
+        c[0] += debit
+        c[1] += credit
+        c[2] += 1
+    return {
+        "closing": balance,
+        "periods": [(label, p[0], p[1], p[2], p[3]) for label, p in periods.items()],
+        "parties": [(name, c[0], c[1], c[2]) for name, c in parties.items()],
+        "running": running[-rows:] if rows else [],
+    }
+
+
+def _group_runs(sorted_keys, values):
+    # EN: keys already sorted: every group is one contiguous run; int64 sums stay exact
+    # FA: کلیدهای مرتب؛ هر گروه یک بلوک پیوسته است
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    counts = np.diff(np.r_[starts, sorted_keys.size])
+    return sorted_keys[starts].tolist(), counts, [np.add.reduceat(v, starts) for v in values]
+
+
+def _group_codes(keys, values):
+    # EN: unsorted keys (card numbers): one dict pass assigns integer codes, the
+    #     sums are then scattered with add.at (much cheaper than sorting strings)
+    # FA: کدگذاری کلیدها با یک دیکشنری و جمع برداری با add.at
+    index = {}
+    codes = np.fromiter((index.setdefault(k, len(index)) for k in keys), dtype=np.intp, count=len(keys))
+    counts = np.bincount(codes, minlength=len(index))
+    sums = []
+    for v in values:
+        total = np.zeros(len(index), dtype=np.int64)
+        np.add.at(total, codes, v)
+        sums.append(total)
+    return list(index), counts, sums
+
+
+def _card_numpy(cols, opening, width, rows):
+    amounts = np.asarray(cols.amounts, dtype=np.int64)
+    running = opening + np.cumsum(amounts)
+    credits = np.where(amounts > 0, amounts, 0)
+    debits = np.where(amounts < 0, -amounts, 0)
+
+    # EN: dates are sorted, so truncated labels are too: periods are contiguous runs
+    # FA: تاریخ‌ها مرتب هستند؛ هر بازه یک بلوک پیوسته است
+    labels = np.asarray(cols.dates, dtype="U19").astype(f"U{width}")
+    keys, counts, (ins, outs) = _group_runs(labels, (credits, debits))
+    closings = running[np.cumsum(counts) - 1]
+
+    names, party_counts, (sent, received) = _group_codes(cols.parties, (debits, credits))
+    return {
+        "closing": int(running[-1]),
+        "periods": list(zip(keys, ins.tolist(), outs.tolist(), counts.tolist(), closings.tolist())),
+        "parties": list(zip(names, sent.tolist(), received.tolist(), party_counts.tolist())),
+        "running": running[-rows:].tolist() if rows else [],
+    }
+
+
+def _bank_python(cols, width):
+    senders, receivers = cols.parties
+    labels = [when[:width] for when in cols.dates]
+    periods = _group_python(labels, (cols.amounts,))
+    sent = _group_python(senders, (cols.amounts,))
+    received = _group_python(receivers, (cols.amounts,))
+    return {
+        "periods": [(label, g[0], g[1]) for label, g in periods.items()],
+        "senders": [(name, g[0], g[1]) for name, g in sent.items()],
+        "receivers": [(name, g[0], g[1]) for name, g in received.items()],
+    }
+
+
+def _bank_numpy(cols, width):
+    amounts = np.asarray(cols.amounts, dtype=np.int64)
+    labels = np.asarray(cols.dates, dtype="U19").astype(f"U{width}")
+    out = {}
+    keys, counts, (volume,) = _group_runs(labels, (amounts,))
+    out["periods"] = list(zip(keys, counts.tolist(), volume.tolist()))
+    for name, column in (("senders", cols.parties[0]), ("receivers", cols.parties[1])):
+        keys, counts, (volume,) = _group_codes(column, (amounts,))
+        out[name] = list(zip(keys, counts.tolist(), volume.tolist()))
+    return out
+
+
+def _engine(name):
+    if name == "numpy" or (name == "auto" and np is not None):
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        return "numpy"
+    return "python"
+
+
+def _top(entries, volume, top):
+    # EN: highest volume first, ties by card number (same order for both engines)
+    return sorted(entries, key=lambda e: (-volume(e), e[0]))[:top]
+
+
+def _options(date_from, date_to, period, top):
+    if period not in PERIODS:
+        return None, f"period must be one of: {', '.join(PERIODS)}."
+    try:
+        start, end = _bounds(date_from, date_to)
+    except ValueError:
+        return None, "Dates must be YYYY-MM-DD."
+    try:
+        top = max(0, min(int(top), MAX_TOP))
+    except (TypeError, ValueError):
+        return None, "top must be a number."
+    return (start, end, PERIODS[period], top), None
+
+
+def card_statement(card_number, date_from=None, date_to=None, period="month", top=10, rows=0,
+                   engine="auto"):
+    """
+    EN: Statement of one card between two inclusive YYYY-MM-DD days: opening
+        and closing balance, in/out/net, per-period totals with the closing
+        balance of each period, top counterparties by volume and (rows > 0)
+        the last `rows` postings with their running balance.
+    FA: صورت‌حساب یک کارت با موجودی جاری، جمع دوره‌ای و طرف‌های پرتکرار.
+    """
+    options, error = _options(date_from, date_to, period, top)
+    if error:
+        return {"success": False, "message": error}
+    start, end, width, top = options
+    try:
+        rows = max(0, min(int(rows or 0), MAX_ROWS))
+    except (TypeError, ValueError):
+        return {"success": False, "message": "rows must be a number."}
+
+    opening, cols = load_card(card_number, start, end)
+    engine = _engine(engine) if len(cols) else "python"
+    result = (_card_numpy if engine == "numpy" else _card_python)(cols, opening, width, rows)
+
+    total_in = sum(p[1] for p in result["periods"])
+    total_out = sum(p[2] for p in result["periods"])
+    tail = len(result["running"])
+    return {
+        "success": True,
+        "card_number": card_number,
+        "from": date_from,
+        "to": date_to,
+        "period": period,
+        "engine": engine,
+        "count": len(cols),
+        "opening_balance": from_minor(opening),
+        "closing_balance": from_minor(result["closing"]),
+        "in": from_minor(total_in),
+        "out": from_minor(total_out),
+        "net": from_minor(total_in - total_out),
+        "periods": [
+            {"period": label, "in": from_minor(i), "out": from_minor(o), "net": from_minor(i - o),
+             "count": n, "closing_balance": from_minor(closing)}
+            for label, i, o, n, closing in result["periods"]
+        ],
+        "top_counterparties": [
+            {"card_number": name, "sent": from_minor(s), "received": from_minor(r),
+             "volume": from_minor(s + r), "count": n}
+            for name, s, r, n in _top(result["parties"], lambda e: e[1] + e[2], top)
+        ],
+        "transactions": [
+            {"id": cols.ids[i], "date": cols.dates[i], "counterparty": cols.parties[i],
+             "amount": from_minor(cols.amounts[i]), "balance": from_minor(balance)}
+            for i, balance in zip(range(len(cols) - tail, len(cols)), result["running"])
+        ],
+    }
+
+
+def bank_summary(date_from=None, date_to=None, period="month", top=10, engine="auto"):
+    """
+    EN: Volume and count per period over all transfers, plus the top senders
+        and receivers by amount.
+    FA: آمار کل تراکنش‌ها در هر بازه و بیشترین ارسال‌کننده/دریافت‌کننده‌ها.
+    """
+    options, error = _options(date_from, date_to, period, top)
+    if error:
+        return {"success": False, "message": error}
+    start, end, width, top = options
+
+    cols = load_transactions(start, end)
+    engine = _engine(engine) if len(cols) else "python"
+    result = (_bank_numpy if engine == "numpy" else _bank_python)(cols, width)
+
+    def ranked(entries):
+        return [{"card_number": name, "count": n, "amount": from_minor(v)}
+                for name, n, v in _top(entries, lambda e: e[2], top)]
+
+    return {
+        "success": True,
+        "from": date_from,
+        "to": date_to,
+        "period": period,
+        "engine": engine,
+        "count": len(cols),
+        "volume": from_minor(sum(cols.amounts)),
+        "periods": [{"period": label, "count": n, "volume": from_minor(v)} for label, n, v in result["periods"]],
+        "top_senders": ranked(result["senders"]),
+        "top_receivers": ranked(result["receivers"]),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from app.models.Database import configure_backend
+
+    parser = argparse.ArgumentParser(description="Account statements and transaction analytics")
+    parser.add_argument("--db", choices=("mysql", "sqlite"), default=None)
+    parser.add_argument("--sqlite-path", default="database/bank_app.db")
+    parser.add_argument("--from", dest="date_from", default=None, help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", default=None, help="last day, YYYY-MM-DD")
+    parser.add_argument("--period", choices=tuple(PERIODS), default="month")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=0, help="last N postings with running balance")
+    parser.add_argument("--engine", choices=("auto", "numpy", "python"), default="auto")
+    parser.add_argument("scope", choices=("card", "bank"))
+    parser.add_argument("card", nargs="?")
+    args = parser.parse_args()
+
+    if args.db == "sqlite":
+        configure_backend("sqlite", path=args.sqlite_path)
+    elif args.db == "mysql":
+        configure_backend("mysql")
+
+    if args.scope == "card":
+        if not args.card:
+            parser.error("card needs a card number")
+        result = card_statement(args.card, args.date_from, args.date_to, args.period, args.top, args.rows,
+                                args.engine)
+    else:
+        result = bank_summary(args.date_from, args.date_to, args.period, args.top, args.engine)
+    print(json.dumps(result, indent=2, default=str))
@@ -0,0 +1,214 @@
+# app/models/Storage.py
+import os
+import re
+import sqlite3
+import threading
+from decimal import Decimal
+from functools import lru_cache
+
+# EN: SQLite has no DECIMAL type; bind Decimal as its exact text form
+# FA: ذخیره Decimal به صورت متن دقیق در SQLite
+sqlite3.register_adapter(Decimal, str)
+
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.IGNORECASE)
+
+@lru_cache(maxsize=512)
+def translate_sql(sql):
+    """
+    EN: Rewrite MySQL-flavoured SQL used by the models for SQLite:
+        %s placeholders -> ?, and drop FOR UPDATE (BEGIN IMMEDIATE already
+        holds the write lock). Cached so the same text is produced every
+        time, which lets sqlite3's per-connection statement cache reuse the
+        prepared statement.
+    FA: تبدیل SQL مخصوص MySQL به SQLite (placeholder و حذف FOR UPDATE).
+    """
+    return _FOR_UPDATE.sub("", sql).replace("%s", "?")
+
+
+def _dict_row(cursor, row):
+    return {d[0]: v for d, v in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """
+    EN: Cursor wrapper exposing the subset of the mysql.connector cursor API
+        the models rely on (dictionary rows, %s placeholders).
+    FA: cursor سازگار با API مورد استفاده مدل‌ها.
+    """
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        if dictionary:
+            self._cursor.row_factory = _dict_row
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(translate_sql(sql), tuple(params or ()))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(translate_sql(sql), seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    EN: sqlite3 connection in autocommit mode; write transactions are opened
+        explicitly with begin_write() -> BEGIN IMMEDIATE.
+    FA: اتصال SQLite؛ تراکنش نوشتن با BEGIN IMMEDIATE شروع می‌شود.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._closed = False
+
+    def cursor(self, dictionary=False, **_ignored):
+        return SQLiteCursor(self._conn.cursor(), dictionary=dictionary)
+
+    def execute(self, sql, params=()):
+        return self._conn.execute(translate_sql(sql), tuple(params or ()))
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def begin(self, immediate=True):
+        self._conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return not self._closed
+
+    def close(self):
+        self._closed = True
+        self._conn.close()
+
+
+class SQLiteBackend:
+    """
+    EN: Embedded, zero-network storage. WAL mode lets readers run alongside
+        the single writer; transfers take the write lock up front with
+        BEGIN IMMEDIATE so they never fail on lock upgrade.
+        `path` must be a file: every pooled connection opens it on its own,
+        and ":memory:" (or "") would give each one a private, empty database.
+    FA: ذخیره‌سازی محلی SQLite با حالت WAL (فقط فایل؛ دیتابیس حافظه‌ای پشتیبانی نمی‌شود).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path="database/bank_app.db", busy_timeout=5.0, statement_cache=256):
+        if path in ("", ":memory:"):
+            raise ValueError("SQLite needs a database file shared by all pooled connections, "
+                             "not an in-memory database; use a temporary file instead")
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.statement_cache = statement_cache
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def connect(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        raw = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+        )
+        raw.execute("PRAGMA journal_mode=WAL")
+        raw.execute("PRAGMA synchronous=NORMAL")
+        conn = SQLiteConnection(raw)
+        self._ensure_schema(raw)
+        return conn
+
+    def _ensure_schema(self, raw):
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            # EN: bring the file up to the latest schema version on first connect
+            # FA: اجرای مهاجرت‌ها در اولین اتصال
+            from app.models.Migrations import migrate
+            migrate(SQLiteConnection(raw), self.name)
+            self._schema_ready = True
+
+    def ping(self, conn):
+        conn.execute("SELECT 1")
+        return True
+
+    def begin_write(self, conn):
+        conn.begin(immediate=True)
+
+
+class MySQLBackend:
+    """
+    EN: MySQL via mysql.connector (imported lazily so SQLite deployments do
+        not need the driver). InnoDB opens the transaction implicitly and
+        rows are locked with SELECT ... FOR UPDATE.
+    FA: اتصال MySQL؛ درایور فقط در صورت نیاز import می‌شود.
+    """
+
+    name = "mysql"
+
+    def __init__(self, host="localhost", user="root", password="", database="bank_app", **extra):
+        self.config = dict(host=host, user=user, password=password, database=database, **extra)
+
+    def connect(self, **overrides):
+        import mysql.connector
+        return mysql.connector.connect(**dict(self.config, **overrides))
+
+    def ping(self, conn):
+        conn.ping(reconnect=False)
+        return True
+
+    def begin_write(self, conn):
+        # EN: autocommit is off, the first statement starts the transaction
+        # FA: تراکنش با اولین دستور به صورت خودکار شروع می‌شود
+        pass
+
+
+BACKENDS = {
+    "mysql": MySQLBackend,
+    "sqlite": SQLiteBackend,
+}
+
+
+def create_backend(name, **options):
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown storage backend: {name}")
+    return backend_cls(**options)
@@ -0,0 +1,104 @@
+# app/models/TransferEngine.py
+import random
+import sqlite3
+import threading
+import time
+
+# EN: MySQL / InnoDB error numbers that mean "try the whole transaction again"
+# FA: کدهای خطای MySQL که با تکرار تراکنش برطرف می‌شوند
+MYSQL_DEADLOCK = 1213
+MYSQL_LOCK_WAIT_TIMEOUT = 1205
+
+# EN: Retry policy defaults (attempts include the first try)
+# FA: تنظیمات پیش‌فرض تلاش مجدد
+RETRY_CONFIG = dict(
+    max_attempts=5,
+    base_delay=0.005,
+    max_delay=0.25
+)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "transactions": 0,
+    "attempts": 0,
+    "retries": 0,
+    "deadlocks": 0,
+    "lock_timeouts": 0,
+    "exhausted": 0,
+}
+
+
+class RetryExhausted(Exception):
+    """
+    EN: Transaction kept failing with a retryable lock error.
+    FA: تراکنش پس از چند تلاش به دلیل قفل همچنان ناموفق بود.
+    """
+
+
+def classify_error(exc):
+    """
+    EN: Return "deadlock", "lock_timeout" or None for a DB exception.
+    FA: تشخیص نوع خطای قفل دیتابیس.
+    """
+    errno = getattr(exc, "errno", None)
+    if errno == MYSQL_DEADLOCK:
+        return "deadlock"
+    if errno == MYSQL_LOCK_WAIT_TIMEOUT:
+        return "lock_timeout"
+    if isinstance(exc, sqlite3.OperationalError):
+        message = str(exc).lower()
+        if "deadlock" in message:
+            return "deadlock"
+        if "locked" in message or "busy" in message:
+            return "lock_timeout"
+    return None
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def run_with_retry(fn, max_attempts=None, base_delay=None, max_delay=None):
+    """
+    EN: Call fn() and retry it on deadlock / lock-timeout errors with
+        full-jitter exponential backoff. fn must be a complete transaction
+        (it rolls back on error), so re-running it is safe.
+    FA: اجرای تراکنش با تلاش مجدد و تاخیر تصادفی در صورت deadlock.
+    """
+    max_attempts = max_attempts or RETRY_CONFIG["max_attempts"]
+    base_delay = RETRY_CONFIG["base_delay"] if base_delay is None else base_delay
+    max_delay = RETRY_CONFIG["max_delay"] if max_delay is None else max_delay
+
+    _count(transactions=1)
+    attempt = 0
+    while True:
+        attempt += 1
+        _count(attempts=1)
+        try:
+            return fn()
+        except Exception as e:
+            kind = classify_error(e)
+            if kind is None:
+                raise
+            _count(deadlocks=kind == "deadlock", lock_timeouts=kind == "lock_timeout")
+            if attempt >= max_attempts:
+                _count(exhausted=1)
+                raise RetryExhausted(f"{kind} persisted after {attempt} attempts") from e
+            _count(retries=1)
+            time.sleep(random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1)))))
+
+
+def lock_order(*cards):
+    """
+    EN: Canonical lock order: every transaction locks rows by ascending card
+        number, so two transfers can never wait on each other in a cycle.
+    FA: ترتیب ثابت قفل (صعودی بر اساس شماره کارت) برای جلوگیری از deadlock.
+    """
+    return sorted(set(cards))
+
+
+def retry_stats():
+    with _stats_lock:
+        return dict(_stats)
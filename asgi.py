@@ -0,0 +1,20 @@
+# asgi.py
+"""
+EN: ASGI entry point, e.g.  uvicorn asgi:application --workers 4
+    Options come from BANK_ARGS as for wsgi.py. Request handlers and their
+    DB calls run on a thread executor of --workers threads per process.
+    Services start in the lifespan startup event, or on the first request
+    if the server does not send lifespan events.
+FA: نقطه ورود ASGI (مثل uvicorn).
+"""
+import os
+import shlex
+
+import server
+
+args = server.parse_args(shlex.split(os.environ.get("BANK_ARGS", "")))
+server.apply_settings(args)
+server.share_between_processes()
+server.preload()
+
+application = server.asgi_app(args.workers)
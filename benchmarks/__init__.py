@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+"""
+EN: Offline benchmarks and load tools; every script runs against a throwaway
+    SQLite database, so no MySQL server is needed.
+FA: ابزارهای بنچمارک و تست بار (روی SQLite موقت).
+"""
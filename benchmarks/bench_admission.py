@@ -0,0 +1,169 @@
+# benchmarks/bench_admission.py
+"""
+EN: Admission control: cost per request and behaviour under overload.
+    1. overhead: admit() + release() for an API call with IP and card
+       buckets, over many distinct keys, from 1 and from --threads threads
+       (microseconds per request).
+    2. overload: server.py (--mode, default async) with --workers threads
+       and --clients keep-alive clients, each with its own address
+       (X-Forwarded-For with --trust-forwarded-for) sending --rate
+       requests per second. Half the clients read history
+       (/transactions), half send transfers; together they offer more
+       than the server can serve. Every client logs in as its own card
+       before the clock starts. Runs once with admission off and once
+       with it on, reporting per endpoint the served requests, 503/429
+       rejections and p50/p99 latency of the served ones. With admission
+       on, history reads are shed first so transfers keep their latency.
+    Usage: python benchmarks/bench_admission.py --clients 128 --rate 20 --workers 2 --duration 10
+FA: هزینه کنترل پذیرش برای هر درخواست و رفتار سرور هنگام بار بیش از ظرفیت.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.Admission import AdmissionController
+from benchmarks.loadgen import seed_database, start_server, percentile, _free_port, login, own_card
+
+
+def overhead(calls, threads, keys):
+    controller = AdmissionController(capacity=1 << 30)
+    for bucket in controller.buckets.values():
+        bucket.rate = bucket.burst = float(1 << 30)
+    ips = [f"10.0.{i >> 8 & 255}.{i & 255}" for i in range(keys)]
+    cards = [f"58598311{i:08d}" for i in range(keys)]
+
+    def work(offset):
+        for i in range(offset, offset + calls):
+            if controller.admit("/balance", ips[i % keys], cards[i % keys]) is None:
+                controller.release()
+
+    out = {}
+    for n in (1, threads):
+        pool = [threading.Thread(target=work, args=(i * 7919,)) for i in range(n)]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        out[f"us_per_request_{n}_threads"] = round((time.perf_counter() - start) / (calls * n) * 1e6, 3)
+    return out
+
+
+def _address(client_id):
+    return {"X-Forwarded-For": f"10.1.{client_id >> 8}.{client_id & 255}"}
+
+
+def _login(port, cards, client_id, tokens):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        tokens[client_id] = login(conn, own_card(cards, client_id), _address(client_id))
+    finally:
+        conn.close()
+
+
+def _client(port, cards, client_id, token, path, rate, stop_at, samples, lock):
+    rng = random.Random(client_id)
+    headers = dict(_address(client_id), **{"Content-Type": "application/json", "Authorization": f"Bearer {token}"})
+    sender = own_card(cards, client_id)
+    served, codes = [], {}
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    next_at = time.monotonic() + rng.random() / rate
+    while True:
+        # EN: open-loop pacing: requests are due every 1/rate seconds whether or not the server keeps up
+        # FA: ارسال با نرخ ثابت، مستقل از سرعت پاسخ سرور
+        now = time.monotonic()
+        if next_at >= stop_at:
+            break
+        if next_at > now:
+            time.sleep(next_at - now)
+        next_at += 1.0 / rate
+        if path == "/transfer":
+            receiver = rng.choice(cards)
+            while receiver == sender:
+                receiver = rng.choice(cards)
+            body = {"receiver": receiver, "amount": 0.01}
+        else:
+            body = {"page_size": 50}
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body=json.dumps(body), headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            codes["error"] = codes.get("error", 0) + 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        codes[response.status] = codes.get(response.status, 0) + 1
+        if response.status not in (429, 503):
+            served.append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        samples[path]["served"].extend(served)
+        for code, n in codes.items():
+            samples[path]["codes"][code] = samples[path]["codes"].get(code, 0) + n
+
+
+def overload(admission, mode, clients, rate, workers, duration, accounts):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bank-admission-"), "load.db")
+    cards = seed_database(db_path, accounts)
+    port = _free_port()
+    proc = start_server(db_path, mode, workers, port, ["--trust-forwarded-for"], admission)
+    samples = {p: {"served": [], "codes": {}} for p in ("/transactions", "/transfer")}
+    lock = threading.Lock()
+    try:
+        tokens = [None] * clients
+        logins = [threading.Thread(target=_login, args=(port, cards, i, tokens)) for i in range(clients)]
+        for t in logins:
+            t.start()
+        for t in logins:
+            t.join()
+        stop_at = time.monotonic() + duration
+        pool = [threading.Thread(target=_client, args=(port, cards, i, tokens[i],
+                                                       "/transfer" if i % 2 else "/transactions",
+                                                       rate, stop_at, samples, lock))
+                for i in range(clients)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+    report = {}
+    for path, sample in samples.items():
+        served = sorted(sample["served"])
+        report[path] = {
+            "served_per_sec": round(len(served) / duration, 1),
+            "responses": {str(k): v for k, v in sorted(sample["codes"].items(), key=str)},
+            "p50_ms": round(percentile(served, 50) * 1000, 2) if served else None,
+            "p99_ms": round(percentile(served, 99) * 1000, 2) if served else None,
+        }
+    return {"admission": admission, "endpoints": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200000, help="admit() calls per thread")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--mode", choices=("threaded", "async"), default="async")
+    parser.add_argument("--clients", type=int, default=128)
+    parser.add_argument("--rate", type=float, default=20.0, help="requests per second per client")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--accounts", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps({
+        "overhead": overhead(args.calls, args.threads, args.keys),
+        "overload": [overload(on, args.mode, args.clients, args.rate, args.workers, args.duration, args.accounts)
+                     for on in (False, True)],
+    }, indent=2))
@@ -0,0 +1,87 @@
+# benchmarks/bench_batch_transfer.py
+"""
+EN: Compare looped transfer_money() calls with a single transfer_many() batch
+    on the embedded SQLite backend.
+    Usage: python benchmarks/bench_batch_transfer.py --accounts 1000 --transfers 10000
+FA: مقایسه انتقال تکی در حلقه با انتقال گروهی.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.Database import configure_backend, get_connection
+from app.models.AccountModel import transfer_money, transfer_many
+from app.models.Ledger import post_openings
+from app.models.Credentials import hash_pin
+
+
+def seed_accounts(count, balance="1000000.00", pin="0000"):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cards = [f"58598311{i:08d}" for i in range(count)]
+    # one hash shared by every seeded account: hashing is the slow part of seeding
+    pin_hash = hash_pin(pin)
+    try:
+        cursor.executemany(
+            "INSERT INTO users (first_name, last_name, phone, address, id_card, card_number, pin, balance) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            [("Bench", str(i), f"09{i:09d}", "", f"{i:010d}", card, pin_hash, balance)
+             for i, card in enumerate(cards)]
+        )
+        post_openings(cursor, [(card, balance) for card in cards])
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return cards
+
+
+def make_transfers(cards, count, rng):
+    out = []
+    for _ in range(count):
+        sender, receiver = rng.sample(cards, 2)
+        out.append({"sender": sender, "receiver": receiver, "amount": f"{rng.randint(1, 5000) / 100:.2f}"})
+    return out
+
+
+def run(accounts, transfers, seed):
+    rng = random.Random(seed)
+    workdir = tempfile.mkdtemp(prefix="bank-bench-")
+    results = {}
+
+    for label in ("looped", "batch"):
+        configure_backend("sqlite", path=os.path.join(workdir, f"{label}.db"))
+        cards = seed_accounts(accounts)
+        batch = make_transfers(cards, transfers, rng)
+
+        start = time.perf_counter()
+        if label == "looped":
+            ok = sum(1 for t in batch if transfer_money(t["sender"], t["receiver"], t["amount"])["success"])
+        else:
+            ok = sum(1 for r in transfer_many(batch) if r["success"])
+        elapsed = time.perf_counter() - start
+
+        results[label] = {
+            "transfers": transfers,
+            "succeeded": ok,
+            "seconds": round(elapsed, 4),
+            "transfers_per_sec": round(transfers / elapsed, 1) if elapsed else None,
+        }
+
+    results["speedup"] = round(results["looped"]["seconds"] / results["batch"]["seconds"], 2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--transfers", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(run(args.accounts, args.transfers, args.seed), indent=2))
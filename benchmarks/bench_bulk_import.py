@@ -0,0 +1,84 @@
+# benchmarks/bench_bulk_import.py
+"""
+EN: Bulk import / export throughput on the embedded SQLite backend.
+    Generates --rows synthetic customers as an NDJSON (or CSV) stream, never
+    materialized as a whole, imports them, then streams the export back out.
+    By default every row carries the same precomputed PIN hash, so the
+    numbers measure parsing, validation, dedupe and batched inserts; with
+    --hash-pins each row gets a plain PIN that is scrypt-hashed during the
+    import (expect that to dominate: roughly 15-20 rows/sec per core).
+    Reports rows/sec for both directions and the process's peak RSS.
+    Usage: python benchmarks/bench_bulk_import.py --rows 200000 --batch-size 1000
+FA: سنجش سرعت ورود و خروج گروهی حساب‌ها.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.Database import configure_backend
+from app.models.BulkAccounts import import_accounts, export_accounts, read_records, IMPORT_FIELDS
+from app.models.Credentials import credentials, hash_pin
+
+
+def generate(rows, fmt, pin, duplicate_every=0):
+    # one line at a time; every `duplicate_every`-th row repeats an earlier phone
+    if fmt == "csv":
+        yield ",".join(IMPORT_FIELDS) + "\n"
+    for i in range(rows):
+        phone = f"09{(i - 1 if duplicate_every and i and i % duplicate_every == 0 else i):09d}"
+        record = {"first_name": "Bulk", "last_name": str(i), "phone": phone, "address": "",
+                  "id_card": f"{i:010d}", "pin": pin, "balance": "10.00"}
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerow([record[f] for f in IMPORT_FIELDS])
+            yield buffer.getvalue()
+        else:
+            yield json.dumps(record) + "\n"
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+
+
+def run(rows, batch_size, fmt, hash_pins, duplicate_every):
+    configure_backend("sqlite", path=os.path.join(tempfile.mkdtemp(prefix="bank-bulk-"), "bulk.db"))
+    pin = "1234" if hash_pins else hash_pin("1234")
+    imported = import_accounts(read_records(generate(rows, fmt, pin, duplicate_every), fmt), batch_size)
+    rss_after_import = peak_rss_mb()
+
+    counter = {"rows": 0}
+    start = time.perf_counter()
+    size = 0
+    for chunk in export_accounts(fmt, batch_size, counter):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    credentials.shutdown()
+    imported.pop("errors")
+    return {
+        "format": fmt,
+        "batch_size": batch_size,
+        "import": imported,
+        "export": {"rows": counter["rows"], "bytes": size, "seconds": round(elapsed, 3),
+                   "rows_per_sec": round(counter["rows"] / elapsed, 1) if elapsed else 0.0},
+        "peak_rss_mb_after_import": rss_after_import,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="ndjson")
+    parser.add_argument("--hash-pins", action="store_true", help="scrypt-hash every row's PIN during import")
+    parser.add_argument("--duplicate-every", type=int, default=100, help="0 disables duplicate rows")
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.batch_size, args.format, args.hash_pins, args.duplicate_every), indent=2))
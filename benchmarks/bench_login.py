@@ -0,0 +1,100 @@
+# benchmarks/bench_login.py
+"""
+EN: Login throughput with scrypt PIN hashes, with and without the
+    verification cache. Threads log in to random cards out of --cards seeded
+    accounts; verification runs in the credential process pool (--workers).
+    Reports logins/sec, p50/p99 latency and the cache hit count.
+    Usage: python benchmarks/bench_login.py --threads 8 --logins 100 --cards 50
+FA: مقایسه توان ورود با و بدون کش بررسی پین.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.Database import configure_backend, configure_pool
+from app.models.AccountModel import login_user
+from app.models.AccountCache import account_cache
+from app.models.Credentials import credentials
+from benchmarks.bench_batch_transfer import seed_accounts
+from benchmarks.loadgen import percentile, SEED_PIN
+
+
+def run_once(cards, threads, logins, cache_ttl):
+    credentials.cache_ttl = cache_ttl
+    credentials.clear_cache()
+    before = credentials.stats()
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local, failed = [], 0
+        for _ in range(logins):
+            start = time.perf_counter()
+            user = login_user(rng.choice(cards), SEED_PIN)
+            local.append(time.perf_counter() - start)
+            failed += user is None
+        with lock:
+            latencies.extend(local)
+            failures.append(failed)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    after = credentials.stats()
+    return {
+        "cache_ttl": cache_ttl,
+        "logins": threads * logins,
+        "failed": sum(failures),
+        "logins_per_sec": round(threads * logins / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "cache_hits": after["cache_hits"] - before["cache_hits"],
+    }
+
+
+def run(threads, logins, cards, workers, cache_ttl):
+    configure_backend("sqlite", path=os.path.join(tempfile.mkdtemp(prefix="bank-login-"), "login.db"))
+    configure_pool(max_size=threads + 2)
+    seeded = seed_accounts(cards, pin=SEED_PIN)
+    credentials.workers = workers
+    # warm the account cache and the worker processes outside the timed runs
+    for card in seeded:
+        account_cache.invalidate(card)
+    login_user(seeded[0], SEED_PIN)
+    try:
+        return {
+            "threads": threads,
+            "cards": cards,
+            "workers": workers,
+            "uncached": run_once(seeded, threads, logins, 0),
+            "cached": run_once(seeded, threads, logins, cache_ttl),
+        }
+    finally:
+        credentials.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=100, help="logins per thread")
+    parser.add_argument("--cards", type=int, default=50, help="distinct accounts logged in to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="hashing processes")
+    parser.add_argument("--cache-ttl", type=float, default=60.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.threads, args.logins, args.cards, args.workers, args.cache_ttl), indent=2))
@@ -0,0 +1,121 @@
+# benchmarks/bench_prefork.py
+"""
+EN: Stdlib threaded server vs. pre-forked WSGI workers on the same machine.
+    Every run gets a freshly seeded SQLite database and the same request mix
+    (benchmarks.loadgen), against:
+        threaded           one process, --workers threads
+        prefork-N          N worker processes x --threads threads, preloaded
+                           and gc.freeze()d before fork (copy-on-write)
+        prefork-N-cold     the same without preloading (--no-preload)
+    Reports throughput and p50/p99 per run, plus the memory of the whole
+    server process tree before and after the load (Linux: summed RSS, PSS
+    and private bytes from /proc/<pid>/smaps_rollup). PSS divides shared
+    pages between the processes sharing them, so "pss_mb" is the real
+    footprint and "rss_mb - pss_mb" is what copy-on-write sharing saved.
+    Note: on SQLite all workers share one database file and writers are
+    serialized by its lock; the gain shows on read-heavy mixes and on CPU
+    (JSON, routing, PIN hashing) rather than on transfers.
+    Usage: python benchmarks/bench_prefork.py --processes 4 --clients 64 --duration 10
+FA: مقایسه سرور چند-threadی با پروسه‌های از پیش fork شده (توان، تاخیر و حافظه).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadgen import DEFAULT_MIX, parse_mix, seed_database, start_server, run_load, _free_port
+
+MIX = "login=10,balance=40,transactions=30,transfer=15,register=5"
+
+
+def _children(pid):
+    out = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                out.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return out
+
+
+def tree_memory(pid):
+    # EN: RSS / PSS / private memory summed over pid and all its descendants (None off Linux)
+    # FA: مجموع حافظه پروسه و فرزندان آن
+    totals = {"processes": 0, "rss_mb": 0.0, "pss_mb": 0.0, "private_mb": 0.0}
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/smaps_rollup") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line and not line.startswith(" "))
+        except OSError:
+            continue
+        kb = {name: int(value.split()[0]) for name, value in fields.items() if value.strip().endswith("kB")}
+        totals["processes"] += 1
+        totals["rss_mb"] += kb.get("Rss", 0) / 1024
+        totals["pss_mb"] += kb.get("Pss", 0) / 1024
+        totals["private_mb"] += (kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)) / 1024
+        stack.extend(_children(current))
+    if not totals["processes"]:
+        return None
+    return {name: round(value, 1) if isinstance(value, float) else value for name, value in totals.items()}
+
+
+def run_once(label, mode, workers, extra, mix, accounts, clients, duration):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bank-prefork-"), f"{label}.db")
+    cards = seed_database(db_path, accounts)
+    port = _free_port()
+    proc = start_server(db_path, mode, workers, port, extra)
+    try:
+        # EN: let every worker finish starting (process pools, follower threads)
+        # FA: صبر برای آماده شدن همه پروسه‌ها
+        time.sleep(1.0)
+        idle = tree_memory(proc.pid)
+        report = run_load("127.0.0.1", port, cards, mix, clients, duration, None)
+        memory = tree_memory(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+    p99 = max((e["p99_ms"] or 0) for e in report["endpoints"].values())
+    errors = sum(e["errors"] for e in report["endpoints"].values())
+    return {
+        "run": label,
+        "requests": report["total_requests"],
+        "errors": errors,
+        "throughput_rps": report["throughput_rps"],
+        "p50_ms": {name: e["p50_ms"] for name, e in report["endpoints"].items()},
+        "worst_p99_ms": p99,
+        "memory_idle": idle,
+        "memory": memory,
+    }
+
+
+def run(processes, threads, workers, mix, accounts, clients, duration, cold):
+    results = [run_once("threaded", "threaded", workers, [], mix, accounts, clients, duration)]
+    prefork = ["--processes", str(processes)]
+    results.append(run_once(f"prefork-{processes}", "prefork", threads, prefork,
+                            mix, accounts, clients, duration))
+    if cold:
+        results.append(run_once(f"prefork-{processes}-cold", "prefork", threads, prefork + ["--no-preload"],
+                                mix, accounts, clients, duration))
+    return {"cpus": os.cpu_count(), "clients": clients, "duration": duration, "mix": mix, "runs": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--threads", type=int, default=8, help="threads per prefork worker")
+    parser.add_argument("--workers", type=int, default=16, help="threads of the threaded server")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--mix", default=MIX, help=f"request mix (loadgen default: {DEFAULT_MIX})")
+    parser.add_argument("--no-cold", action="store_true", help="skip the run without preloading")
+    args = parser.parse_args()
+    print(json.dumps(run(args.processes, args.threads, args.workers, parse_mix(args.mix), args.accounts,
+                         args.clients, args.duration, not args.no_cold), indent=2))
@@ -0,0 +1,91 @@
+# benchmarks/bench_statement.py
+"""
+EN: Statement analytics: NumPy engine vs the per-row Python loop on the same
+    synthetic columns (default 1M postings for one card, over --cards
+    counterparties and ~3 years of dates), plus the bank-wide summary on the
+    same number of transfers. Data generation and DB loading are not timed;
+    column -> array conversion is, as part of the NumPy engine. Checks that
+    both engines produce identical results. Requires numpy.
+    Usage: python benchmarks/bench_statement.py --rows 1000000 --cards 5000
+FA: مقایسه موتور برداری NumPy با حلقه ساده پایتون روی یک میلیون تراکنش.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import Statement
+from app.models.Statement import Columns, PERIODS
+
+
+def synthetic(rows, cards, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    step = 3 * 365 * 86400 / rows
+    parties = [f"58598311{i:08d}" for i in range(1, cards + 1)]
+    card = Columns()
+    bank = Columns(parties=([], []))
+    for i in range(rows):
+        when = (start + timedelta(seconds=int(i * step))).strftime("%Y-%m-%d %H:%M:%S")
+        amount = rng.randint(1, 500000)
+        party = rng.choice(parties)
+        card.ids.append(i + 1)
+        card.dates.append(when)
+        card.amounts.append(amount if rng.random() < 0.5 else -amount)
+        card.parties.append(party)
+        bank.ids.append(i + 1)
+        bank.dates.append(when)
+        bank.amounts.append(amount)
+        bank.parties[0].append(party)
+        bank.parties[1].append(rng.choice(parties))
+    return card, bank
+
+
+def timed(fn, *args, repeat=3):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(rows, cards, period, repeat):
+    if Statement.np is None:
+        raise SystemExit("numpy is not installed: pip install numpy")
+    card, bank = synthetic(rows, cards)
+    width = PERIODS[period]
+    out = {"rows": rows, "counterparties": cards, "period": period}
+
+    py_time, py_result = timed(Statement._card_python, card, 10 ** 9, width, 100, repeat=repeat)
+    np_time, np_result = timed(Statement._card_numpy, card, 10 ** 9, width, 100, repeat=repeat)
+    out["card_statement"] = {
+        "python_s": round(py_time, 4), "numpy_s": round(np_time, 4),
+        "speedup": round(py_time / np_time, 1),
+        "identical": py_result == np_result,
+    }
+
+    py_time, py_result = timed(Statement._bank_python, bank, width, repeat=repeat)
+    np_time, np_result = timed(Statement._bank_numpy, bank, width, repeat=repeat)
+    out["bank_summary"] = {
+        "python_s": round(py_time, 4), "numpy_s": round(np_time, 4),
+        "speedup": round(py_time / np_time, 1),
+        "identical": py_result == np_result,
+    }
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--cards", type=int, default=5000, help="distinct counterparties")
+    parser.add_argument("--period", choices=tuple(PERIODS), default="month")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.cards, args.period, args.repeat), indent=2))
@@ -0,0 +1,326 @@
+# benchmarks/loadgen.py
+"""
+EN: HTTP load generator for the bank server.
+    Seeds N accounts into a fresh SQLite database, starts `server.py` on it in
+    a subprocess, replays a weighted request mix from many keep-alive clients
+    and prints throughput and p50/p95/p99 latency per endpoint as JSON.
+    Each client logs in as its own card before the clock starts and sends
+    the session token with /balance, /transactions and /transfer.
+    Usage:
+        python -m benchmarks.loadgen --accounts 1000 --clients 32 --duration 10 \
+            --mode threaded --mix login=30,balance=20,transfer=25,transactions=20,register=5
+        python -m benchmarks.loadgen --mode prefork --processes 4 ...
+        python -m benchmarks.loadgen --url http://127.0.0.1:8000 --cards cards.txt [--pin 0000] ...
+    With --url nothing is seeded: the target's own cards are read from
+    --cards (one card number per line, all with the PIN --pin).
+FA: تولیدکننده بار HTTP؛ گزارش توان عملیاتی و تاخیر p50/p95/p99 برای هر endpoint.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_MIX = "login=30,balance=20,transfer=25,transactions=20,register=5"
+SEED_PIN = "0000"
+# EN: PIN of the cards under load (--pin for an existing server's cards)
+# FA: پین کارت‌های مورد استفاده
+LOGIN_PIN = SEED_PIN
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(REQUESTS)
+    if unknown:
+        raise ValueError(f"unknown endpoints in mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+# EN: request builders: (rng, cards, client_id, seq) -> (method, path, json body)
+# FA: سازنده‌های درخواست برای هر endpoint
+def _login(rng, cards, client_id, seq):
+    return "POST", "/login", {"card_number": rng.choice(cards), "pin": LOGIN_PIN}
+
+
+def own_card(cards, client_id):
+    # EN: the card a client is logged in as (its session token's card)
+    # FA: کارتی که کلاینت با آن وارد شده است
+    return cards[client_id % len(cards)]
+
+
+def _balance(rng, cards, client_id, seq):
+    return "POST", "/balance", {}
+
+
+def _transfer(rng, cards, client_id, seq):
+    sender = own_card(cards, client_id)
+    receiver = rng.choice(cards)
+    while receiver == sender:
+        receiver = rng.choice(cards)
+    return "POST", "/transfer", {"receiver": receiver, "amount": rng.randint(1, 500) / 100}
+
+
+def _transactions(rng, cards, client_id, seq):
+    return "POST", "/transactions", {"page_size": 50}
+
+
+def _register(rng, cards, client_id, seq):
+    # EN: unique per client and request, and above the seeded accounts' phones (09 + index)
+    # FA: شماره تلفن و کد ملی یکتا برای هر درخواست ثبت‌نام
+    n = (client_id + 1) * 1000000 + seq
+    return "POST", "/register", {"first_name": "Load", "last_name": str(n), "pin": "1234",
+                                 "phone": f"09{n:09d}", "address": "", "id_card": f"7{n:09d}"}
+
+
+def _static(rng, cards, client_id, seq):
+    return "GET", "/dashboard.html", None
+
+
+REQUESTS = {
+    "login": _login,
+    "balance": _balance,
+    "transfer": _transfer,
+    "transactions": _transactions,
+    "register": _register,
+    "static": _static,
+}
+
+
+def seed_database(path, accounts):
+    from app.models.Database import configure_backend
+    from benchmarks.bench_batch_transfer import seed_accounts
+    configure_backend("sqlite", path=path)
+    return seed_accounts(accounts, balance="1000000.00")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, mode, workers, port, extra_args=(), admission=False):
+    # EN: every simulated client comes from 127.0.0.1, so per-IP rate limits are off unless asked for
+    # FA: همه کلاینت‌ها از یک IP هستند؛ محدودیت نرخ به طور پیش‌فرض خاموش است
+    cmd = [sys.executable, os.path.join(ROOT, "server.py"), "--db", "sqlite", "--sqlite-path", db_path,
+           "--mode", mode, "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port),
+           *extra_args, *(() if admission else ("--no-admission",))]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError("server did not start in time")
+
+
+def login(conn, card, headers=None):
+    # EN: session token for `card` (PIN hashing makes this slow: done before timing);
+    #     429/503 from admission control are retried after Retry-After
+    # FA: گرفتن توکن نشست برای یک کارت
+    for _ in range(20):
+        conn.request("POST", "/login", body=json.dumps({"card_number": card, "pin": LOGIN_PIN}),
+                     headers=dict(headers or {}, **{"Content-Type": "application/json"}))
+        response = conn.getresponse()
+        body = json.loads(response.read() or b"{}")
+        if response.status not in (429, 503):
+            break
+        time.sleep(float(response.getheader("Retry-After") or 1))
+    if not body.get("token"):
+        raise RuntimeError(f"login failed for {card}: {response.status} {body}")
+    return body["token"]
+
+
+def _login_all(host, port, cards, clients):
+    tokens = [None] * clients
+
+    def work(client_id):
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        try:
+            tokens[client_id] = login(conn, own_card(cards, client_id))
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return tokens
+
+
+def _failed(response, data):
+    # EN: non-2xx, or a JSON answer with "success": false (e.g. login with a wrong PIN)
+    # FA: پاسخ ناموفق: وضعیت غیر 2xx یا success=false
+    if not 200 <= response.status < 300:
+        return True
+    if (response.getheader("Content-Type") or "").startswith("application/json"):
+        try:
+            body = json.loads(data)
+        except ValueError:
+            return True
+        return isinstance(body, dict) and body.get("success") is False
+    return False
+
+
+def _client(host, port, cards, mix, client_id, token, stop_at, max_requests, seed, samples, lock):
+    rng = random.Random(seed + client_id)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    local = {n: [] for n in names}
+    errors = {n: 0 for n in names}
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    auth = {"Authorization": f"Bearer {token}"}
+    seq = 0
+    while time.monotonic() < stop_at and (max_requests is None or seq < max_requests):
+        name = rng.choices(names, weights)[0]
+        method, path, body = REQUESTS[name](rng, cards, client_id, seq)
+        seq += 1
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = dict(auth, **{"Content-Type": "application/json"}) if payload else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            elapsed = time.perf_counter() - start
+            local[name].append(elapsed)
+            if _failed(response, data):
+                errors[name] += 1
+        except (OSError, http.client.HTTPException):
+            errors[name] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.close()
+    with lock:
+        for n in names:
+            samples["latency"][n].extend(local[n])
+            samples["errors"][n] += errors[n]
+
+
+def run_load(host, port, cards, mix, clients, duration, requests_per_client, seed=1):
+    samples = {"latency": {n: [] for n in mix}, "errors": {n: 0 for n in mix}}
+    lock = threading.Lock()
+    tokens = _login_all(host, port, cards, clients)
+    stop_at = time.monotonic() + duration if duration else float("inf")
+    threads = [
+        threading.Thread(target=_client, args=(host, port, cards, mix, i, tokens[i], stop_at,
+                                               requests_per_client, seed, samples, lock))
+        for i in range(clients)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    endpoints = {}
+    total = 0
+    for name, values in samples["latency"].items():
+        values.sort()
+        total += len(values)
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": samples["errors"][name],
+            "throughput_rps": round(len(values) / wall, 1) if wall else None,
+            "p50_ms": _ms(percentile(values, 50)),
+            "p95_ms": _ms(percentile(values, 95)),
+            "p99_ms": _ms(percentile(values, 99)),
+            "max_ms": _ms(values[-1] if values else None),
+        }
+    return {
+        "clients": clients,
+        "wall_seconds": round(wall, 3),
+        "total_requests": total,
+        "throughput_rps": round(total / wall, 1) if wall else None,
+        "endpoints": endpoints,
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def read_cards(path):
+    with open(path, encoding="utf-8") as f:
+        cards = [line.strip() for line in f if line.strip()]
+    if len(cards) < 2:
+        raise SystemExit(f"{path}: need at least two card numbers, one per line")
+    return cards
+
+
+def main(argv=None):
+    global LOGIN_PIN
+    parser = argparse.ArgumentParser(description="Bank server load generator")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds (0 = use --requests)")
+    parser.add_argument("--requests", type=int, default=None, help="requests per client")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--mode", choices=("single", "threaded", "async", "prefork"), default="threaded")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (--mode prefork)")
+    parser.add_argument("--admission", action="store_true",
+                        help="keep rate limiting / load shedding on (all clients share one IP)")
+    parser.add_argument("--url", default=None, help="target an already running server instead")
+    parser.add_argument("--cards", default=None, help="with --url: file of the target's card numbers")
+    parser.add_argument("--pin", default=SEED_PIN, help="with --url: PIN of those cards")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    if args.url and not args.cards:
+        parser.error("--url needs --cards: the target server's own card numbers")
+
+    mix = parse_mix(args.mix)
+    proc = None
+    if args.url:
+        target = urlparse(args.url)
+        host, port = target.hostname, target.port or 80
+        cards = read_cards(args.cards)
+        LOGIN_PIN = args.pin
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="bank-load-"), "load.db")
+        cards = seed_database(db_path, args.accounts)
+        host, port = "127.0.0.1", _free_port()
+        extra = ["--processes", str(args.processes)] if args.processes else []
+        proc = start_server(db_path, args.mode, args.workers, port, extra, args.admission)
+    try:
+        report = run_load(host, port, cards, mix, args.clients, args.duration, args.requests, args.seed)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    report.update(mode=None if args.url else args.mode, workers=args.workers, processes=args.processes,
+                  accounts=len(cards), mix=mix)
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
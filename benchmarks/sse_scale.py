@@ -0,0 +1,218 @@
+# benchmarks/sse_scale.py
+"""
+EN: Live-feed scale test. Seeds --cards accounts, starts `server.py` in a
+    subprocess, opens --subscribers idle GET /events streams spread evenly
+    over the cards and measures
+      * server memory per open stream: VmRSS growth / subscribers
+      * fan-out latency: time from sending POST /transfer to each subscriber
+        of the receiving card reading its "transaction" event (per delivery
+        and until the last subscriber of the card has it)
+    The file-descriptor limit is raised to the hard limit first (both
+    processes need one descriptor per stream). Linux only (/proc).
+    Usage: python -m benchmarks.sse_scale --subscribers 5000 --cards 50 --mode threaded
+FA: آزمون مقیاس جریان زنده: حافظه هر اتصال و تاخیر پخش رویداد بین هزاران مشترک.
+"""
+import argparse
+import http.client
+import json
+import os
+import resource
+import selectors
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.loadgen import seed_database, start_server, percentile, _free_port, SEED_PIN
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def rss_kb(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def post(conn, path, body):
+    conn.request("POST", path, body=json.dumps(body), headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b"{}")
+
+
+def open_stream(port, token):
+    # EN: returns the socket once the headers and the "balance" snapshot are read
+    # FA: باز کردن یک جریان و خواندن موجودی اولیه
+    sock = socket.create_connection(("127.0.0.1", port), timeout=30)
+    sock.sendall(f"GET /events?token={token} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n"
+                 .encode("ascii"))
+    data = b""
+    while b"event: balance" not in data or not data.endswith(b"\n\n"):
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise RuntimeError(f"stream closed: {data[:200]!r}")
+        data += chunk
+    if not data.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(f"unexpected response: {data[:200]!r}")
+    sock.setblocking(False)
+    return sock
+
+
+class Receiver(threading.Thread):
+    """
+    EN: Reads every stream on one selector; records when each socket sees a
+        "transaction" event for the current round.
+    FA: خواندن همه جریان‌ها و ثبت زمان دریافت رویداد.
+    """
+
+    def __init__(self, streams):
+        super().__init__(daemon=True)
+        self.selector = selectors.DefaultSelector()
+        for sock, card in streams:
+            self.selector.register(sock, selectors.EVENT_READ, card)
+        self.lock = threading.Lock()
+        self.round_card = None
+        self.round_times = []
+        self.expected = 0
+        self.done = threading.Event()
+        self.closed = 0
+        self.running = True
+
+    def start_round(self, card, expected):
+        with self.lock:
+            self.round_card, self.round_times, self.expected = card, [], expected
+            self.done.clear()
+
+    def run(self):
+        while self.running:
+            for key, _ in self.selector.select(0.2):
+                try:
+                    data = key.fileobj.recv(65536)
+                except BlockingIOError:
+                    continue
+                now = time.perf_counter()
+                if not data:
+                    self.selector.unregister(key.fileobj)
+                    self.closed += 1
+                    continue
+                if b"event: transaction" in data:
+                    with self.lock:
+                        if key.data == self.round_card:
+                            self.round_times.append(now)
+                            if len(self.round_times) >= self.expected:
+                                self.done.set()
+
+
+def run(subscribers, cards, mode, workers, events):
+    fd_limit = raise_fd_limit()
+    if fd_limit < subscribers + 256:
+        raise SystemExit(f"open-file limit {fd_limit} is too low for {subscribers} streams")
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bank-sse-"), "sse.db")
+    seeded = seed_database(db_path, cards + 1)
+    payer, receivers = seeded[0], seeded[1:]
+    port = _free_port()
+    proc = start_server(db_path, mode, workers, port)
+    streams = []
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        tokens = {}
+        for card in receivers:
+            status, body = post(conn, "/login", {"card_number": card, "pin": SEED_PIN})
+            if status != 200:
+                raise RuntimeError(f"login failed for {card}: {body}")
+            tokens[card] = body["token"]
+        payer_token = post(conn, "/login", {"card_number": payer, "pin": SEED_PIN})[1]["token"]
+
+        # EN: warm up the stream path once so the baseline includes the hub thread
+        # FA: گرم کردن مسیر جریان قبل از اندازه‌گیری حافظه پایه
+        open_stream(port, tokens[receivers[0]]).close()
+        time.sleep(0.5)
+        rss_before = rss_kb(proc.pid)
+
+        started = time.perf_counter()
+        for i in range(subscribers):
+            card = receivers[i % len(receivers)]
+            streams.append((open_stream(port, tokens[card]), card))
+        connect_s = time.perf_counter() - started
+        time.sleep(1.0)
+        rss_after = rss_kb(proc.pid)
+
+        receiver = Receiver(streams)
+        receiver.start()
+        per_card = {card: 0 for card in receivers}
+        for _, card in streams:
+            per_card[card] += 1
+
+        # EN: fresh keep-alive connection: the login one may have idled out while connecting
+        # FA: اتصال تازه برای انتقال‌ها
+        conn.close()
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        deliveries, fanout, post_latency, missing = [], [], [], 0
+        for i in range(events):
+            card = receivers[i % len(receivers)]
+            receiver.start_round(card, per_card[card])
+            sent = time.perf_counter()
+            conn.request("POST", "/transfer", body=json.dumps({"receiver": card, "amount": "0.01"}),
+                         headers={"Content-Type": "application/json", "Authorization": f"Bearer {payer_token}"})
+            conn.getresponse().read()
+            post_latency.append(time.perf_counter() - sent)
+            if not receiver.done.wait(10):
+                missing += 1
+            with receiver.lock:
+                times = sorted(t - sent for t in receiver.round_times)
+            deliveries.extend(times)
+            if times:
+                fanout.append(times[-1])
+        receiver.running = False
+        receiver.join()
+        deliveries.sort()
+        fanout.sort()
+        post_latency.sort()
+
+        def ms(values, pct):
+            value = percentile(values, pct)
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            "mode": mode,
+            "subscribers": subscribers,
+            "cards": len(receivers),
+            "subscribers_per_card": subscribers // len(receivers),
+            "fd_limit": fd_limit,
+            "connect_seconds": round(connect_s, 2),
+            "server_rss_mb": {"before": round(rss_before / 1024, 1), "after": round(rss_after / 1024, 1)},
+            "rss_kb_per_stream": round((rss_after - rss_before) / subscribers, 2),
+            "events": events,
+            "rounds_incomplete": missing,
+            "streams_closed_by_server": receiver.closed,
+            "transfer_ms": {"p50": ms(post_latency, 50), "p99": ms(post_latency, 99)},
+            "delivery_ms": {"p50": ms(deliveries, 50), "p99": ms(deliveries, 99), "max": ms(deliveries, 100)},
+            "fanout_complete_ms": {"p50": ms(fanout, 50), "p99": ms(fanout, 99), "max": ms(fanout, 100)},
+        }
+    finally:
+        for sock, _ in streams:
+            sock.close()
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--cards", type=int, default=50, help="cards the subscribers are spread over")
+    parser.add_argument("--mode", choices=("single", "threaded", "async"), default="threaded")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--events", type=int, default=100, help="transfers to fan out")
+    args = parser.parse_args()
+    print(json.dumps(run(args.subscribers, args.cards, args.mode, args.workers, args.events), indent=2))
@@ -0,0 +1,96 @@
+# benchmarks/stress_transfers.py
+"""
+EN: Concurrency stress test for transfer_money(): many threads move money
+    between random pairs (both directions) and the total balance must be
+    unchanged at the end, and every balance must match the ledger.
+    Exits with status 1 if money was created or lost.
+    Usage: python benchmarks/stress_transfers.py --threads 32 --transfers 500
+FA: تست فشار همزمانی؛ مجموع موجودی‌ها باید ثابت بماند.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.Database import configure_backend, configure_pool, get_connection
+from app.models.AccountModel import transfer_money
+from app.models.TransferEngine import retry_stats
+from app.models.Ledger import reconcile
+from benchmarks.bench_batch_transfer import seed_accounts
+
+
+def total_balance():
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT balance FROM users")
+        return sum((Decimal(str(row[0])) for row in cursor.fetchall()), Decimal("0"))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def run(accounts, threads, transfers, busy_timeout, seed):
+    configure_backend("sqlite", path=os.path.join(tempfile.mkdtemp(prefix="bank-stress-"), "stress.db"),
+                      busy_timeout=busy_timeout)
+    configure_pool(max_size=threads)
+    cards = seed_accounts(accounts, balance="100.00")
+    before = total_balance()
+    outcomes = {}
+    outcomes_lock = threading.Lock()
+
+    def worker(n):
+        rng = random.Random(seed + n)
+        local = {}
+        for _ in range(transfers):
+            sender, receiver = rng.sample(cards, 2)
+            result = transfer_money(sender, receiver, f"{rng.randint(1, 2000) / 100:.2f}")
+            key = "ok" if result["success"] else result["message"]
+            local[key] = local.get(key, 0) + 1
+        with outcomes_lock:
+            for key, value in local.items():
+                outcomes[key] = outcomes.get(key, 0) + value
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    after = total_balance()
+    ledger = reconcile()
+    return {
+        "threads": threads,
+        "transfers": threads * transfers,
+        "seconds": round(elapsed, 3),
+        "outcomes": outcomes,
+        "retries": retry_stats(),
+        "total_before": str(before),
+        "total_after": str(after),
+        "conserved": before == after,
+        "ledger_ok": ledger["ok"],
+        "ledger": {k: ledger[k] for k in ("accounts", "mismatch_count", "ledger_total", "seconds")},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--transfers", type=int, default=200, help="transfers per thread")
+    parser.add_argument("--busy-timeout", type=float, default=0.05,
+                        help="SQLite lock wait before a retryable error (seconds)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    report = run(args.accounts, args.threads, args.transfers, args.busy_timeout, args.seed)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["conserved"] and report["ledger_ok"] else 1)
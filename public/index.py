@@ -1,72 +1,155 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-
-import cgi
+"""
+EN: JSON API as a WSGI application (`application`), for hosting the bank
+    behind any WSGI server or, run directly, as a CGI script. It uses the
+    same AccountService as server.py.
+    Parameters come from the query string and a form-encoded or JSON body;
+    "action" selects the operation: register (alias create), login,
+    transfer, balance (alias get_balance) and transactions. A separate
+    process cannot see server.py's in-memory sessions, so card actions
+    authenticate with card_number + pin on every request. Every response,
+    errors included, is JSON.
+FA: API به صورت برنامه WSGI (و اسکریپت CGI)؛ همیشه خروجی JSON و همان سرویس حساب‌های سرور.
+"""
 import json
+import os
+import sys
+import traceback
+from urllib.parse import parse_qs
+
+# EN: make `app` importable when run as a CGI script from public/
+# FA: افزودن ریشه پروژه به مسیر import
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
 from app.controllers.AccountController import AccountController
 
-print("Content-Type: application/json\n")  # خروجی JSON برای تعامل با فرانت‌اند
+MAX_BODY = 64 * 1024
+# EN: actions that change data are POST only
+# FA: عملیات تغییر داده فقط با POST
+WRITE_ACTIONS = ("register", "create", "transfer")
+
+STATUS_LINES = {200: "200 OK", 400: "400 Bad Request", 401: "401 Unauthorized", 405: "405 Method Not Allowed",
+                413: "413 Payload Too Large", 429: "429 Too Many Requests", 500: "500 Internal Server Error"}
 
 controller = AccountController()
-form = cgi.FieldStorage()
 
-action = form.getvalue("action")
 
-# پاسخ نهایی
-response = {"status": "error", "message": "Invalid action"}
+def _params(environ):
+    # EN: query string, then the body (JSON or form-encoded) on top
+    # FA: خواندن پارامترها از query string و بدنه درخواست
+    params = {k: v[0] for k, v in parse_qs(environ.get("QUERY_STRING", "")).items()}
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length > MAX_BODY:
+        raise OverflowError
+    if length <= 0:
+        return params
+    body = environ["wsgi.input"].read(length)
+    if environ.get("CONTENT_TYPE", "").split(";")[0].strip() == "application/json":
+        data = json.loads(body.decode("utf-8") or "{}")
+        if not isinstance(data, dict):
+            raise ValueError("JSON body must be an object.")
+        params.update({k: v if isinstance(v, str) else json.dumps(v) if isinstance(v, (dict, list)) else str(v)
+                       for k, v in data.items() if v is not None})
+    else:
+        params.update({k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()})
+    return params
 
-try:
-    if action == "create":
-        username = form.getvalue("username")
-        password = form.getvalue("password")
 
-        if controller.create_account(username, password):
-            response = {"status": "success",
-                        "message": "Account created successfully!"}
-        else:
-            response = {"status": "error",
-                        "message": "Username already exists!"}
-
-    elif action == "login":
-        username = form.getvalue("username")
-        password = form.getvalue("password")
-
-        user = controller.login(username, password)
-        if user:
-            response = {
-                "status": "success",
-                "message": "Login successful!",
-                "user": user
-            }
-        else:
-            response = {"status": "error", "message": "Invalid credentials!"}
+def _error(status, message, **extra):
+    return status, dict({"status": "error", "message": message}, **extra)
+
+
+def _authenticate(params):
+    # EN: (card, None) on success, else (None, error response)
+    # FA: احراز هویت با شماره کارت و پین
+    card = params.get("card_number") or params.get("sender") or params.get("from_user") or ""
+    user, retry_after = controller.service.login_attempt(card, params.get("pin") or "")
+    if user is None:
+        if retry_after:
+            return None, _error(429, "Too many failed attempts. Try again later.", retry_after=int(retry_after) + 1)
+        return None, _error(401, "Invalid card number or PIN.")
+    return card, None
 
-# index.py (فقط بخش transfer)
-    elif action == "transfer":
-        from_user = form.getvalue("from_user") or ""
-        to_user = form.getvalue("to_user") or ""
-        amt_raw = form.getvalue("amount") or "0"
-        try:
-            amount = float(amt_raw)
-        except Exception:
-            amount = 0.0
 
-        # فرض می‌کنیم controller.transfer_money(from_user, to_user, amount) وجود دارد
-        result = controller.transfer_money(from_user, to_user, amount)
-        # نمایش خروجی ساده به مرورگر
+def handle(action, params):
+    # EN: (status, response dict) for one action
+    # FA: اجرای یک عملیات و برگرداندن پاسخ
+    if action in ("register", "create"):
+        success, message, card = controller.create_account(
+            (params.get("first_name") or "").strip(), (params.get("last_name") or "").strip(),
+            (params.get("phone") or "").strip(), (params.get("address") or "").strip(),
+            (params.get("id_card") or "").strip(), (params.get("pin") or "").strip())
+        if success:
+            return 200, {"status": "success", "message": message, "card_number": card}
+        return _error(400, message, card_number=card) if card else _error(400, message)
+
+    if action == "login":
+        user = controller.login(params.get("card_number") or "", params.get("pin") or "")
+        if not user:
+            return _error(401, "Invalid card number or PIN.")
+        return 200, {"status": "success", "message": "Login successful!", "user": user}
+
+    if action not in ("transfer", "balance", "get_balance", "transactions"):
+        return _error(400, "Invalid action")
+
+    card, error = _authenticate(params)
+    if error:
+        return error
+
+    if action == "transfer":
+        receiver = params.get("receiver") or params.get("to_user") or ""
+        result = controller.transfer_money(card, receiver, params.get("amount") or "")
         if result.get("success"):
-            print(f"<h1>✅ {result.get('message')}</h1>")
+            return 200, {"status": "success", "message": result["message"]}
+        return _error(400, result.get("message") or "Transfer failed.")
+
+    if action == "transactions":
+        try:
+            limit = max(1, min(int(params.get("limit") or 200), 500))
+        except ValueError:
+            return _error(400, "limit must be an integer.")
+        rows = controller.get_transactions(card, limit)
+        return 200, {"status": "success",
+                     "transactions": [dict(r, date=str(r.get("date"))) for r in rows]}
+
+    return 200, {"status": "success", "balance": controller.get_balance(card)}
+
+
+def application(environ, start_response):
+    method = environ.get("REQUEST_METHOD", "GET").upper()
+    try:
+        params = _params(environ)
+        action = params.get("action")
+        if action in WRITE_ACTIONS and method != "POST":
+            status, response = _error(405, "Use POST for this action.")
         else:
-            print(f"<h1>❌ {result.get('message')}</h1>")
-        print('<a href="../app/public/dashboard.html">Back to Dashboard</a>')
+            status, response = handle(action, params)
+    except OverflowError:
+        status, response = _error(413, "Request body too large.")
+    except (ValueError, UnicodeDecodeError):
+        status, response = _error(400, "Malformed request body.")
+    except Exception:
+        # EN: the traceback goes to the server's error log, never to the client
+        # FA: جزئیات خطا فقط در لاگ سرور ثبت می‌شود
+        traceback.print_exc(file=environ.get("wsgi.errors") or sys.stderr)
+        status, response = _error(500, "Internal server error.")
 
-    elif action == "get_balance":
-        username = form.getvalue("username")
-        balance = controller.get_balance(username)
-        response = {"status": "success", "balance": balance}
+    body = json.dumps(response).encode("utf-8")
+    headers = [("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(body)))]
+    if status == 405:
+        headers.append(("Allow", "POST"))
+    start_response(STATUS_LINES[status], headers)
+    return [body]
 
-except Exception as e:
-    response = {"status": "error", "message": str(e)}
 
-# چاپ خروجی JSON
-print(json.dumps(response))
+if __name__ == "__main__":
+    # EN: CGI mode (replaces the removed `cgi` module)
+    # FA: اجرا به صورت CGI
+    from wsgiref.handlers import CGIHandler
+    CGIHandler().run(application)
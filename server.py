@@ -1,232 +1,819 @@
 # server.py
+import gc
 import os
+import time
+import hmac
 import json
-from decimal import Decimal, InvalidOperation
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import argparse
 from urllib.parse import parse_qs
-from app.models.AccountModel import create_user, login_user, transfer_money, get_transactions
+from decimal import Decimal, InvalidOperation
+from http.server import SimpleHTTPRequestHandler
+from app.models.AccountService import accounts, registration_error, next_cursor, hot_queries, MAX_PAGE_SIZE
+from app.models.AccountCache import account_cache
+from app.models.Database import pool_stats, configure_backend, get_backend
+from app.models.Storage import translate_sql
+from app.models.TransferEngine import retry_stats
+from app.models.HotAccounts import SlotCompactor
+from app.models.GroupCommit import TransferPipeline, PipelineFull
+from app.models.Credentials import credentials
+from app.models.Statement import card_statement, bank_summary
+from app.models.BulkAccounts import import_accounts, export_accounts, read_records, format_for
+from app.models.LiveFeed import balance_frame, TransferFollower
+from app.models.Idempotency import idempotency, valid_key, fingerprint
+from app.models.SessionRevocations import record_revocation, RevocationFollower
+from app.core.Servers import SingleHTTPServer, ThreadPoolHTTPServer, AsyncHTTPServer
+from app.core.Prefork import PreforkServer
+from app.core.Gateway import WSGIApp, ASGIApp
+from app.core.EventBus import bus
+from app.core.Streams import hub, STREAM_CONFIG
+from app.core import Metrics
+from app.core.Router import Router, Request
+from app.core.Templates import load_template
+from app.core.StaticFiles import StaticCache
+from app.core.Sessions import sessions, bearer_token
+from app.core.Admission import admission
 
 PORT = 8000
+MAX_BATCH_TRANSFERS = 50000
+# runtime sampling profiler endpoint (/debug/profiler) is off unless enabled
+ENABLE_PROFILER = os.environ.get("BANK_ENABLE_PROFILER") == "1"
+# legacy clients: card number + PIN in the body instead of a login token (off by default)
+ALLOW_BODY_CARD = os.environ.get("BANK_ALLOW_BODY_CARD") == "1"
+# bulk import/export endpoints need "X-Admin-Token: <token>"; disabled (404) when unset
+ADMIN_TOKEN = os.environ.get("BANK_ADMIN_TOKEN") or None
+# behind a reverse proxy: rate-limit by the client address it appends to X-Forwarded-For
+TRUST_FORWARDED_FOR = os.environ.get("BANK_TRUST_FORWARDED_FOR") == "1"
+
+NOT_FOUND = b"404 Not Found"
+
+# public/ is preloaded into memory; with --dev (or BANK_DEV=1) it is re-scanned for edits
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public")
+static_files = StaticCache(PUBLIC_DIR)
+
+# /transfer goes through the group-commit pipeline when --group-commit is set
+transfer_pipeline = None
+# TransferPipeline options from --group-commit (None = off); started per serving process
+GROUP_COMMIT = None
+# hot-account slot folding thread and the --dev file watcher, started per serving process
+compactor = None
+DEV_RELOAD = False
+# several worker processes (prefork / app servers): see share_between_processes
+MULTI_PROCESS = False
+follower = None
+revocations = None
+
+# (method, path) -> handler; BankHandler registers its routes below
+router = Router()
+
+# response pages compiled once at import; only {{ placeholders }} are filled per request
+REGISTER_SUCCESS_PAGE = load_template("register_success.html")
+MESSAGE_PAGE = load_template("message.html")
+
+Metrics.registry.register_gauges("bank_pool", pool_stats)
+Metrics.registry.register_gauges("bank_transfer", retry_stats)
+Metrics.registry.register_gauges("bank_account_cache", account_cache.stats)
+Metrics.registry.register_gauges("bank_sessions", sessions.stats)
+Metrics.registry.register_gauges("bank_credentials", credentials.stats)
+Metrics.registry.register_gauges("bank_events", bus.stats)
+Metrics.registry.register_gauges("bank_streams", hub.stats)
+Metrics.registry.register_gauges("bank_idempotency", idempotency.stats)
+Metrics.registry.register_gauges("bank_admission", admission.stats)
+
+
+def validate_transfer(sender, receiver, amt):
+    # returns (error message or None, Decimal amount)
+    try:
+        # if JSON sent a number, amt may be numeric; convert to str
+        amount = Decimal(str(amt if amt is not None else "0").strip())
+        if not amount.is_finite():
+            amount = Decimal("0")
+    except Exception:
+        amount = Decimal("0")
+
+    if not isinstance(sender, str) or not sender or len(sender) != 16 or not sender.isdigit():
+        return "Invalid sender card number.", amount
+    if not isinstance(receiver, str) or not receiver or len(receiver) != 16 or not receiver.isdigit():
+        return "Invalid receiver card number.", amount
+    if sender == receiver:
+        return "Sender and receiver must be different cards.", amount
+    if amount <= 0:
+        return "Amount must be greater than zero!", amount
+    return None, amount
+
+
+def ndjson_lines(rows):
+    # one JSON document per line; the body owns the DB cursor and releases it
+    # when exhausted or closed, also when a WSGI/ASGI host iterates it later
+    try:
+        for r in rows:
+            yield json.dumps(r, default=str) + "\n"
+    finally:
+        rows.close()
+
 
 class BankHandler(SimpleHTTPRequestHandler):
+    # keep-alive: every response carries Content-Length
+    protocol_version = "HTTP/1.1"
+    # idle keep-alive connections are dropped after this many seconds
+    timeout = 5
+    # headers and body are separate writes; without TCP_NODELAY, Nagle +
+    # delayed ACK add ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    @staticmethod
+    def streams_body(method, path):
+        # async mode: raw_body routes get their body as a bounded stream, not buffered
+        route = router.resolve(method, path)
+        return route is not None and route.raw_body
+
+    def send_response(self, code, message=None):
+        Metrics.set_status(code)
+        super().send_response(code, message)
+
+    def _send_body(self, status, body, content_type="application/json", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        with Metrics.phase("write"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send_body(status, json.dumps(payload, default=str), headers=headers)
+
+    def _send_chunked(self, status, chunks, content_type="application/json"):
+        # stream an iterable of str/bytes without knowing the total length
+        chunked = self.request_version >= "HTTP/1.1"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.close_connection = True
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                if not chunk:
+                    continue
+                if chunked:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+
+    def _not_found(self):
+        self._send_body(404, NOT_FOUND, "text/plain")
+
+    def _admin(self, req):
+        # bulk endpoints: hidden unless BANK_ADMIN_TOKEN is set, then token-checked
+        if ADMIN_TOKEN is None:
+            self._not_found()
+            return False
+        if not hmac.compare_digest(req.headers.get("X-Admin-Token") or "", ADMIN_TOKEN):
+            self._send_json(403, {"success": False, "message": "Admin token required."})
+            return False
+        return True
+
+    def _caller(self, req, field):
+        # card of the caller: from the session token (signature check, no DB
+        # lookup), else with --allow-body-card from the body field and its PIN;
+        # None if a response was sent
+        token = bearer_token(req.headers)
+        if token is None:
+            if not ALLOW_BODY_CARD:
+                self._send_json(401, {"success": False, "message": "Login required."})
+                return None
+            card = req.get(field)
+            user, retry_after = accounts.login_attempt(card if isinstance(card, str) else "", req.get("pin") or "")
+            if retry_after:
+                self._send_json(429, {"success": False, "retry_after": int(retry_after) + 1,
+                                      "message": "Too many failed attempts. Try again later."})
+                return None
+            if user is None:
+                self._send_json(401, {"success": False, "message": "Invalid card number or PIN."})
+                return None
+            return card
+        session = sessions.resolve(token)
+        if session is None:
+            self._send_json(401, {"success": False, "message": "Session expired or invalid."})
+            return None
+        claimed = req.get(field)
+        if claimed and claimed != session.card_number:
+            self._send_json(403, {"success": False, "message": f"{field} does not match the session."})
+            return None
+        return session.card_number
+
+    def _client_ip(self):
+        if TRUST_FORWARDED_FOR:
+            forwarded = self.headers.get("X-Forwarded-For")
+            if forwarded:
+                return forwarded.rpartition(",")[2].strip()
+        return self.client_address[0]
+
+    def _rate_card(self, req):
+        # card a request acts for, as the rate-limit key: the PIN being tried on
+        # /login, the signed session card, else the legacy body field
+        if req.path == "/login":
+            card = req.get("card_number")
+        else:
+            token = bearer_token(req.headers)
+            if token is None and req.path == "/events":
+                token = (parse_qs(req.query).get("token") or [None])[0]
+            card = sessions.signed_card(token) if token else req.get("sender") or req.get("card_number")
+        return card if isinstance(card, str) else None
+
+    def _admitted(self, route, req):
+        # admission control (app/core/Admission.py): rate limits per IP and card,
+        # load shedding by route priority; rejected requests never reach the DB
+        queued = getattr(self.server, "queued", None)
+        rejection = admission.admit(req.path, self._client_ip(), self._rate_card(req),
+                                    queued() if queued is not None else 0)
+        if rejection is not None:
+            headers = {"Retry-After": str(rejection.retry_after)}
+            if rejection.status == 503 and getattr(self.server, "thread_per_connection", False):
+                # overloaded: hand this thread to a client waiting in the listen backlog
+                headers["Connection"] = "close"
+            self._send_json(rejection.status, {"success": False, "retry_after": rejection.retry_after,
+                                               "message": rejection.message}, headers=headers)
+            return False
+        started = time.perf_counter()
+        try:
+            route(self, req)
+        finally:
+            admission.release(time.perf_counter() - started)
+        return True
+
     def translate_path(self, path):
-        root = os.path.join(os.getcwd(), "public")
-        path = path.lstrip("/")
-        return os.path.join(root, path)
+        # only ever maps into public/; traversal attempts map to a path that cannot exist
+        url = static_files.resolve(path)
+        if url is None:
+            return os.path.join(PUBLIC_DIR, "\x00")
+        return os.path.join(PUBLIC_DIR, *url.lstrip("/").split("/"))
+
+    def _endpoint(self, method):
+        path = self.path.partition("?")[0]
+        if router.resolve(method, path) is not None:
+            return path
+        return "static" if method == "GET" else "other"
 
     def do_GET(self):
-        if self.path == "/":
-            self.path = "/index.html"
-        file_path = self.translate_path(self.path)
-        if os.path.exists(file_path):
-            return super().do_GET()
-        else:
-            self.send_response(404)
-            self.end_headers()
-            self.wfile.write(b"404 Not Found")
+        with Metrics.request(self._endpoint("GET"), "GET"):
+            route = router.resolve("GET", self.path)
+            if route is not None:
+                self._admitted(route, Request(self.command, self.path, self.headers))
+            else:
+                self._serve_static()
+
+    def do_HEAD(self):
+        with Metrics.request("static", "HEAD"):
+            self._serve_static(head=True)
 
     def do_POST(self):
-        length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(length).decode('utf-8') if length > 0 else ""
-        # parse JSON or form-encoded
-        if self.headers.get("Content-Type", "").startswith("application/json"):
-            try:
-                data = json.loads(body) if body else {}
-            except Exception:
-                data = {}
-        else:
-            data = parse_qs(body)
-
-        # helper to read field whether parse_qs(list) or json(dict)
-        def getf(k):
-            v = data.get(k)
-            if isinstance(v, list):
-                return v[0]
-            return v
-
-        # register (kept as HTML response)
-        if self.path == "/register":
-            first_name = getf("first_name") or ""
-            last_name = getf("last_name") or ""
-            pin = getf("pin") or ""
-            phone = getf("phone") or ""
-            address = getf("address") or ""
-            id_card = getf("id_card") or ""
-
-            # basic server-side validation (pin/phone/id)
-            if not (isinstance(pin, str) and pin.isdigit() and len(pin) == 4):
-                success, message, card = False, "PIN must be a 4-digit number!", None
-            elif not (isinstance(phone, str) and phone.isdigit() and len(phone) == 11 and phone.startswith("09")):
-                success, message, card = False, "Phone must be 11 digits and start with 09.", None
-            elif not (isinstance(id_card, str) and id_card.isdigit() and len(id_card) == 10):
-                success, message, card = False, "ID Card must be 10 digits.", None
+        with Metrics.request(self._endpoint("POST"), "POST"):
+            route = router.resolve("POST", self.path)
+            if route is not None and route.raw_body:
+                # body is streamed by the handler itself; if rejected it is left
+                # unread, so the connection cannot be reused
+                if not self._admitted(route, Request(self.command, self.path, self.headers)):
+                    self.close_connection = True
+                return
+            with Metrics.phase("parse"):
+                req = Request.read(self)
+                req.data
+            if route is not None:
+                self._admitted(route, req)
             else:
-                success, message, card = create_user(first_name, last_name, phone, address, id_card, pin)
+                self._not_found()
 
-            self.send_response(200 if success else 400)
-            self.send_header("Content-Type", "text/html; charset=utf-8")
+    def _serve_static(self, head=False):
+        # files under public/ are served from memory (see app/core/StaticFiles.py)
+        asset = static_files.lookup(self.path)
+        if asset is None:
+            self._not_found()
+            return
+        with Metrics.phase("write"):
+            if asset.not_modified(self.headers):
+                self.send_response(304)
+                self.send_header("ETag", asset.etag)
+                self.send_header("Cache-Control", asset.cache_control)
+                self.end_headers()
+                return
+            encoding, body = asset.negotiate(self.headers.get("Accept-Encoding"))
+            self.send_response(200)
+            self.send_header("Content-Type", asset.content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if encoding != "identity":
+                self.send_header("Content-Encoding", encoding)
+            if len(asset.variants) > 1:
+                self.send_header("Vary", "Accept-Encoding")
+            self.send_header("ETag", asset.etag)
+            self.send_header("Last-Modified", asset.last_modified)
+            self.send_header("Cache-Control", asset.cache_control)
             self.end_headers()
-            if success and card:
-                html = f"""
-                <html>
-                <head>
-                    <meta charset='UTF-8'>
-                    <style>
-                        body {{
-                            font-family: Arial, sans-serif;
-                            background: ##1b2a49;
-                            display: flex;
-                            align-items: center;
-                            justify-content: center;
-                            height: 100vh;
-                            margin: 0;
-                        }}
-                        .box {{
-                            background: #2a3b6b;
-                            padding: 30px;
-                            width: 420px;
-                            border-radius: 12px;
-                            box-shadow: 0 4px 15px rgba(0,0,0,0.15);
-                            text-align: center;
-                        }}
-                        h2 {{
-                            color: #28a745;
-                            font-size: 24px;
-                            margin-bottom: 10px;
-                        }}
-                        .card-number {{
-                            font-size: 20px;
-                            font-weight: bold;
-                            margin: 15px 0;
-                            color: #fff;
-                            background: ##1f2b50;
-                            padding: 10px;
-                            border-radius: 8px;
-                            border: 1px solid #ddd;
-                        }}
-                        p {{
-                            color: #555;
-                            font-size: 15px;
-                        }}
-                        .btn {{
-                            display: inline-block;
-                            margin-top: 20px;
-                            padding: 12px 22px;
-                            background: #007bff;
-                            color: #fff;
-                            text-decoration: none;
-                            font-size: 16px;
-                            border-radius: 8px;
-                            transition: 0.25s ease;
-                        }}
-                        .btn:hover {{
-                            background: #0056b3;
-                        }}
-                    </style>
-                </head>
-
-                <body>
-                    <div class="box">
-                        <h2>Account created successfully 🎉</h2>
-
-                        <p>Your Card Number:</p>
-                        <div class="card-number">{card}</div>
-
-                        <p>Keep it safe.  
-                        Use your card number and PIN to login.</p>
-
-                        <a href='/login.html' class='btn'>Login</a>
-                    </div>
-                </body>
-                </html>
-                """
-            else:
-                html = f"<html><body><h2>{message}</h2><p><a href='/create_account.html'>Back</a></p></body></html>"
-            self.wfile.write(html.encode("utf-8"))
+            if not head:
+                self.wfile.write(body)
+
+    # ------------------------------------------------------------------
+    # GET routes
+    # ------------------------------------------------------------------
+
+    # Prometheus text exposition: request/phase/SQL histograms + pool/cache gauges
+    @router.get("/metrics")
+    def metrics(self, req):
+        self._send_body(200, Metrics.registry.render(), "text/plain; version=0.0.4; charset=utf-8")
+
+    # connection pool gauges/counters for scraping
+    @router.get("/stats/pool")
+    def stats_pool(self, req):
+        self._send_json(200, pool_stats())
+
+    # transfer retry / deadlock counters
+    @router.get("/stats/retries")
+    def stats_retries(self, req):
+        self._send_json(200, retry_stats())
+
+    # account cache hit/miss/eviction counters
+    @router.get("/stats/cache")
+    def stats_cache(self, req):
+        self._send_json(200, account_cache.stats())
+
+    # streamed export of every account: ?format=csv|ndjson
+    @router.get("/accounts/export")
+    def accounts_export(self, req):
+        if not self._admin(req):
+            return
+        fmt = (parse_qs(req.query).get("format") or ["csv"])[0]
+        if fmt not in ("csv", "ndjson"):
+            self._send_json(400, {"success": False, "message": "format must be csv or ndjson."})
+            return
+        self._send_chunked(200, export_accounts(fmt),
+                           "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson")
+
+    # bank-wide volume per period and top senders/receivers: ?from=&to=&period=&top=
+    @router.get("/statement/bank")
+    def statement_bank(self, req):
+        if not self._admin(req):
             return
+        query = {k: v[0] for k, v in parse_qs(req.query).items()}
+        with Metrics.phase("db"):
+            result = bank_summary(query.get("from"), query.get("to"), query.get("period") or "month",
+                                  query.get("top") or 10)
+        self._send_json(200 if result["success"] else 400, result)
 
-        # login -> expects form-urlencoded (from login.html) or JSON
-        if self.path == "/login":
-            card_number = getf("card_number") or ""
-            pin = getf("pin") or ""
-            if isinstance(card_number, list): card_number = card_number[0]
-            if isinstance(pin, list): pin = pin[0]
+    # current session's user, straight from the session store
+    @router.get("/session")
+    def session(self, req):
+        session = sessions.resolve(bearer_token(req.headers))
+        if session is None:
+            self._send_json(401, {"success": False, "message": "Session expired or invalid."})
+        else:
+            self._send_json(200, {"success": True, "user": session.user, "expires_at": session.expires_at})
 
-            user = login_user(card_number, pin)
+    # live feed (server-sent events): "balance" snapshot, then one "transaction"
+    # event per committed transfer touching the card. EventSource cannot set
+    # headers, so the session token may come as ?token=
+    @router.get("/events")
+    def events(self, req):
+        token = (parse_qs(req.query).get("token") or [None])[0] or bearer_token(req.headers)
+        session = sessions.resolve(token)
+        if session is None:
+            self._send_json(401, {"success": False, "message": "Session expired or invalid."})
+            return
+        if self.server.stream_count() >= STREAM_CONFIG["max_clients"]:
+            self._send_json(503, {"success": False, "message": "Too many open event streams."})
+            return
+        card = session.card_number
+        # subscribe before reading the balance: nothing committed in between is missed
+        sub = bus.subscribe(card)
+        balance = accounts.get_balance(card)
+        with Metrics.phase("write"):
             self.send_response(200)
-            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("X-Accel-Buffering", "no")
             self.end_headers()
-            if user:
-                user_out = {
-                    "id": user.get("id"),
-                    "first_name": user.get("first_name"),
-                    "last_name": user.get("last_name"),
-                    "card_number": user.get("card_number"),
-                    "balance": float(user.get("balance") or 0.0)
-                }
-                self.wfile.write(json.dumps({"success": True, "user": user_out}).encode("utf-8"))
+            self.wfile.write(b"retry: %d\n\n" % STREAM_CONFIG["retry_ms"] +
+                             balance_frame(card, balance or 0))
+        self.server.attach_stream(self, sub)
+
+    # ------------------------------------------------------------------
+    # POST routes
+    # ------------------------------------------------------------------
+
+    # sampling profiler: {"action": "start", "interval_ms": 5} / {"action": "stop"}
+    @router.post("/debug/profiler")
+    def debug_profiler(self, req):
+        if not ENABLE_PROFILER:
+            self._not_found()
+            return
+        action = req.get("action")
+        if action == "start":
+            try:
+                interval = float(req.get("interval_ms") or 5) / 1000.0
+            except (TypeError, ValueError):
+                interval = 0.005
+            started = Metrics.profiler.start(max(interval, 0.001))
+            self._send_json(200, {"success": started, "running": True})
+        elif action == "stop":
+            report = Metrics.profiler.stop()
+            if report is None:
+                self._send_json(409, {"success": False, "message": "Profiler is not running."})
             else:
-                self.wfile.write(json.dumps({"success": False, "message": "Invalid card number or PIN."}).encode("utf-8"))
+                # collapsed stacks, one "frame;frame;frame count" per line
+                self._send_body(200, report, "text/plain; charset=utf-8")
+        else:
+            self._send_json(200, {"running": Metrics.profiler.running, "samples": Metrics.profiler.samples})
+
+    # register (kept as HTML response)
+    @router.post("/register")
+    def register(self, req):
+        first_name = req.get("first_name") or ""
+        last_name = req.get("last_name") or ""
+        pin = req.get("pin") or ""
+        phone = req.get("phone") or ""
+        address = req.get("address") or ""
+        id_card = req.get("id_card") or ""
+
+        # basic server-side validation (pin/phone/id), shared with bulk import
+        error = registration_error(pin, phone, id_card)
+        if error:
+            success, message, card = False, error, None
+        else:
+            success, message, card = accounts.create_user(first_name, last_name, phone, address, id_card, pin)
+
+        # static markup is compiled once; only the card number / message is substituted
+        if success and card:
+            page = REGISTER_SUCCESS_PAGE.render(card=card)
+        else:
+            page = MESSAGE_PAGE.render(message=message, back="/create_account.html")
+        self._send_body(200 if success else 400, page, "text/html; charset=utf-8")
+
+    # login -> expects form-urlencoded (from login.html) or JSON
+    @router.post("/login")
+    def login(self, req):
+        card_number = req.get("card_number") or ""
+        pin = req.get("pin") or ""
+
+        user, retry_after = accounts.login_attempt(card_number, pin)
+        if retry_after:
+            self._send_json(429, {"success": False, "retry_after": int(retry_after) + 1,
+                                  "message": "Too many failed attempts. Try again later."})
+        elif user:
+            user_out = {
+                "id": user.get("id"),
+                "first_name": user.get("first_name"),
+                "last_name": user.get("last_name"),
+                "card_number": user.get("card_number"),
+                "balance": float(user.get("balance") or 0.0)
+            }
+            # later calls send "Authorization: Bearer <token>" instead of the card number
+            token, expires_at = sessions.issue(user_out["card_number"], {
+                k: user_out[k] for k in ("id", "first_name", "last_name", "card_number")})
+            self._send_json(200, {"success": True, "user": user_out, "token": token, "expires_at": expires_at})
+        else:
+            self._send_json(200, {"success": False, "message": "Invalid card number or PIN."})
+
+    # bulk import: CSV (text/csv) or NDJSON (application/x-ndjson) body, read line by line
+    @router.post("/accounts/import", raw_body=True)
+    def accounts_import(self, req):
+        # the body is not read on rejection, so the connection cannot be reused
+        if not self._admin(req):
+            self.close_connection = True
             return
+        fmt = format_for(req.headers.get("Content-Type"), default=None)
+        if "Content-Length" not in req.headers or fmt is None:
+            self.close_connection = True
+            self._send_json(400, {"success": False,
+                                  "message": "Send text/csv or application/x-ndjson with a Content-Length."})
+            return
+        with Metrics.phase("db"):
+            report = import_accounts(read_records(Request.body_lines(self), fmt))
+        self._send_json(200, dict(report, success=True))
+
+    @router.post("/logout")
+    def logout(self, req):
+        revoked = sessions.revoke(bearer_token(req.headers))
+        self._send_json(200, {"success": revoked})
 
-        # transfer -> robust parsing and validation
-        if self.path == "/transfer":
-            sender = getf("sender") or ""
-            receiver = getf("receiver") or ""
-            amt = getf("amount") or "0"
+    # transfer -> robust parsing and validation
+    # optional Idempotency-Key header (or "idempotency_key" field): a retry with
+    # the same key returns the first result instead of moving money again
+    @router.post("/transfer")
+    def transfer(self, req):
+        sender = self._caller(req, "sender")
+        if sender is None:
+            return
+        receiver = req.get("receiver") or ""
+        amt = req.get("amount") or "0"
+        key = req.headers.get("Idempotency-Key") or req.get("idempotency_key")
+        if key is not None and not valid_key(key):
+            self._send_json(400, {"success": False, "message": "Invalid idempotency key."})
+            return
 
-            # normalize sender/receiver strings
-            if isinstance(sender, list): sender = sender[0]
-            if isinstance(receiver, list): receiver = receiver[0]
+        error, amount = validate_transfer(sender, receiver, amt)
+        if error:
+            self._send_json(400, {"success": False, "message": error})
+            return
 
-            # parse amount safely using Decimal
+        def execute():
+            # call service (transfer_money expects numeric/Decimal-compatible)
+            # convert amount to float for compatibility (model handles Decimal too)
+            if transfer_pipeline is None:
+                return 200, accounts.transfer_money(sender, receiver, float(amount))
             try:
-                # if JSON sent a number, amt may be numeric; convert to str
-                amt_str = str(amt).strip()
-                amount = Decimal(amt_str)
-            except Exception:
-                amount = Decimal("0")
-
-            # validations
-            if not isinstance(sender, str) or not sender or len(sender) != 16 or not sender.isdigit():
-                result = {"success": False, "message": "Invalid sender card number."}
-                status = 400
-            elif not isinstance(receiver, str) or not receiver or len(receiver) != 16 or not receiver.isdigit():
-                result = {"success": False, "message": "Invalid receiver card number."}
-                status = 400
-            elif amount <= 0:
-                result = {"success": False, "message": "Amount must be greater than zero!"}
-                status = 400
+                return 200, transfer_pipeline.transfer(sender, receiver, float(amount))
+            except PipelineFull as e:
+                return 503, {"success": False, "message": str(e)}
+
+        if key is None:
+            status, result = execute()
+            self._send_json(status, result)
+            return
+        status, result, outcome = idempotency.execute(sender, key, fingerprint(receiver, amount.normalize()), execute)
+        headers = {"Idempotent-Replayed": "true"} if outcome in ("replayed", "coalesced") else None
+        if outcome == "busy":
+            headers = {"Retry-After": "1"}
+        self._send_json(status, result, headers)
+
+    # balance -> expects JSON { card_number: "..." }, served from the account cache
+    @router.post("/balance")
+    def balance(self, req):
+        card = self._caller(req, "card_number")
+        if card is None:
+            return
+        balance = accounts.get_balance(card) if card else None
+        if balance is None:
+            self._send_json(404, {"success": False, "message": "Card not found."})
+        else:
+            self._send_json(200, {"success": True, "card_number": card, "balance": float(balance)})
+
+    # statement -> { from, to: "YYYY-MM-DD", period: day|month|year, top, rows }
+    # running balance, per-period in/out and top counterparties of the caller's card
+    @router.post("/statement")
+    def statement(self, req):
+        card = self._caller(req, "card_number")
+        if card is None:
+            return
+        with Metrics.phase("db"):
+            result = card_statement(card, req.get("from") or None, req.get("to") or None,
+                                    req.get("period") or "month", req.get("top") or 10, req.get("rows") or 0)
+        self._send_json(200 if result["success"] else 400, result)
+
+    # batch transfer -> expects JSON { transfers: [{sender, receiver, amount}, ...] }
+    # moves money for any sender, so it is a back-office call behind the admin token
+    @router.post("/transfers/batch")
+    def transfers_batch(self, req):
+        if not self._admin(req):
+            return
+        items = req.data.get("transfers") if isinstance(req.data, dict) else None
+        if not isinstance(items, list) or not items:
+            self._send_json(400, {"success": False, "message": "transfers must be a non-empty list."})
+            return
+        if len(items) > MAX_BATCH_TRANSFERS:
+            self._send_json(400, {"success": False, "message": f"At most {MAX_BATCH_TRANSFERS} transfers per batch."})
+            return
+
+        # validate every item the same way as /transfer; only valid ones reach the model
+        results = [None] * len(items)
+        valid, positions = [], []
+        for i, item in enumerate(items):
+            item = item if isinstance(item, dict) else {}
+            error, amount = validate_transfer(item.get("sender"), item.get("receiver"), item.get("amount"))
+            if error:
+                results[i] = {"success": False, "message": error}
             else:
-                # call model (transfer_money expects numeric/Decimal-compatible)
-                # convert amount to float for compatibility (model handles Decimal too)
-                result = transfer_money(sender, receiver, float(amount))
-                status = 200
+                valid.append({"sender": item["sender"], "receiver": item["receiver"], "amount": amount})
+                positions.append(i)
+        for i, r in zip(positions, accounts.transfer_many(valid)):
+            results[i] = r
 
-            self.send_response(status)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps(result).encode("utf-8"))
+        applied = sum(1 for r in results if r["success"])
+        self._send_json(200, {
+            "success": True,
+            "applied": applied,
+            "failed": len(results) - applied,
+            "results": results
+        })
+
+    # transactions -> expects JSON { card_number: "..." }
+    # optional: page_size + before_id/before_date cursor, or stream: true (NDJSON)
+    @router.post("/transactions")
+    def transactions(self, req):
+        card = self._caller(req, "card_number")
+        if card is None:
+            return
+        try:
+            before_id = req.get("before_id")
+            before_id = int(before_id) if before_id not in (None, "") else None
+            page_size = req.get("page_size")
+            page_size = int(page_size) if page_size not in (None, "") else None
+        except (TypeError, ValueError):
+            self._send_json(400, {"success": False, "message": "Invalid pagination parameters."})
+            return
+        before_date = req.get("before_date") or None
+        if before_date is not None and (before_id is None or not isinstance(before_date, str)):
+            # the cursor is the (before_date, before_id) pair of next_cursor; a date alone has no position
+            self._send_json(400, {"success": False, "message": "before_date needs before_id (send next_cursor as is)."})
             return
 
-        # transactions -> expects JSON { card_number: "..." }
-        if self.path == "/transactions":
-            card = getf("card_number") or ""
-            if isinstance(card, list): card = card[0]
-            transactions = get_transactions(card)
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps(transactions, default=str).encode("utf-8"))
+        if req.get("stream") in (True, "1", "true") or req.accepts("application/x-ndjson"):
+            rows = accounts.iter_transactions(card, before_id, before_date, limit=page_size)
+            self._send_chunked(200, ndjson_lines(rows), "application/x-ndjson")
             return
 
-        # unknown
-        self.send_response(404)
-        self.end_headers()
-        self.wfile.write(b"404 Not Found")
+        if page_size is None and before_id is None:
+            # original response shape: plain list of the latest 200
+            self._send_json(200, accounts.get_transactions(card))
+            return
+
+        limit = max(1, min(page_size or 50, MAX_PAGE_SIZE))
+        transactions = accounts.get_transactions(card, limit, before_id, before_date)
+        self._send_json(200, {
+            "transactions": transactions,
+            "next_cursor": next_cursor(transactions, limit)
+        })
+
+
+def apply_settings(args):
+    # module-level switches from the command line (or BANK_ARGS for app servers, see wsgi.py)
+    global ENABLE_PROFILER, ALLOW_BODY_CARD, GROUP_COMMIT, DEV_RELOAD, TRUST_FORWARDED_FOR
+    BankHandler.timeout = args.keepalive
+    if args.enable_profiler:
+        ENABLE_PROFILER = True
+    ALLOW_BODY_CARD = args.allow_body_card
+    idempotency.persist = args.idempotency_persist
+    DEV_RELOAD = args.dev
+    # load shedding is relative to the request threads of one process
+    admission.configure(capacity=args.max_concurrent or args.workers, enabled=not args.no_admission,
+                        max_inflight=args.max_inflight)
+    if args.trust_forwarded_for:
+        TRUST_FORWARDED_FOR = True
+    if args.group_commit:
+        GROUP_COMMIT = dict(max_batch=args.group_commit_batch, max_delay=args.group_commit_delay_ms / 1000.0)
+    if args.db == "sqlite":
+        configure_backend("sqlite", path=args.sqlite_path)
+    elif args.db == "mysql":
+        configure_backend("mysql")
+
+
+def share_between_processes():
+    # several worker processes: a session token from any worker is accepted by
+    # every worker (logouts go through the revoked_sessions table), idempotency
+    # keys are claimed in the database, and each worker follows the transfers
+    # the others commit (cache invalidation + live feed)
+    global MULTI_PROCESS
+    MULTI_PROCESS = True
+    sessions.stateless = True
+    sessions.on_revoke = record_revocation
+    # one process per CPU already spreads PIN hashing; a process pool in every
+    # worker would only add processes (scrypt releases the GIL while it runs)
+    credentials.workers = 0
+    idempotency.persist = True
+
+
+def preload():
+    # warm what every pre-forked worker shares read-only, then freeze it so the
+    # garbage collector never writes to those pages (they stay copy-on-write)
+    backend = get_backend()
+    if backend.name == "sqlite":
+        # schema migrations run once here instead of racing in every worker
+        backend.connect().close()
+    for sql, _ in hot_queries().values():
+        translate_sql(sql)
+    gc.collect()
+    gc.freeze()
+
+
+def start_services():
+    # background threads of one serving process (every worker in prefork mode)
+    global compactor, transfer_pipeline, follower, revocations
+    # folds hot-account balance slots back into users.balance (no-op without hot accounts)
+    compactor = SlotCompactor().start()
+    if MULTI_PROCESS:
+        follower = TransferFollower().start()
+        Metrics.registry.register_gauges("bank_follower", lambda: follower.stats)
+        revocations = RevocationFollower().start()
+        Metrics.registry.register_gauges("bank_revocations", lambda: revocations.stats)
+    if GROUP_COMMIT is not None:
+        transfer_pipeline = TransferPipeline(**GROUP_COMMIT).start()
+        Metrics.registry.register_gauges("bank_group_commit", transfer_pipeline.stats)
+    if DEV_RELOAD:
+        static_files.watch()
+
+
+def stop_services():
+    global compactor, transfer_pipeline, follower, revocations
+    if compactor is not None:
+        compactor.stop()
+        compactor = None
+    if follower is not None:
+        follower.stop()
+        follower = None
+    if revocations is not None:
+        revocations.stop()
+        revocations = None
+    hub.stop()
+    credentials.shutdown()
+    if transfer_pipeline is not None:
+        transfer_pipeline.stop()
+        transfer_pipeline = None
+
+
+def wsgi_app():
+    # BankHandler routes as a WSGI application; services start with each worker
+    return WSGIApp(BankHandler, on_worker_start=start_services, on_worker_stop=stop_services)
+
+
+def asgi_app(workers=16):
+    return ASGIApp(BankHandler, max_workers=workers, on_worker_start=start_services,
+                   on_worker_stop=stop_services)
+
+
+def build_server(mode="threaded", host="localhost", port=PORT, workers=16, backlog=128,
+                 processes=None, preload_app=True):
+    # single: one request at a time (original behaviour)
+    # threaded: bounded worker pool, one connection per worker
+    # async: asyncio front end, handlers run on an executor
+    # prefork: WSGI app in `processes` forked workers with `workers` threads each
+    if mode == "prefork":
+        return PreforkServer((host, port), wsgi_app(), processes=processes, threads=workers,
+                             backlog=backlog, keepalive=BankHandler.timeout,
+                             preload=preload if preload_app else None)
+    if mode == "single":
+        return SingleHTTPServer((host, port), BankHandler)
+    if mode == "threaded":
+        return ThreadPoolHTTPServer((host, port), BankHandler, max_workers=workers, backlog=backlog)
+    if mode == "async":
+        return AsyncHTTPServer((host, port), BankHandler, max_workers=workers, backlog=backlog,
+                               keepalive_timeout=BankHandler.timeout)
+    raise ValueError(f"unknown server mode: {mode}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bank app HTTP server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--mode", choices=("single", "threaded", "async", "prefork"), default="threaded")
+    parser.add_argument("--workers", type=int, default=16, help="max concurrent request handlers (per process)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="prefork: worker processes (default: CPU count)")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="prefork: skip warming and freezing the app in the master before forking")
+    parser.add_argument("--backlog", type=int, default=128, help="listen backlog size")
+    parser.add_argument("--keepalive", type=float, default=5.0, help="idle keep-alive timeout (seconds)")
+    parser.add_argument("--db", choices=("mysql", "sqlite"), default=None, help="storage backend")
+    parser.add_argument("--sqlite-path", default="database/bank_app.db",
+                        help="SQLite database file (shared by the connection pool, so not :memory:)")
+    parser.add_argument("--enable-profiler", action="store_true", help="expose POST /debug/profiler")
+    parser.add_argument("--allow-body-card", action="store_true", default=ALLOW_BODY_CARD,
+                        help="also accept calls without a login token that send the card number and PIN")
+    parser.add_argument("--idempotency-persist", action="store_true",
+                        default=os.environ.get("BANK_IDEMPOTENCY_PERSIST") == "1",
+                        help="also record idempotency keys in the database (shared across processes)")
+    parser.add_argument("--group-commit", action="store_true",
+                        help="commit concurrent /transfer requests in shared DB transactions")
+    parser.add_argument("--group-commit-batch", type=int, default=128, help="max transfers per commit")
+    parser.add_argument("--group-commit-delay-ms", type=float, default=2.0,
+                        help="max wait for a batch to fill (milliseconds)")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="request threads per process, for the load-shedding queue estimate (default: --workers)")
+    parser.add_argument("--max-inflight", type=int, default=None,
+                        help="API requests running at once per process before 503 (default: --max-concurrent)")
+    parser.add_argument("--no-admission", action="store_true", default=os.environ.get("BANK_ADMISSION") == "0",
+                        help="disable rate limiting and load shedding")
+    parser.add_argument("--trust-forwarded-for", action="store_true",
+                        help="rate-limit by the last X-Forwarded-For address (behind a reverse proxy)")
+    parser.add_argument("--dev", action="store_true", default=os.environ.get("BANK_DEV") == "1",
+                        help="reload changed files under public/ without a restart")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    httpd = HTTPServer(("localhost", PORT), BankHandler)
-    print(f"Server running at http://localhost:{PORT}")
-    httpd.serve_forever()
+    args = parse_args()
+    apply_settings(args)
+    if args.mode == "prefork":
+        # the master only preloads and supervises; each worker starts its own services
+        share_between_processes()
+    else:
+        start_services()
+    httpd = build_server(args.mode, args.host, args.port, args.workers, args.backlog,
+                         processes=args.processes, preload_app=not args.no_preload)
+    print(f"Server running at http://{args.host}:{args.port} ({args.mode}, {args.workers} workers)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_services()
+        httpd.server_close()
@@ -0,0 +1,22 @@
+# tests/conftest.py
+"""
+EN: Shared fixtures: a fresh, migrated SQLite database file per test.
+FA: پیکربندی مشترک تست‌ها: دیتابیس SQLite موقت برای هر تست.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.Database import configure_backend
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    # EN: the process-wide backend points at a new file; the first connection migrates it
+    # FA: دیتابیس جدید برای هر تست
+    backend = configure_backend("sqlite", path=str(tmp_path / "bank.db"))
+    yield backend
+    configure_backend("sqlite", path=str(tmp_path / "closed.db"))
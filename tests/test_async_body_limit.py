@@ -0,0 +1,101 @@
+# tests/test_async_body_limit.py
+"""
+EN: AsyncHTTPServer request bodies: over the limit gets 413 without being
+    read, ordinary bodies are buffered, and a streamed route reads its body
+    line by line through a bounded reader while keep-alive still works.
+FA: تست سقف اندازه بدنه و خواندن تدریجی در سرور async.
+"""
+import http.client
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from app.core.Servers import AsyncHTTPServer
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @staticmethod
+    def streams_body(method, path):
+        return path == "/stream"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if self.path == "/stream":
+            lines = 0
+            while True:
+                line = self.rfile.readline(1 << 16)
+                if not line:
+                    break
+                lines += 1
+            payload = {"lines": lines, "buffered": False}
+        else:
+            payload = {"bytes": len(self.rfile.read(length)), "buffered": True}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    srv = AsyncHTTPServer(("127.0.0.1", port), EchoHandler, max_workers=2,
+                          max_body=1024, max_stream_body=1 << 20)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    conn = None
+    for _ in range(100):
+        try:
+            conn = socket.create_connection(("127.0.0.1", port), timeout=0.1)
+            break
+        except OSError:
+            threading.Event().wait(0.02)
+    conn.close()
+    yield port
+    srv.shutdown()
+    thread.join(timeout=2)
+    srv.server_close()
+
+
+def _post(conn, path, body):
+    conn.request("POST", path, body=body, headers={"Content-Type": "text/plain"})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read()), response
+
+
+def test_body_over_limit_gets_413(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server, timeout=5)
+    status, data, response = _post(conn, "/echo", b"x" * 2048)
+    assert status == 413
+    assert data == {"success": False, "message": "Request body too large."}
+    assert response.getheader("Connection") == "close"
+
+
+def test_buffered_body_and_keepalive(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server, timeout=5)
+    for size in (0, 10, 1024):
+        status, data, _ = _post(conn, "/echo", b"x" * size)
+        assert (status, data) == (200, {"bytes": size, "buffered": True})
+
+
+def test_streamed_route_reads_past_the_buffered_limit(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server, timeout=5)
+    body = b"".join(b"line %06d\n" % n for n in range(20000))
+    status, data, _ = _post(conn, "/stream", body)
+    assert (status, data) == (200, {"lines": 20000, "buffered": False})
+    status, data, _ = _post(conn, "/echo", b"ok")
+    assert (status, data) == (200, {"bytes": 2, "buffered": True})
+    status, _, _ = _post(conn, "/stream", b"x" * ((1 << 20) + 1))
+    assert status == 413
@@ -0,0 +1,111 @@
+# tests/test_event_fanout.py
+"""
+EN: EventBus / SSEHub fan-out, scaled down from benchmarks/sse_scale.py:
+    many idle subscribers on socket pairs all get each event, every
+    subscriber's queue stays within max_events, and a subscriber that
+    stops reading is disconnected once its queue overflows while the
+    others keep streaming.
+FA: تست پخش رویداد به مشترک‌ها: صف محدود و قطع مشترک کند.
+"""
+import socket
+import time
+
+import pytest
+
+from app.core.EventBus import EventBus, sse_frame
+from app.core.Streams import SSEHub
+
+SUBSCRIBERS = 200
+MAX_EVENTS = 8
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def _read(sock, size, timeout=5.0):
+    sock.settimeout(timeout)
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+@pytest.fixture
+def hub():
+    bus = EventBus(max_events=MAX_EVENTS)
+    hub = SSEHub(bus, heartbeat=60.0).start()
+    yield hub
+    hub.stop()
+
+
+def _attach(hub, topic):
+    server_side, client_side = socket.socketpair()
+    hub.attach(server_side, hub.bus.subscribe(topic))
+    return client_side
+
+
+def test_every_idle_subscriber_gets_each_event(hub):
+    clients = [_attach(hub, "card-%d" % (i % 10)) for i in range(SUBSCRIBERS)]
+    try:
+        assert _wait(lambda: hub.count() == SUBSCRIBERS)
+        frames = {i: sse_frame("transaction", {"n": i}) for i in range(10)}
+        for i, frame in frames.items():
+            assert hub.bus.publish("card-%d" % i, frame) == SUBSCRIBERS // 10
+        for i, client in enumerate(clients):
+            frame = frames[i % 10]
+            assert _read(client, len(frame)) == frame
+        assert hub.bus.stats()["subscribers"] == SUBSCRIBERS
+    finally:
+        for client in clients:
+            client.close()
+
+
+def test_queue_is_bounded_and_overflow_is_flagged():
+    bus = EventBus(max_events=MAX_EVENTS)
+    subs = [bus.subscribe("card") for _ in range(50)]
+    delivered = [bus.publish("card", sse_frame("transaction", {"n": n})) for n in range(MAX_EVENTS * 3)]
+    assert delivered[:MAX_EVENTS] == [50] * MAX_EVENTS
+    assert delivered[MAX_EVENTS:] == [0] * (MAX_EVENTS * 2)
+    for sub in subs:
+        assert sub.overflowed
+        assert len(sub.frames) <= MAX_EVENTS
+    assert bus.stats()["overflows"] == 50 * MAX_EVENTS * 2
+
+
+def test_subscriber_that_stops_reading_is_disconnected(hub):
+    slow = _attach(hub, "card")
+    fast = _attach(hub, "card")
+    try:
+        assert _wait(lambda: hub.count() == 2)
+        frame = sse_frame("transaction", {"pad": "x" * 65536})
+        # EN: fill the slow peer's socket buffer, then its queue; the fast one keeps reading
+        # FA: پر شدن بافر سوکت و صف مشترک کند
+        received = 0
+        for _ in range(200):
+            hub.bus.publish("card", frame)
+            received += len(_read(fast, len(frame)))
+            if hub.stats()["dropped_slow"]:
+                break
+        assert _wait(lambda: hub.stats()["dropped_slow"] == 1)
+        assert _wait(lambda: hub.count() == 1)
+        assert received % len(frame) == 0
+        # EN: the slow peer sees the stream end once it reads what was buffered
+        # FA: مشترک کند پس از خواندن بافر به انتهای جریان می‌رسد
+        slow.settimeout(5.0)
+        while slow.recv(1 << 20):
+            pass
+        assert hub.bus.stats()["subscribers"] == 1
+        hub.bus.publish("card", frame)
+        assert _read(fast, len(frame)) == frame
+    finally:
+        slow.close()
+        fast.close()
@@ -0,0 +1,36 @@
+# tests/test_query_plans.py
+"""
+EN: Every hot query must be served by an index: EXPLAIN QUERY PLAN on a
+    migrated SQLite database may not show a full table scan.
+FA: هیچ کوئری پرتکراری نباید کل جدول را پیمایش کند.
+"""
+import pytest
+
+from app.models import AccountModel
+from app.models.AccountService import hot_queries
+from app.models.Migrations import check_query_plans
+
+
+@pytest.fixture
+def conn(sqlite_backend):
+    connection = sqlite_backend.connect()
+    yield connection
+    connection.close()
+
+
+def test_no_hot_query_scans_a_table(conn):
+    assert check_query_plans(conn, "sqlite") == {}
+
+
+@pytest.mark.parametrize("name", sorted(hot_queries()))
+def test_hot_query_uses_an_index(conn, name):
+    assert name not in check_query_plans(conn, "sqlite")
+
+
+def test_full_scan_is_reported(conn, monkeypatch):
+    # EN: the check itself must notice a query no index can serve
+    # FA: خود بررسی باید full scan را تشخیص دهد
+    monkeypatch.setattr(AccountModel, "hot_queries", lambda: {
+        "by_first_name": ("SELECT id FROM users WHERE first_name=%s", ("Ali",)),
+    })
+    assert list(check_query_plans(conn, "sqlite")) == ["by_first_name"]
@@ -0,0 +1,69 @@
+# tests/test_transfer_concurrency.py
+"""
+EN: Concurrent transfers on SQLite: single transfers and batches from
+    several threads between a few accounts with small balances (many
+    "Insufficient funds"). Money is neither created nor lost, no balance
+    goes negative and every balance matches the ledger.
+    The full-size version is benchmarks/stress_transfers.py.
+FA: تست همزمانی انتقال‌ها: ثابت ماندن مجموع موجودی، نبود موجودی منفی و سازگاری با دفتر کل.
+"""
+import random
+import threading
+from decimal import Decimal
+
+from app.models.AccountService import accounts
+from app.models.Database import configure_pool, get_connection
+from app.models.Ledger import reconcile
+from benchmarks.bench_batch_transfer import seed_accounts
+
+THREADS = 6
+TRANSFERS = 60
+
+
+def _balances():
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT card_number, balance FROM users")
+        return {card: Decimal(str(balance)) for card, balance in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def test_concurrent_transfers_conserve_money(sqlite_backend):
+    configure_pool(max_size=THREADS + 1)
+    cards = seed_accounts(8, balance="10.00")
+    before = _balances()
+    errors = []
+
+    def single(n):
+        rng = random.Random(n)
+        for _ in range(TRANSFERS):
+            sender, receiver = rng.sample(cards, 2)
+            result = accounts.transfer_money(sender, receiver, f"{rng.randint(1, 800) / 100:.2f}")
+            if not result["success"] and result["message"] != "Insufficient funds.":
+                errors.append(result)
+
+    def batches(n):
+        rng = random.Random(n)
+        for _ in range(TRANSFERS // 10):
+            items = [{"sender": s, "receiver": r, "amount": f"{rng.randint(1, 800) / 100:.2f}"}
+                     for s, r in (rng.sample(cards, 2) for _ in range(10))]
+            for result in accounts.transfer_many(items):
+                if not result["success"] and result["message"] != "Insufficient funds.":
+                    errors.append(result)
+
+    pool = [threading.Thread(target=single, args=(n,)) for n in range(THREADS - 1)]
+    pool.append(threading.Thread(target=batches, args=(THREADS,)))
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    after = _balances()
+    assert errors == []
+    assert sum(after.values()) == sum(before.values())
+    assert min(after.values()) >= 0
+    assert after != before
+    assert reconcile()["ok"]
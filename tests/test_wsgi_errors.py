@@ -0,0 +1,38 @@
+# tests/test_wsgi_errors.py
+"""
+EN: public/index.py: an unexpected exception becomes a generic JSON 500;
+    the detail and traceback go to wsgi.errors only.
+FA: تست پاسخ عمومی خطای 500 و ثبت جزئیات در لاگ سرور.
+"""
+import importlib.util
+import io
+import json
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_index():
+    spec = importlib.util.spec_from_file_location("public_index", os.path.join(ROOT, "public", "index.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_unexpected_error_is_logged_not_returned(monkeypatch):
+    index = _load_index()
+
+    def boom(action, params):
+        raise RuntimeError("db password=hunter2")
+
+    monkeypatch.setattr(index, "handle", boom)
+    errors = io.StringIO()
+    started = []
+    environ = {"REQUEST_METHOD": "GET", "QUERY_STRING": "action=balance", "wsgi.errors": errors}
+    body = b"".join(index.application(environ, lambda status, headers: started.append(status)))
+
+    assert started == ["500 Internal Server Error"]
+    assert json.loads(body) == {"status": "error", "message": "Internal server error."}
+    assert "hunter2" not in body.decode("utf-8")
+    log = errors.getvalue()
+    assert "Traceback" in log and "RuntimeError: db password=hunter2" in log
@@ -0,0 +1,24 @@
+# wsgi.py
+"""
+EN: WSGI entry point for production application servers, e.g.
+        gunicorn --workers 4 --threads 16 --preload wsgi:application
+    Options come from BANK_ARGS, using the same flags as server.py, e.g.
+    BANK_ARGS="--db sqlite --sqlite-path database/bank_app.db --group-commit".
+    Importing this module preloads the application. With --preload that
+    happens once in the master, before the workers are forked. Each worker
+    starts its own DB pool and background threads on its first request.
+    Without --preload, set BANK_SESSION_SECRET so every worker signs
+    session tokens with the same key.
+FA: نقطه ورود WSGI برای سرورهای برنامه (مثل gunicorn) با بارگذاری اولیه قبل از fork.
+"""
+import os
+import shlex
+
+import server
+
+args = server.parse_args(shlex.split(os.environ.get("BANK_ARGS", "")))
+server.apply_settings(args)
+server.share_between_processes()
+server.preload()
+
+application = server.wsgi_app()